@@ -0,0 +1,212 @@
+"""
+benchmarks of the native drawer and of whole dialog frames.
+
+    python -m pybud.bench [--filter NAME] [--iterations N] [--json FILE]
+
+every result is in seconds per iteration, `--json` writes them together with
+the versions, so runs of different releases can be compared.
+"""
+# python built-in imports
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from array import array
+# internal imports
+import pybud
+from pybud import _drawer
+from pybud.drawer import Drawer
+from pybud.drawer.ansi import AnsiGraphicMode
+from pybud.drawer.ansi import AnsiString as AStr
+from pybud.drawer.color import ColorMode
+from pybud.gui.dialog import AutoDialog
+from pybud.gui.widgets import WidgetInput, WidgetLabel, WidgetList, WidgetOptions, WidgetPicker, WidgetTable
+# external imports
+from readchar import key as Key
+
+TEXT = "The quick brown fox jumps over the lazy dog, 0123456789 ..."
+BACKGROUND = (90, 90, 250)
+
+# (width, widgets) of the headless dialog frames
+DIALOG_SIZES = [(40, 6), (80, 12), (160, 30)]
+# keys sent to the dialogs, one per frame
+DIALOG_KEYS = [Key.DOWN, "x", Key.UP, Key.BACKSPACE, Key.TAB, "UPDATE"]
+
+
+def styled_line():
+    # same line as the native benchmarks, the style changes every few characters
+    line = AStr("")
+    for i, word in enumerate(TEXT.split(" ")):
+        c = i * 40 % 256
+        part = AStr(word + " ", fore = (c, 255 - c, 120), back = (30, 30, c) if i % 3 == 0 else None)
+        if i % 4 == 1:
+            part.add_graphics(AnsiGraphicMode.BOLD)
+        line = line + part
+    return line
+
+
+def widget_drawer(size):
+    drawer = Drawer(size=size, plane_color=BACKGROUND)
+    line = styled_line()
+    for y in range(size[0]):
+        drawer.place(line, (y, 1), False)
+    return drawer
+
+
+def headless_dialog(width, n_widgets, output):
+    """an `AutoDialog` with labels, inputs and options that draws to `output`."""
+    dialog = AutoDialog(width=width, background_color=BACKGROUND)
+    dialog.output = output
+    for i in range(n_widgets):
+        y = 1 if dialog.height is None else dialog.height
+        if i % 3 == 0:
+            dialog.add_widget(WidgetLabel(TEXT * 2, size=[width, None], pos=[0, y], padding=2))
+        elif i % 3 == 1:
+            dialog.add_widget(WidgetInput("Name: ", size=[width - 4, None], pos=[2, y]))
+        else:
+            dialog.add_widget(WidgetOptions([("Yes", str), ("No", str), ("Maybe", str)], size=[width - 4, None], pos=[2, y]))
+    return dialog
+
+
+def python_benchmarks(output):
+    """
+    name -> factory of a benchmark through the python api, the factory builds
+    its fixture and returns the function running one iteration.
+    """
+    line = styled_line()
+    plain = AStr(TEXT, fore = (0, 255, 0))
+    target = AStr(" " * 120, back = BACKGROUND)
+    small = widget_drawer((6, 58))
+    plane = Drawer(size=(20, 80), plane_color=BACKGROUND)
+
+    api = {
+        "py_astring_new": lambda: AStr(TEXT, fore = (0, 255, 0), back = (20, 20, 20)),
+        "py_astring_add": lambda: line + plain,
+        "py_astring_split_at": lambda: line.split_at(30),
+        "py_astring_place": lambda: target.place(line, 10, False),
+        "py_place_drawer": lambda: plane.place_drawer(small, (2, 4), False),
+        "py_place_drawer_border": lambda: plane.place_drawer(small, (2, 4), True),
+        "py_to_string_limited": lambda: line.to_string(ColorMode.LIMITED),
+        "py_to_string_truecolor": lambda: line.to_string(ColorMode.TRUECOLOR),
+        "py_to_string_ansi16": lambda: line.to_string(ColorMode.ANSI16),
+    }
+    # the api benchmarks share small fixtures, the dialogs are only built when they are selected
+    benchmarks = {name: (lambda fn = fn: fn) for name, fn in api.items()}
+    for width, n_widgets in DIALOG_SIZES:
+        benchmarks[f"dialog_frame_{width}x{n_widgets}"] = lambda width = width, n_widgets = n_widgets: dialog_frame(width, n_widgets, output)
+    benchmarks["dialog_list_1m"] = lambda: list_frame(output)
+    benchmarks["dialog_picker_300k"] = lambda: picker_frame(output)
+    benchmarks["dialog_table_1m"] = lambda: table_frame(output)
+    return benchmarks
+
+
+def dialog_frame(width, n_widgets, output):
+    # the dialog is built once, every iteration handles one key and draws the frame
+    dialog = headless_dialog(width, n_widgets, output)
+    dialog._prepare_show()
+    keys = itertools.cycle(DIALOG_KEYS)
+    # every key marks the dialog dirty and the spinner animates on "UPDATE", so each one draws a frame
+    return lambda: dialog.update(next(keys))
+
+
+def list_frame(output):
+    # a list of a million items, every iteration scrolls it and draws the frame
+    dialog = AutoDialog(width=60, background_color=BACKGROUND)
+    dialog.output = output
+    dialog.add_widget(WidgetList(range(1_000_000), rows=20, size=[56, None], pos=[2, 1], format=lambda i: f"item {i}"))
+    dialog._prepare_show()
+    keys = itertools.cycle([Key.DOWN, Key.DOWN, Key.PAGE_DOWN, Key.UP])
+    return lambda: dialog.update(next(keys))
+
+
+def picker_frame(output):
+    # a picker of 300k names, every iteration types or deletes a character of the query and draws the frame
+    dialog = AutoDialog(width=60, background_color=BACKGROUND)
+    dialog.output = output
+    names = [f"host-{i % 97:02d}-{i:06d}.example" for i in range(300_000)]
+    dialog.add_widget(WidgetPicker(names, rows=20, size=[56, None], pos=[2, 1]))
+    dialog._prepare_show()
+    keys = itertools.cycle(list("host-4") + [Key.BACKSPACE] * 6)
+    return lambda: dialog.update(next(keys))
+
+
+def table_frame(output):
+    # a table of a million rows, every iteration scrolls or sorts it and draws the frame
+    dialog = AutoDialog(width=60, background_color=BACKGROUND)
+    dialog.output = output
+    n = 1_000_000
+    columns = {
+        "id": range(n),
+        "value": array("d", (i * 7919 % 10007 / 7 for i in range(n))),
+        "group": array("i", (i % 97 for i in range(n))),
+    }
+    table = WidgetTable(columns, rows=20, formats={"value": lambda v: f"{v:.2f}"}, size=[56, None], pos=[2, 1])
+    # the sort indexes are built once, the iterations only reuse them
+    for column in range(len(columns)):
+        for descending in (False, True):
+            table.columns.order(column, descending)
+    dialog.add_widget(table)
+    dialog._prepare_show()
+    keys = itertools.cycle([Key.DOWN, Key.PAGE_DOWN, Key.RIGHT, "s", Key.UP, "s", Key.RIGHT, "s", Key.LEFT, Key.LEFT])
+    return lambda: dialog.update(next(keys))
+
+
+def timeit(fn, iterations):
+    # one untimed run, so first-use costs (style interning) are not measured
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def run(filter: str = None, iterations: int = 2000, native_iterations: int = 10000):
+    """runs the native and the python benchmarks, returns {name: seconds per iteration}."""
+    results = {}
+    for name, seconds in _drawer.run_benchmarks(filter, native_iterations):
+        results[name] = seconds
+
+    with open(os.devnull, "wb") as devnull:
+        for name, factory in python_benchmarks(devnull.fileno()).items():
+            if filter is None or filter in name:
+                results[name] = timeit(factory(), iterations)
+    return results
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog="python -m pybud.bench", description="benchmarks of pybud")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains FILTER")
+    parser.add_argument("--iterations", type=int, default=2000, help="iterations of the python benchmarks")
+    parser.add_argument("--native-iterations", type=int, default=10000, help="iterations of the native benchmarks")
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE as json ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.iterations, args.native_iterations)
+
+    if args.json is None:
+        for name, seconds in results.items():
+            print(f"{name:<28} {seconds * 1e6:>12.2f} us")
+        return
+
+    report = json.dumps({
+        "pybud": pybud.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "native_iterations": args.native_iterations,
+        "unit": "seconds per iteration",
+        "results": results,
+    }, indent=2)
+    if args.json == "-":
+        print(report)
+    else:
+        with open(args.json, "w") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
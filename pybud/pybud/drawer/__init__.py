@@ -1,3 +1,6 @@
 from pybud import _drawer
 
-Drawer = _drawer.Drawer
\ No newline at end of file
+Drawer = _drawer.Drawer
+DrawList = _drawer.DrawList
+Compositor = _drawer.Compositor
+StyleTransform = _drawer.StyleTransform
\ No newline at end of file
@@ -1,13 +1,66 @@
+from typing import BinaryIO, Iterable, overload
+
 from .color import ColorMode
-from .ansi import AnsiString
+from .ansi import AnsiChar, AnsiGraphics, AnsiString
+
+Color = tuple[int, int, int]
 
 class Drawer:
+    # copies every row on access, prefer indexing or `memoryview(drawer)`
     plane: list[AnsiString]
+    size: tuple[int, int]
     def __init__(self, size: tuple[int, int], plane_color: tuple[int, int, int]) -> None: ...
+    def __len__(self) -> int: ...
+    @overload
+    def __getitem__(self, index: int) -> AnsiString: ...
+    @overload
+    def __getitem__(self, index: tuple[int, int]) -> AnsiChar: ...
+    # read-only buffer of shape (height, width, 2): codepoint and style id of each cell
+    def __buffer__(self, flags: int) -> memoryview: ...
     def render(self, mode: ColorMode) -> str: ...
+    def render_diff(self, mode: ColorMode) -> str: ...
+    # target is a file descriptor or an object with write(bytes), returns the number of bytes written
+    def render_into(self, target: int | BinaryIO, mode: ColorMode, diff: bool = True, sync: bool = False) -> int: ...
+    def clear(self, plane_color: tuple[int, int, int]) -> None: ...
+    def invalidate(self) -> None: ...
     def __str__(self) -> str: ...
     def place(self, astr: AnsiString, pos: tuple[int, int], assign: bool) -> None: ...
     def center_place(self, astr: AnsiString, ypos: int, assign: bool) -> None: ...
+    # items are (text, fore, back, graphics, (y, x)), fore, back and graphics only apply to str texts
+    def place_many(self, items: Iterable[tuple[str | AnsiString, Color | None, Color | None, AnsiGraphics | None, tuple[int, int]]], assign: bool = False) -> None: ...
+    def place_list(self, list: 'DrawList', assign: bool = False) -> None: ...
     def place_str(self, str: str, pos: tuple[int, int]) -> None: ...
     def center_place_str(self, str: str, ypos: int) -> None: ...
-    def place_drawer(self, other: 'Drawer', pos: tuple[int, int], border: bool) -> None: ...
\ No newline at end of file
+    def place_drawer(self, other: 'Drawer', pos: tuple[int, int], border: bool) -> None: ...
+
+class DrawList:
+    def __init__(self) -> None: ...
+    def add(self, text: str | AnsiString, pos: tuple[int, int], fore: Color = None, back: Color = None, graphics: AnsiGraphics = None) -> int: ...
+    def set_text(self, index: int, text: str | AnsiString, fore: Color = None, back: Color = None, graphics: AnsiGraphics = None) -> None: ...
+    def set_pos(self, index: int, pos: tuple[int, int]) -> None: ...
+    def clear(self) -> None: ...
+    def __len__(self) -> int: ...
+
+class StyleTransform:
+    # the back color darkened to `percent`%, marks the active widget
+    @staticmethod
+    def shade(percent: int = 90) -> 'StyleTransform': ...
+    # fore and back color mixed with `color`, `amount` from 0.0 to 1.0
+    @staticmethod
+    def tint(color: Color, amount: float = 0.25) -> 'StyleTransform': ...
+    # darker colors and FAINT, for the layers behind a popup
+    @staticmethod
+    def dim() -> 'StyleTransform': ...
+    def __eq__(self, other: object) -> bool: ...
+
+class Compositor:
+    # layers are set every frame, the ones not set since the last `compose` are removed
+    plane_color: Color | None
+    def __init__(self, plane_color: Color = None) -> None: ...
+    # clip is (y, x, height, width) of the frame, the cells of `drawer` are copied only when they changed
+    def set_layer(self, key: int, drawer: Drawer, pos: tuple[int, int], z: int = 0, transform: StyleTransform = None, clip: tuple[int, int, int, int] = None) -> None: ...
+    def remove_layer(self, key: int) -> None: ...
+    def invalidate(self) -> None: ...
+    # composes the changed areas and copies the frame into `target`
+    def compose(self, target: Drawer) -> None: ...
+    def __len__(self) -> int: ...
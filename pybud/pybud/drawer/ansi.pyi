@@ -1,3 +1,5 @@
+from typing import overload
+
 from .color import ColorMode, AnsiColor
 
 class AnsiGraphicMode:
@@ -34,10 +36,19 @@ class AnsiChar:
     def __add__(self, other: 'AnsiChar') -> AnsiString: ...
 
 class AnsiString:
+    # copies every character on access, prefer indexing or `memoryview(astr)`
     vec: list[AnsiChar]
     def __init__(self, str: str, fore: tuple[int, int, int] = None, back: tuple[int, int, int] = None) -> None: ...
+    @overload
+    def __getitem__(self, index: int) -> AnsiChar: ...
+    @overload
+    def __getitem__(self, index: slice) -> 'AnsiString': ...
+    # read-only buffer of shape (len, 2): codepoint and style id of each character
+    def __buffer__(self, flags: int) -> memoryview: ...
     def to_string(self, mode: ColorMode) -> str: ...
     def split_at(self, mid: int) -> tuple[AnsiString, AnsiString]: ...
+    # (start, end) of every line when word wrapped at `width` characters
+    def wrap(self, width: int) -> list[tuple[int, int]]: ...
     def place(self, text: AnsiString, pos: int, assign: bool)  -> None: ...
     def place_str(self, text: str, pos: int)  -> None: ...
     def center_place(self, text: AnsiString, assign: bool)  -> None: ...
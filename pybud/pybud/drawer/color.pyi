@@ -1,6 +1,11 @@
 class ColorMode:
+    # 256 color palette
     LIMITED = ...
     TRUECOLOR = ...
+    # the 16 colors of the terminal, the nearest one is chosen
+    ANSI16 = ...
+    # no colors, only graphics
+    MONOCHROME = ...
 
 class ColorGround:
     BACK = ...
@@ -0,0 +1,78 @@
+# python built-in imports
+from array import array
+
+
+class SortedRows():
+    """
+    the rows of a table in the order of a cached sort index, a sequence of
+    row indices, see `Columns.rows`.
+    """
+    def __init__(self, order):
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i: int):
+        if i < 0:
+            i += len(self.order)
+        if not 0 <= i < len(self.order):
+            raise IndexError("row index out of range")
+        return int(self.order[i])
+
+
+class Columns():
+    """
+    the data of a table, one array per column (lists, ranges, `array` or numpy
+    arrays, anything with `len` and indexing), all of the same length.
+
+    cells are only turned into text by `format`, when they are shown. the
+    sort index of a column is computed from its values once per direction
+    and kept, so sorting again by the same column costs nothing. sorts are
+    stable, rows with equal values stay in their order in both directions.
+    """
+    def __init__(self, columns, formats: dict = None):
+        columns = dict(columns)
+        self.names: list[str] = list(columns.keys())
+        self.arrays: list = list(columns.values())
+        lengths = set(map(len, self.arrays))
+        assert len(lengths) <= 1, f"the columns have different lengths: {sorted(lengths)}"
+        self.length = lengths.pop() if lengths else 0
+        # name -> function that turns a value of the column into its text
+        self.formats = {} if formats is None else dict(formats)
+        # (column, descending) -> indices of the rows sorted by its values
+        self._orders: dict[tuple, object] = {}
+
+    def __len__(self):
+        return self.length
+
+    def index(self, column):
+        """the index of a column given by name or index."""
+        return self.names.index(column) if isinstance(column, str) else column
+
+    def format(self, column: int, row: int):
+        return self.formats.get(self.names[column], str)(self.arrays[column][row])
+
+    def order(self, column: int, descending: bool = False):
+        """the sort index of a column, the row indices by its values."""
+        order = self._orders.get((column, descending))
+        if order is None:
+            values = self.arrays[column]
+            if hasattr(values, "argsort"):
+                # a numpy column sorts itself, a descending sort is the
+                # ascending sort of the reversed column read backwards
+                if descending:
+                    order = (self.length - 1 - values[::-1].argsort(kind = "stable"))[::-1]
+                else:
+                    order = values.argsort(kind = "stable")
+            else:
+                typecode = "I" if self.length < 2 ** 32 else "Q"
+                order = array(typecode, sorted(range(self.length), key = values.__getitem__, reverse = descending))
+            self._orders[(column, descending)] = order
+        return order
+
+    def rows(self, column: int = None, descending: bool = False):
+        """the row indices sorted by `column`, in the order of the arrays without one."""
+        if column is None:
+            return range(self.length)
+        return SortedRows(self.order(column, descending))
@@ -1,25 +1,42 @@
 # python built-in imports
+import asyncio
+import concurrent.futures
+import inspect
+import os
+import threading
 import time
-from threading import Thread
 # internal imports
-from pybud.drawer import Drawer
+from pybud.drawer import Compositor, Drawer, StyleTransform
 from pybud.drawer.ansi import AnsiString as AStr
 from pybud.drawer.color import ColorMode
 #relative impotrs
+from .focus import FocusRing
+from .keyboard import ESCAPE_TIMEOUT
+from .layout import Layout, iter_widgets
+from .profiler import Profiler
+from .scheduler import Scheduler
+from .terminal import StdTerminal
 from .widgets import WidgetBase
 # external imports
 try:
     from readchar import key as Key
-    from readchar import readkey
 except ModuleNotFoundError:
     print("Unable to find 'readchar' package, install it using `pip install readchar`")
     exit(1)
 
-# ticks per second
+# default animation ticks per second
 TPS = 20
 
+async def _await(awaitable):
+    return await awaitable
+
+def _run_in_thread(awaitable):
+    # runs `awaitable` to completion on a new loop of another thread
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        return executor.submit(asyncio.run, _await(awaitable)).result()
+
 class Drawable():
-    def __init__(self, ctype: ColorMode = None):
+    def __init__(self, ctype: ColorMode = None, tps: int = None, fps: int = None, terminal = None):
         self.ctype = ColorMode.TRUECOLOR if ctype is None else ctype
         self.width = None
         self.height = None
@@ -27,12 +44,36 @@ class Drawable():
         self.is_disabled = False
         self.closed = True
         self.drawer: Drawer = None
+        self.drawer_size = None
         self.drawing = False
+        # keys read together are handled before a single frame is drawn, see `update_keys`
+        self.batching = False
         self.tick = 0
         # self.last_update = 0
-        self.tickupdate_thread: Thread = None
-        self.tickupdate_started = False
-        self.tick_memory = []
+        # `tps` animation ticks per second, at most `fps` frames per second
+        self.scheduler = Scheduler(TPS if tps is None else tps, fps)
+        self.start_time = self.scheduler.clock()
+        # where keys are read from and frames written to, see `terminal.py`
+        self.terminal = StdTerminal() if terminal is None else terminal
+        # thread running the event loop, None while the drawable is not shown
+        self.loop_thread = None
+        # asyncio loop of `show_async`, None when shown with `show`
+        self.aloop: asyncio.AbstractEventLoop = None
+        self.tasks: set[asyncio.Future] = set()
+        self.task_error: BaseException = None
+        self._closed_future: asyncio.Future = None
+        self._timer: asyncio.TimerHandle = None
+        self._timer_deadline = None
+        self._poll_handle: asyncio.TimerHandle = None
+        # finishes an escape sequence whose rest did not arrive, see `_on_key_ready`
+        self._escape_handle: asyncio.TimerHandle = None
+        # wraps every frame in the synchronized update mode of the terminal, so
+        # it is never shown half drawn (terminals without it ignore the sequence)
+        self.sync_output = True
+        # file descriptor or binary file the frames are written to, the output of the terminal if None
+        self.output = None
+        # opt-in frame timings, see `Profiler`
+        self.profiler: Profiler = None
 
         # holds all callbacks
         self._callbacks = {
@@ -50,166 +91,487 @@ class Drawable():
 
     def _run_callback(self, calllback_id: str, **kwargs):
         self.assert_callback_id(calllback_id)
-        return [fn(**kwargs) for fn in self._callbacks[calllback_id]]
+        if self.profiler is None:
+            results = [fn(**kwargs) for fn in self._callbacks[calllback_id]]
+        else:
+            results = [self._profile_callback(calllback_id, fn, kwargs) for fn in self._callbacks[calllback_id]]
+        for result in results:
+            if inspect.isawaitable(result):
+                self.run_task(result)
+        return results
+
+    def _profile_callback(self, calllback_id: str, fn, kwargs: dict):
+        start = time.perf_counter()
+        result = fn(**kwargs)
+        name = getattr(fn, "__qualname__", None) or repr(fn)
+        self.profiler.add(f"callback.{calllback_id}.{name}", time.perf_counter() - start)
+        return result
+
+    def run_task(self, awaitable, done = None):
+        """
+        runs a coroutine callback, as a task of the loop in `show_async` or to
+        completion in `show`. `done` is called with its result.
+        """
+        if self.aloop is None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                result = asyncio.run(_await(awaitable))
+            else:
+                # `show` was called while a loop runs in this thread (e.g. in jupyter), asyncio.run would raise
+                result = _run_in_thread(awaitable)
+            if done is not None:
+                done(result)
+            return
+
+        task = asyncio.ensure_future(awaitable, loop = self.aloop)
+        self.tasks.add(task)
+        def on_finished(task: asyncio.Future):
+            self.tasks.discard(task)
+            if task.cancelled():
+                return
+            if task.exception() is not None:
+                # raised again by `show_async`
+                self.task_error = task.exception()
+                if not self.closed:
+                    self.close()
+                return
+            if done is not None:
+                done(task.result())
+            # the task most likely changed what is shown
+            if not self.closed:
+                self.mark_dirty()
+                self.present()
+        task.add_done_callback(on_finished)
 
     def close(self):
         self._run_callback("on_close")
 
         self.closed = True
-        while self.tickupdate_thread.is_alive():
-            time.sleep(0.01)
-        self.tickupdate_started = False
-        print(f"\033[{self.height}F", end = "")        
-        print(("\n" + " " * self.width) * (self.height), end = "")
-        print("\033M" * self.height, end = "\r")
-        print(" " * self.width + "\033M")
+        self.wake_loop()
+        # the area is cleared below, the front buffer does not match the screen anymore
+        if self.drawer is not None:
+            self.drawer.invalidate()
+        self.write(
+            f"\033[{self.height}F" +
+            ("\n" + " " * self.width) * (self.height) +
+            "\033M" * self.height + "\r" +
+            " " * self.width + "\033M\n"
+        )
 
     def update(self, key: str):
+        if self.profiler is None:
+            return self._update(key)
+        start = self.profiler.begin_frame()
+        dropped_frames = self.scheduler.dropped_frames
+        key = self._update(key)
+        self.profiler.end_frame(start, self.scheduler.dropped_frames - dropped_frames)
+        return key
+
+    def _update(self, key: str):
         if key == Key.CTRL_C:
             self.close()
         if key == Key.ESC:
             self.close()
         if key == "UPDATE":
-            self.tick += 1
+            self.tick = self.get_tick()
+        else:
+            # a key changes the state, widgets that animate request their own updates
+            self.mark_dirty()
         self._run_callback("on_update", key = key)
-        self.draw()
+        if self.scheduler.dirty and not self.batching:
+            self.present()
         return key
 
-    def do_tick_updates(self):
-        while not self.closed:
-            # records the delay caused by an update and subtracts
-            # that from tick waiting time.  
-            t = time.time()
-            self.update("UPDATE")
-            real_delay = (time.time() - t) 
-            self.tick_memory.append(real_delay)
-            self.tick_memory = self.tick_memory[-5:]
+    def update_keys(self, keys: list[str]):
+        """handles keys that were read together, the frame is drawn once after the last one."""
+        self.batching = True
+        try:
+            for key in keys:
+                self.update(key)
+                if self.closed:
+                    return
+        finally:
+            self.batching = False
+        if self.scheduler.dirty:
+            self.present()
+
+    def present(self):
+        # changes within one frame interval of `fps` are drawn together by a later update
+        wait = self.scheduler.frame_wait()
+        if wait > 0:
+            self.scheduler.deferred_frames += 1
+            self.request_update(wait)
+        else:
+            self.draw()
 
-            frame_time = (1 / TPS) - (sum(self.tick_memory) / len(self.tick_memory))
+    def get_tick(self):
+        return int((self.scheduler.clock() - self.start_time) * self.scheduler.tps)
 
-            time.sleep(max(0, frame_time))
+    def time_until_tick(self, tick: int):
+        return self.start_time + tick / self.scheduler.tps - self.scheduler.clock()
 
-    def do_key_updates(self):
-        while not self.closed:
-            try:
-                key = readkey()
-            except KeyboardInterrupt:
-                key = Key.CTRL_C
-            self.update(key)
+    def request_update(self, delay: float = 0):
+        """runs an "UPDATE" tick in `delay` seconds, or earlier if another one is due."""
+        self.scheduler.request(delay)
+        self.wake_loop()
 
-    def show(self):
+    def wake_loop(self):
+        if self.loop_thread is None:
+            return
+        same_thread = self.loop_thread == threading.get_ident()
+        if self.aloop is not None:
+            # the timer of the asyncio loop has to follow the deadline
+            if same_thread:
+                self._on_wakeup()
+            else:
+                self.aloop.call_soon_threadsafe(self._on_wakeup)
+        elif not same_thread:
+            # the loop sleeps until the earliest deadline, only other threads have to wake it
+            self.terminal.wake()
+
+    def mark_dirty(self):
+        """redraws after the running update."""
+        self.scheduler.mark_dirty()
+
+    def run_loop(self):
+        # a single thread waits for keys and update deadlines, so keys and
+        # ticks are handled one after another in the order they happen. an
+        # idle drawable sleeps until the next key.
+        self.loop_thread = threading.get_ident()
+        try:
+            with self.terminal:
+                while not self.closed:
+                    try:
+                        keys = self.terminal.read_keys() if self.terminal.wait(self.scheduler.timeout()) else []
+                    except KeyboardInterrupt:
+                        keys = [Key.CTRL_C]
+                    except EOFError:
+                        # stdin was closed, nothing can be typed anymore
+                        self.close()
+                        break
+                    if keys:
+                        self.update_keys(keys)
+                    if not self.closed and self.scheduler.pop_due():
+                        self.update("UPDATE")
+        finally:
+            self.loop_thread = None
+
+    def _on_key_ready(self):
+        # called by the asyncio loop when stdin is readable
+        if self._escape_handle is not None:
+            self._escape_handle.cancel()
+            self._escape_handle = None
+        try:
+            keys = self.terminal.read_keys()
+        except KeyboardInterrupt:
+            keys = [Key.CTRL_C]
+        except EOFError:
+            self.close()
+            return
+        if keys:
+            self.update_keys(keys)
+        if not self.closed and self.terminal.pending_escape():
+            # the loop is not blocked waiting for the rest of the sequence, a lone ESC is a key once it is late
+            self._escape_handle = self.aloop.call_later(ESCAPE_TIMEOUT, self._on_escape_timeout)
+
+    def _on_escape_timeout(self):
+        self._escape_handle = None
+        keys = self.terminal.finish_escape()
+        if keys and not self.closed:
+            self.update_keys(keys)
+
+    def _poll_keys(self):
+        # windows consoles can not be added as readers of the asyncio loop
+        while not self.closed and self.terminal.wait(0):
+            self._on_key_ready()
+        if not self.closed:
+            self._poll_handle = self.aloop.call_later(0.01, self._poll_keys)
+
+    def _on_timer(self):
+        self._timer = None
+        self._timer_deadline = None
+        if not self.closed and self.scheduler.pop_due():
+            self.update("UPDATE")
+        self._on_wakeup()
+
+    def _on_wakeup(self):
+        # runs on the asyncio loop, follows the deadline of the scheduler with a single timer
+        if self.closed:
+            if not self._closed_future.done():
+                self._closed_future.set_result(None)
+            return
+        if self.scheduler.deadline == self._timer_deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        timeout = self.scheduler.timeout()
+        self._timer = None if timeout is None else self.aloop.call_later(timeout, self._on_timer)
+        self._timer_deadline = self.scheduler.deadline
+
+    def _prepare_show(self):
         self.closed = False
+        self.tick = 0
+        self.start_time = self.scheduler.clock()
+        self.scheduler.request()
 
-        print("\n" * self.height, end="")
+        self.write("\n" * self.height)
+        # the screen below the cursor is blank, the next frame must be drawn completely
+        if self.drawer is not None:
+            self.drawer.invalidate()
         self.draw()
 
-        if not self.tickupdate_started:
-            self.tickupdate_thread = Thread(target=self.do_tick_updates)
-            self.tickupdate_thread.start()
-            self.tickupdate_started = True
-        self.do_key_updates()
+    def show(self):
+        self._prepare_show()
+        self.run_loop()
+
+    async def show_async(self):
+        """
+        like `show`, but runs on the running asyncio loop instead of blocking:
+        stdin is added as a reader of the loop and ticks are loop timers.
+        """
+        self.aloop = asyncio.get_running_loop()
+        self._closed_future = self.aloop.create_future()
+        self.task_error = None
+        self._prepare_show()
+        self.loop_thread = threading.get_ident()
+        self.terminal.wait_escape = False
+        try:
+            with self.terminal:
+                if self.terminal.fileno() is not None:
+                    self.aloop.add_reader(self.terminal.fileno(), self._on_key_ready)
+                else:
+                    self._poll_keys()
+                try:
+                    self._on_wakeup()
+                    await self._closed_future
+                    # coroutine callbacks that were running when the dialog closed
+                    if self.tasks:
+                        await asyncio.wait(list(self.tasks))
+                finally:
+                    if self.terminal.fileno() is not None:
+                        self.aloop.remove_reader(self.terminal.fileno())
+                    if self._poll_handle is not None:
+                        self._poll_handle.cancel()
+                        self._poll_handle = None
+                    if self._timer is not None:
+                        self._timer.cancel()
+                    if self._escape_handle is not None:
+                        self._escape_handle.cancel()
+                        self._escape_handle = None
+        finally:
+            self.terminal.wait_escape = True
+            self._timer = None
+            self._timer_deadline = None
+            self.loop_thread = None
+            self.aloop = None
+        if self.task_error is not None:
+            raise self.task_error
+
+    def get_drawer(self):
+        # the drawer is kept between frames, so it can compare the new frame
+        # with the last one and only write the cells that changed
+        size = (self.height, self.width)
+        if self.drawer is None or self.drawer_size != size:
+            self.drawer = Drawer(size=size, plane_color=self.background_color)
+            self.drawer_size = size
+        else:
+            self.drawer.clear(self.background_color)
+        return self.drawer
 
     def draw(self):
-        drawer = Drawer(size=(self.height, self.width), plane_color=self.background_color)
+        self.scheduler.frame_started()
+        drawer = self.get_drawer()
         if not self.closed:
             self.drawing = True
             self._run_callback("on_draw", drawer = drawer)
             self.drawing = False
-        print(f"\033[{self.height}F", end="")
-        print(drawer.render(self.ctype), end="")
+        output = self.get_output()
+        start = time.perf_counter()
+        written = drawer.render_into(output, self.ctype, sync = self.sync_output)
+        if not isinstance(output, int):
+            output.flush()
+        if self.profiler is not None:
+            self.profiler.add("native_render", time.perf_counter() - start)
+            self.profiler.add("bytes_written", written)
         self.last_draw_time = time.time()
 
+    def get_output(self):
+        if self.output is not None:
+            return self.output
+        return self.terminal.get_output()
+
+    def write(self, data: str):
+        """writes `data` to the output with a single write."""
+        output = self.get_output()
+        data = data.encode()
+        if isinstance(output, int):
+            while data:
+                data = data[os.write(output, data):]
+        else:
+            output.write(data)
+            output.flush()
+
 
 class DialogBase(Drawable):
-    def __init__(self, width: int, ctype: ColorMode = None, background_color: tuple[int, int, int] = None):
-        super().__init__(ctype)
+    base_keymap = {Key.TAB: 1}
+
+    def __init__(self, width: int, ctype: ColorMode = None, background_color: tuple[int, int, int] = None, tps: int = None, fps: int = None, terminal = None):
+        super().__init__(ctype, tps, fps, terminal)
         self.width = width
         self.background_color = background_color
         self.widgets: list[WidgetBase] = []
-        self.set_active_widget(0)
+        # number of added widgets that are instances of each class, for their names
+        self.widget_counts: dict[type, int] = {}
+        # places the widgets of `set_layout`, at `layout_pos` [x, y]
+        self.layout: Layout = None
+        self.layout_pos = [0, 1]
+        # bottom of the widgets that are not in the layout, plus the last line
+        self._widgets_height = 0
+        # the selectable widgets in focus order, keys are sent to the focused one
+        self.focus = FocusRing()
+        # keys that move the focus, key -> number of widgets to move it by
+        self.keymap = dict(self.base_keymap)
         self.result = None
         self.tick = 0
-        self.totw = 0
         self.last_draw_time = time.time()
+        # widgets are layers of the compositor, only the layers that changed are drawn again
+        self.compositor = Compositor(background_color)
+        # marks the active widget
+        self.focus_transform = StyleTransform.shade()
 
         self.add_callback("on_update", self._on_update)
         self.add_callback("on_draw", self.draw_widgets)
 
     def update_height(self):
-        max_height = 0
+        """
+        sets the height to fit every widget again, call it after changing the
+        size of a widget that is not in the layout.
+        """
+        self._widgets_height = 0
         for w in self.widgets:
-            widget_height = w.pos[1] + w.size[1]
-            if widget_height > max_height:
-                max_height = widget_height
-
-        # set the height to one line more than the end of most buttom added dialog
-        self.height = max_height + 1
-
-    def add_widget(self, w: WidgetBase):
+            if w.layout_parent is None:
+                self._widgets_height = max(self._widgets_height, w.pos[1] + w.size[1] + 1)
+        self._set_height()
+
+    def _set_height(self):
+        # one line more than the end of the lowest widget
+        height = self._widgets_height
+        if self.layout is not None:
+            height = max(height, self.layout_pos[1] + self.layout.measure(self._layout_width()) + 1)
+        self.height = height
+
+    def add_widget(self, w: WidgetBase, focus_order: float = None):
+        """adds `w`, selectable widgets are focused in `focus_order` (the order they are added by default)."""
         w.on_add(self)
         w.background_color = self.background_color
         self.widgets.append(w)
-        # self.height += w.size.getHeight()
-        self.update_height()
-        self.totw = self.get_total_selectable_widgets()
+        for cls in type(w).__mro__:
+            self.widget_counts[cls] = self.widget_counts.get(cls, 0) + 1
+        if w.selectable:
+            self.focus.add(w, focus_order)
+        # only the new widget can make the dialog higher, the layout is measured when it is drawn
+        if w.layout_parent is None:
+            self._widgets_height = max(self._widgets_height, w.pos[1] + w.size[1] + 1)
+            self.height = max(self.height or 0, self._widgets_height)
+
+    def set_layout(self, layout: Layout):
+        """
+        places widgets with a layout container (see `layout.py`), its widgets
+        are added to the dialog. widgets added to the layout later are added too.
+        """
+        assert self.layout is None, "the dialog has a layout already"
+        self.layout = layout
+        layout.dialog = self
+        for w in iter_widgets(layout):
+            self.add_widget(w)
+        self.apply_layout()
+        return layout
+
+    def apply_layout(self):
+        """
+        places the widgets of the layout for the current width, only the parts
+        that changed since the last call are measured and placed again.
+        """
+        if self.layout is None:
+            return
+        self.layout.place(self.layout_pos[0], self.layout_pos[1], self._layout_width())
+        self._set_height()
 
-    def get_total_selectable_widgets(self):
-        i = 0
-        for w in self.widgets:
-            if w.selectable:
-                i += 1
-        return i
+    def _layout_width(self):
+        return self.width - self.layout_pos[0]
 
-    def get_active_widget(self):
-        i = 0
-        w = None
+    @property
+    def totw(self):
+        return len(self.focus)
 
-        if self.totw == 0:
-            return w, i
-        
-        for w in self.widgets:
-            if not w.selectable:
-                continue
-            if w.is_disabled:
-                i += 1
-                continue
-            break
+    def get_total_selectable_widgets(self):
+        return len(self.focus)
 
-        return w, i
+    def get_active_widget(self):
+        """the focused widget and its index in the focus order."""
+        return self.focus.focused, self.focus.index
 
     def set_active_widget(self, __i: int):
-        i = 0
-        for w in self.widgets:
-            if not w.selectable:
-                continue
+        self.focus.focus_index(__i)
+        self._focus_changed()
 
-            if i == __i:
-                w.is_disabled = False
-            else:
-                w.is_disabled = True
-            i += 1
+    def _focus_changed(self):
+        # the focused widget starts its animations (e.g. a blinking pointer) on its next update
+        self.request_update()
 
     def _on_update(self, key):
-        w, i = self.get_active_widget()
+        w = self.focus.focused
         if w is not None:
             key = w.update(key)
             self.result = w.result
 
-        if key == Key.TAB:
-            self.set_active_widget((i + 1) % self.totw)
-        
+        step = self.keymap.get(key)
+        if step is not None:
+            if self.focus.move(step):
+                self._focus_changed()
+            return None
+
         return key
 
+    def get_drawer(self):
+        # the layout decides the height of the frame
+        self.apply_layout()
+        return super().get_drawer()
+
     def draw_widgets(self, drawer: Drawer):
-        active_w, _ = self.get_active_widget()
+        active_w = self.focus.focused
+        self.compositor.plane_color = self.background_color
+        if self.profiler is not None:
+            return self._draw_widgets_profiled(drawer, active_w)
         for w in self.widgets:
-            border = w is active_w
-            drawer.place_drawer(w.render(), (w.pos[1], w.pos[0]), border=border)
+            self._set_layer(w, w.render(), active_w)
+        self.compositor.compose(drawer)
+
+    def _set_layer(self, w: WidgetBase, rendered: Drawer, active_w: WidgetBase):
+        transform = self.focus_transform if w is active_w else w.transform
+        self.compositor.set_layer(id(w), rendered, (w.pos[1], w.pos[0]), z = w.z, transform = transform, clip = w.clip)
+
+    def _draw_widgets_profiled(self, drawer: Drawer, active_w: WidgetBase):
+        for w in self.widgets:
+            start = time.perf_counter()
+            rendered = w.render()
+            placing = time.perf_counter()
+            self._set_layer(w, rendered, active_w)
+            self.profiler.add(f"render.{w.name}", placing - start)
+            self.profiler.add("set_layer", time.perf_counter() - placing)
+        start = time.perf_counter()
+        self.compositor.compose(drawer)
+        self.profiler.add("compose", time.perf_counter() - start)
 
     def show(self):
         super().show()
         return self.result
 
+    async def show_async(self):
+        await super().show_async()
+        return self.result
+
     def __str__(self):
         s = "+ " + self.__class__.__name__ + ":\n"
         for w in self.widgets:
@@ -218,50 +580,45 @@ class DialogBase(Drawable):
 
 
 class AutoDialog(DialogBase):
-    def __init__(self, width: int, ctype: ColorMode = None, background_color: tuple[int, int, int] = None, mode: str = "v"):
-        super().__init__(width, ctype)
-        assert mode in ["v", "iv", "h", "ih"], f"Unknown mode \"{mode}\"!"
-        self.mode = mode.lower()
+    # keys that move the focus in each mode, added to the keymap of `DialogBase`
+    mode_keymaps = {
+        "v": {Key.UP: -1, Key.DOWN: 1},
+        "iv": {Key.UP: 1, Key.DOWN: 1},
+        "h": {Key.LEFT: -1, Key.RIGHT: 1},
+        "ih": {Key.LEFT: -1, Key.RIGHT: 1},
+    }
+
+    def __init__(self, width: int, ctype: ColorMode = None, background_color: tuple[int, int, int] = None, mode: str = "v", animated: bool = True, tps: int = None, fps: int = None, terminal = None):
+        super().__init__(width, ctype, tps = tps, fps = fps, terminal = terminal)
+        self.mode = mode
         self.background_color = background_color
+        # the spinner redraws the dialog on every tick, disable it for idle dialogs
+        self.animated = animated
 
+        self.add_callback("on_update", self._on_update_auto)
         self.add_callback("on_draw", self._on_draw_auto)
 
-    def _on_update(self, key):
-        key = super()._on_update(key)
+    @property
+    def mode(self):
+        return self._mode
 
-        if key == None:
-            return
+    @mode.setter
+    def mode(self, mode: str):
+        mode = mode.lower()
+        assert mode in self.mode_keymaps, f"Unknown mode \"{mode}\"!"
+        self._mode = mode
+        # compiled once, a key is a single lookup
+        self.keymap = {**self.base_keymap, **self.mode_keymaps[mode]}
 
-        if self.totw == 0:
-            return
-
-        w, i = self.get_active_widget()
-        av = i
-        if self.mode == "v":
-            if key == Key.UP:
-                av = (i - 1) % self.totw 
-            elif key == Key.DOWN:
-                av = (i + 1) % self.totw
-        elif self.mode == "iv":
-            if key == Key.DOWN:
-                av = (i + 1) % self.totw
-            elif key == Key.UP:
-                av = (i + 1) % self.totw
-        elif self.mode == "h":
-            if key == Key.LEFT:
-                av = (i - 1) % self.totw
-            elif key == Key.RIGHT:
-                av = (i + 1) % self.totw
-        elif self.mode == "ih":
-            if key == Key.RIGHT:
-                av = (i + 1) % self.totw
-            elif key == Key.LEFT:
-                av = (i - 1) % self.totw
-        else:
-            raise ValueError(f"Unknown mode \"{self.mode}\"!")
-        self.set_active_widget(av)
+    def _on_update_auto(self, key):
+        if key == "UPDATE" and self.animated:
+            # the spinner moves on every tick
+            self.mark_dirty()
+            self.request_update(self.time_until_tick(self.tick + 1))
 
     def _on_draw_auto(self, drawer: Drawer):
+        if not self.animated:
+            return
         def get_admination(tick, n = 3, animation = "▁▂▃▄▅▆▆▅▄▃▂▁▂ "):
             rt = tick
             return animation[rt % (len(animation)-n):rt % (len(animation)-n)+n]
@@ -0,0 +1,95 @@
+# python built-in imports
+from bisect import bisect_right
+
+
+class FocusRing():
+    """
+    the widgets that can be focused, in focus order, and the index of the focused one.
+
+    moving the focus only touches the widget that loses it and the one that
+    gets it, so it does not depend on the number of widgets.
+
+    widgets are ordered by their `order` (the order they were added by default),
+    the focused widget has `is_disabled` set to False and all others to True.
+    """
+    def __init__(self):
+        self.widgets: list = []
+        self.index = 0
+        # sort keys of `widgets`, (order, number of the add)
+        self._keys: list[tuple] = []
+        # id of a widget -> its index in `widgets`
+        self._positions: dict[int, int] = {}
+        self._added = 0
+        # until the focus is moved the first widget of the focus order keeps it
+        self._moved = False
+
+    def __len__(self):
+        return len(self.widgets)
+
+    def __contains__(self, w):
+        return id(w) in self._positions
+
+    @property
+    def focused(self):
+        """the focused widget of this ring, None if it is empty."""
+        return self.widgets[self.index] if self.widgets else None
+
+    def add(self, w, order: float = None):
+        """adds `w` at `order` in the focus order."""
+        key = (self._added if order is None else order, self._added)
+        self._added += 1
+        i = bisect_right(self._keys, key)
+        focused = self.focused
+        self._keys.insert(i, key)
+        self.widgets.insert(i, w)
+        self._reindex(i)
+        _set_focus(w, False)
+        if focused is None:
+            self.index = 0
+            _set_focus(w, True)
+        else:
+            self.index = self._positions[id(focused)]
+            if not self._moved:
+                self._focus(0)
+
+    def _reindex(self, start: int):
+        for i in range(start, len(self.widgets)):
+            self._positions[id(self.widgets[i])] = i
+
+    def index_of(self, w):
+        return self._positions[id(w)]
+
+    def focus_index(self, i: int):
+        """focuses the widget at index `i` of the focus order."""
+        self._moved = True
+        self._focus(i)
+
+    def _focus(self, i: int):
+        if not self.widgets:
+            return
+        i %= len(self.widgets)
+        if i == self.index:
+            return
+        _set_focus(self.focused, False)
+        self.index = i
+        _set_focus(self.focused, True)
+
+    def focus(self, w):
+        self.focus_index(self._positions[id(w)])
+
+    def move(self, step: int, wrap: bool = True):
+        """
+        moves the focus `step` widgets forward (or back). without `wrap` the
+        focus does not move past either end, returns if another widget got it.
+        """
+        n = len(self.widgets)
+        i = self.index + step
+        if n == 0 or (not wrap and not 0 <= i < n):
+            return False
+        index = self.index
+        self.focus_index(i)
+        return self.index != index
+
+
+def _set_focus(w, focused: bool):
+    w.is_disabled = not focused
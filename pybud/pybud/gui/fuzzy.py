@@ -0,0 +1,147 @@
+# python built-in imports
+from array import array
+from bisect import bisect_left
+from itertools import compress, repeat
+from operator import contains, not_
+
+
+def _narrow(texts: list, indices, ends, ch: str):
+    """
+    the texts at `indices` that contain `ch` at or after their `ends`, with
+    the ends moved past it. a greedy subsequence match one character at a
+    time, a single `str.find` per text.
+    """
+    found = list(map(str.find, map(texts.__getitem__, indices), repeat(ch), ends))
+    keep = list(map((-1).__lt__, found))
+    return array("I", compress(indices, keep)), array("I", map((1).__add__, compress(found, keep)))
+
+
+def _span(text: str, query: str):
+    """
+    the length of a short part of `text` that contains the characters of
+    `query` in order: the first match found forward, shortened by a match
+    backward from its end. None if `query` does not match.
+    """
+    end = 0
+    for ch in query:
+        end = text.find(ch, end)
+        if end < 0:
+            return None
+        end += 1
+    start = end
+    for ch in reversed(query):
+        start = text.rfind(ch, 0, start)
+    return end - start
+
+
+class FuzzyIndex():
+    """
+    filters the texts of `items` (`key(item)` of every item, read once, an
+    iterable is read into a list) by a query, an item matches if the
+    characters of the query appear in its text in the same order. case is
+    ignored.
+
+    the texts are sorted once, the items that start with a query are a slice
+    of that order found by bisection. the other matches are filtered from the
+    matches of the query typed before, so each added character narrows the
+    previous result instead of searching all items again, and a backspace
+    gets the previous result back without a search. the matches are only
+    filtered once they are read past the ones that start with the query.
+    """
+    def __init__(self, items, key = str):
+        # a sequence is used as it is, the matches are indices into it
+        if not (hasattr(items, "__len__") and hasattr(items, "__getitem__")):
+            items = list(items)
+        self.items = items
+        self.texts: list[str] = list(map(str.lower, map(key, items)))
+        self.lengths: list[int] = list(map(len, self.texts))
+        # indices of the items by their text and the texts in that order
+        self._order = sorted(range(len(self.texts)), key = self.texts.__getitem__)
+        self._sorted_texts = list(map(self.texts.__getitem__, self._order))
+        # character -> (indices of the texts that contain it, the ends of its first occurrence)
+        self._postings: dict[str, tuple[array, array]] = {}
+        # [query, (indices of its matches, the ends of their first matches)
+        # or None until they are needed] of the queries typed so far, each
+        # one starts with the one before
+        self._history: list[list] = []
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _postings_of(self, ch: str):
+        postings = self._postings.get(ch)
+        if postings is None:
+            texts = self.texts
+            postings = _narrow(texts, range(len(texts)), repeat(0), ch)
+            self._postings[ch] = postings
+        return postings
+
+    def _prefix_range(self, query: str):
+        """the slice of the sorted texts that start with `query`."""
+        lo = bisect_left(self._sorted_texts, query)
+        last = ord(query[-1])
+        if last == 0x10FFFF:
+            return lo, len(self._sorted_texts)
+        return lo, bisect_left(self._sorted_texts, query[:-1] + chr(last + 1), lo)
+
+    def _push(self, query: str):
+        # drops the queries that are not a start of this one, e.g. after a backspace
+        history = self._history
+        while history and not query.startswith(history[-1][0]):
+            history.pop()
+        if not history or history[-1][0] != query:
+            history.append([query, None])
+        return len(history) - 1
+
+    def matches(self, query: str):
+        """indices of the items that match `query`, in the order of the items."""
+        query = query.lower()
+        n = self._push(query)
+        return self._matches(n)[0]
+
+    def _matches(self, n: int):
+        query, found = self._history[n]
+        if found is not None:
+            return found
+
+        # narrows the matches of the longest query before that has them
+        done = 1
+        for previous, found in reversed(self._history[:n]):
+            if found is not None:
+                done = len(previous)
+                break
+        else:
+            found = self._postings_of(query[0])
+        texts = self.texts
+        for ch in query[done:]:
+            found = _narrow(texts, *found, ch)
+        self._history[n][1] = found
+        return found
+
+    def search(self, query: str):
+        """
+        indices of the items that match `query`, best first: the texts that
+        start with the query (in text order), the texts that contain it (the
+        shorter first) and the other matches (the closer the characters of the
+        query are together the earlier). an iterator, ranked as it is read.
+        """
+        if not query:
+            return range(len(self.texts))
+        query = query.lower()
+        self._push(query)
+        return self._ranked(query)
+
+    def _ranked(self, query: str):
+        lo, hi = self._prefix_range(query)
+        yield from map(self._order.__getitem__, range(lo, hi))
+
+        texts, lengths = self.texts, self.lengths
+        matches = self.matches(query)
+        prefix = map(str.startswith, map(texts.__getitem__, matches), repeat(query))
+        rest = list(compress(matches, map(not_, prefix)))
+        substring = list(map(contains, map(texts.__getitem__, rest), repeat(query)))
+        yield from sorted(compress(rest, substring), key = lengths.__getitem__)
+
+        def spread(i):
+            return (_span(texts[i], query), lengths[i])
+        yield from sorted(compress(rest, map(not_, substring)), key = spread)
@@ -0,0 +1,68 @@
+class GapBuffer():
+    """
+    text with a cursor, edited at the cursor in O(1) (amortized).
+
+    the characters before the cursor are kept in order and the ones after it
+    in reverse, the gap between the two lists is the cursor. moving the cursor
+    moves characters from one side to the other.
+    """
+    def __init__(self, text: str = ""):
+        self._before: list[str] = list(text)
+        # reversed, the character right after the cursor is the last one
+        self._after: list[str] = []
+
+    def __len__(self):
+        return len(self._before) + len(self._after)
+
+    def __str__(self):
+        return "".join(self._before) + "".join(reversed(self._after))
+
+    @property
+    def cursor(self):
+        return len(self._before)
+
+    def insert(self, text: str):
+        """inserts `text` before the cursor."""
+        self._before.extend(text)
+
+    def delete_back(self, n: int = 1):
+        """deletes up to `n` characters before the cursor (backspace)."""
+        del self._before[max(0, len(self._before) - n):]
+
+    def delete_forward(self, n: int = 1):
+        """deletes up to `n` characters after the cursor (delete)."""
+        del self._after[max(0, len(self._after) - n):]
+
+    def move_to(self, pos: int):
+        pos = min(max(pos, 0), len(self))
+        if pos < self.cursor:
+            moved = self._before[pos:]
+            del self._before[pos:]
+            self._after.extend(reversed(moved))
+        elif pos > self.cursor:
+            n = pos - self.cursor
+            moved = self._after[len(self._after) - n:]
+            del self._after[len(self._after) - n:]
+            self._before.extend(reversed(moved))
+
+    def move(self, n: int):
+        """moves the cursor `n` characters, negative values move it back."""
+        self.move_to(self.cursor + n)
+
+    def slice(self, start: int, end: int):
+        """the text from `start` to `end`, only these characters are copied."""
+        start, end = max(start, 0), min(end, len(self))
+        if start >= end:
+            return ""
+        split = len(self._before)
+        head = "".join(self._before[start:min(end, split)]) if start < split else ""
+        if end <= split:
+            return head
+        # positions after the cursor are counted from the end of `_after`
+        n = len(self._after)
+        lo, hi = n - (end - split), n - max(start - split, 0)
+        return head + "".join(reversed(self._after[lo:hi]))
+
+    def clear(self):
+        self._before.clear()
+        self._after.clear()
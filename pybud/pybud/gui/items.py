@@ -0,0 +1,64 @@
+# python built-in imports
+from itertools import islice
+
+
+class LazyItems():
+    """
+    the items of a list widget by index.
+
+    a sequence (anything with `len` and indexing, e.g. a list, a range or a
+    numpy array) is used as it is. any other iterable is read only as far as
+    items are asked for, the items read so far are kept so the list can
+    scroll back to them.
+    """
+    def __init__(self, items):
+        if hasattr(items, "__len__") and hasattr(items, "__getitem__"):
+            self._sequence = items
+            self._iterator = None
+            self._read = None
+        else:
+            self._sequence = None
+            self._iterator = iter(items)
+            self._read = []
+
+    @property
+    def exhausted(self):
+        """True once the number of items is known."""
+        return self._iterator is None
+
+    def _read_to(self, n: int):
+        if self._iterator is None or len(self._read) >= n:
+            return
+        missing = n - len(self._read)
+        self._read.extend(islice(self._iterator, missing))
+        if len(self._read) < n:
+            self._iterator = None
+
+    def has(self, i: int):
+        """True if there is an item at `i`, an iterable is read up to it."""
+        if i < 0:
+            return False
+        if self._sequence is not None:
+            return i < len(self._sequence)
+        self._read_to(i + 1)
+        return i < len(self._read)
+
+    def known_len(self):
+        """the number of items read so far, all of them for a sequence."""
+        if self._sequence is not None:
+            return len(self._sequence)
+        return len(self._read)
+
+    def __len__(self):
+        # an iterable is read to its end
+        if self._sequence is not None:
+            return len(self._sequence)
+        while self._iterator is not None:
+            self._read_to(len(self._read) * 2 + 1024)
+        return len(self._read)
+
+    def __getitem__(self, i: int):
+        if self._sequence is not None:
+            return self._sequence[i]
+        self._read_to(i + 1)
+        return self._read[i]
@@ -0,0 +1,340 @@
+# python built-in imports
+import codecs
+import os
+import select
+import selectors
+import sys
+import threading
+import time
+from collections import deque
+# external imports
+from readchar import key as Key
+from readchar import readkey
+
+try:
+    import termios
+except ImportError:
+    # windows, keys are read through readchar (msvcrt)
+    termios = None
+    import msvcrt
+
+# bracketed paste, terminals send pasted text between these two sequences
+PASTE_START = "\x1b[200~"
+PASTE_END = "\x1b[201~"
+
+# how long to wait for the rest of an escape sequence before a lone ESC is a key
+ESCAPE_TIMEOUT = 0.025
+
+# other sequences terminals send for the keys of `readchar`
+_KEY_ALIASES = {
+    "\x1bOA": Key.UP,
+    "\x1bOB": Key.DOWN,
+    "\x1bOC": Key.RIGHT,
+    "\x1bOD": Key.LEFT,
+    "\x1bOH": Key.HOME,
+    "\x1bOF": Key.END,
+    "\x1b[1~": Key.HOME,
+    "\x1b[4~": Key.END,
+    "\x1b[7~": Key.HOME,
+    "\x1b[8~": Key.END,
+}
+
+
+class Paste(str):
+    """text that was pasted as a whole, it is handled as a single key."""
+
+
+# newlines and tabs of pasted text become spaces on a single line, other control characters are dropped
+_SINGLE_LINE = {c: None for c in [*range(0x20), 0x7F]}
+_SINGLE_LINE.update({ord("\n"): " ", ord("\r"): " ", ord("\t"): " "})
+
+
+def single_line(text: str):
+    """`text` without control characters, for widgets that hold a single line."""
+    return text.replace("\r\n", "\n").translate(_SINGLE_LINE)
+
+
+def _build_trie():
+    # nested dicts, the key of a complete sequence is stored under ""
+    trie = {}
+    sequences = {v: v for v in vars(Key).values() if isinstance(v, str) and v.startswith("\x1b") and len(v) > 1}
+    sequences.update(_KEY_ALIASES)
+    sequences[PASTE_START] = PASTE_START
+    for seq, key in sequences.items():
+        node = trie
+        for ch in seq[1:]:
+            node = node.setdefault(ch, {})
+        node[""] = key
+    return trie
+
+# escape sequences without their leading ESC
+_KEY_TRIE = _build_trie()
+
+
+def _match_escape(text: str, i: int):
+    """
+    matches the escape sequence at `text[i]`, returns (key, end), or None if
+    `text` ends before the sequence is complete.
+    """
+    node = _KEY_TRIE
+    j = i + 1
+    while j < len(text) and text[j] in node:
+        node = node[text[j]]
+        j += 1
+        if "" in node and len(node) == 1:
+            # no longer sequence starts with this one
+            return (node[""], j)
+    if j == len(text):
+        # every character so far was a prefix of a known sequence
+        return None
+    if "" in node:
+        return (node[""], j)
+
+    # unknown sequences are single keys too, like readchar returns them
+    if text.startswith("\x1b[", i):
+        j = i + 2
+        while j < len(text) and text[j] in "0123456789;?":
+            j += 1
+        if j == len(text):
+            return None
+        return (text[i:j + 1], j + 1)
+    if text.startswith("\x1bO", i):
+        return (text[i:i + 3], i + 3) if i + 2 < len(text) else None
+    # alt + key
+    return (text[i:i + 2], i + 2)
+
+
+def decode_keys(text: str, final: bool = False):
+    """
+    splits `text` into keys, returns (keys, rest). `rest` is the start of a
+    sequence or paste that is not complete yet. with `final` an incomplete
+    escape sequence is returned as a key (a lone ESC is the escape key).
+    """
+    keys = []
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch != "\x1b":
+            keys.append(ch)
+            i += 1
+            continue
+
+        match = _match_escape(text, i)
+        if match is None:
+            if not final:
+                break
+            match = (text[i:], n)
+        key, end = match
+        if key == PASTE_START:
+            close = text.find(PASTE_END, end)
+            if close == -1:
+                # the paste continues in the next read
+                break
+            keys.append(Paste(text[end:close]))
+            i = close + len(PASTE_END)
+            continue
+        keys.append(key)
+        i = end
+    return keys, text[i:]
+
+
+class KeyReader():
+    """
+    reads keys from stdin for an event loop. `wait` returns as soon as a key can
+    be read, the timeout has passed or `wake` was called from another thread.
+
+    stdin is read in bulk, `read_keys` returns all keys of a read at once so
+    they can be handled before a single frame is drawn.
+    """
+    def __init__(self):
+        self.fd = None
+        self.selector: selectors.BaseSelector = None
+        # terminal mode of stdin before `open`, restored by `close`
+        self._saved_mode = None
+        # self-pipe, written by `wake` to interrupt `wait`
+        self._wakeup = None
+        self._woken = threading.Event()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # decoded keys that were not returned yet, and the start of an incomplete sequence
+        self._keys = deque()
+        self._rest = ""
+        # chunks of a paste whose end was not read yet, and the end of the text
+        # already searched, where `PASTE_END` can start (see `_read_paste`)
+        self._paste = None
+        self._paste_tail = ""
+        # with False a lone ESC is not waited for, the event loop calls `finish_escape`
+        # `ESCAPE_TIMEOUT` after a read that left `pending_escape`
+        self.wait_escape = True
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        if termios is None:
+            return
+        self.fd = sys.stdin.fileno()
+        self._wakeup = os.pipe()
+        for fd in self._wakeup:
+            os.set_blocking(fd, False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.fd, selectors.EVENT_READ)
+        self.selector.register(self._wakeup[0], selectors.EVENT_READ)
+
+        if os.isatty(self.fd):
+            # no line buffering and no echo while open, like readchar does for every key
+            self._saved_mode = termios.tcgetattr(self.fd)
+            mode = termios.tcgetattr(self.fd)
+            mode[3] &= ~(termios.ICANON | termios.ECHO)
+            mode[6][termios.VMIN] = 1
+            mode[6][termios.VTIME] = 0
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, mode)
+
+    def close(self):
+        if termios is None or self.selector is None:
+            return
+        if self._saved_mode is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self._saved_mode)
+            self._saved_mode = None
+        self.selector.close()
+        self.selector = None
+        for fd in self._wakeup:
+            os.close(fd)
+        self._wakeup = None
+
+    def fileno(self):
+        """file descriptor the keys are read from, None if it can not be selected on."""
+        return self.fd
+
+    def wake(self):
+        """makes a running `wait` return, can be called from any thread."""
+        if self._wakeup is None:
+            self._woken.set()
+            return
+        try:
+            os.write(self._wakeup[1], b"\0")
+        except BlockingIOError:
+            # the pipe is full, `wait` is woken already
+            pass
+
+    def wait(self, timeout: float = None):
+        """returns True if a key can be read, False on timeout or wake up."""
+        if self._keys:
+            return True
+        if termios is None:
+            return self._poll_console(timeout)
+
+        key_ready = False
+        for selector_key, _ in self.selector.select(timeout):
+            if selector_key.fd == self.fd:
+                key_ready = True
+            else:
+                self._drain_wakeup()
+        return key_ready
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wakeup[0], 64):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _poll_console(self, timeout):
+        # the windows console can not be used with selectors, it is polled instead
+        end = None if timeout is None else time.monotonic() + timeout
+        while not msvcrt.kbhit():
+            if self._woken.is_set():
+                self._woken.clear()
+                return False
+            if end is not None and time.monotonic() >= end:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _stdin_ready(self, timeout: float):
+        # only stdin, a pending wake up would end the wait for the rest of a sequence early
+        return bool(select.select([self.fd], [], [], timeout)[0])
+
+    def _read(self):
+        # everything that is available, a paste arrives in a few large reads
+        data = os.read(self.fd, 65536)
+        if not data:
+            raise EOFError("stdin was closed")
+        text = self._decoder.decode(data)
+        keys = []
+        if self._paste is not None:
+            paste, text = self._read_paste(text)
+            if paste is None:
+                return
+            keys.append(paste)
+
+        more, self._rest = decode_keys(self._rest + text)
+        keys += more
+        if self._rest.startswith(PASTE_START):
+            # the paste continues in the next reads, only their text is searched for its end
+            pasted = self._rest[len(PASTE_START):]
+            self._paste = [pasted]
+            self._paste_tail = pasted[-(len(PASTE_END) - 1):]
+            self._rest = ""
+        elif self._rest and self.wait_escape and not self._stdin_ready(ESCAPE_TIMEOUT):
+            # an escape sequence is sent at once, if nothing follows a lone ESC it was the key
+            keys += self.finish_escape()
+        self._keys.extend(keys)
+
+    def pending_escape(self):
+        """True if the last read ended with the start of an escape sequence."""
+        return bool(self._rest)
+
+    def finish_escape(self):
+        """returns the start of an escape sequence that was not completed as keys (a lone ESC is the escape key)."""
+        keys, self._rest = decode_keys(self._rest, final=True)
+        return keys
+
+    def _read_paste(self, text: str):
+        # returns the paste and the text after it, (None, "") while its end was not read.
+        # a long paste arrives in many reads, each one is searched once
+        tail = self._paste_tail
+        searched = tail + text
+        close = searched.find(PASTE_END)
+        if close == -1:
+            self._paste.append(text)
+            self._paste_tail = searched[-(len(PASTE_END) - 1):]
+            return None, ""
+        pasted = "".join(self._paste) + text
+        # `tail` is the end of the text before, `close` is relative to its start
+        close += len(pasted) - len(text) - len(tail)
+        self._paste = None
+        self._paste_tail = ""
+        # with False a lone ESC is not waited for, the event loop calls `finish_escape`
+        # `ESCAPE_TIMEOUT` after a read that left `pending_escape`
+        self.wait_escape = True
+        return Paste(pasted[:close]), pasted[close + len(PASTE_END):]
+
+    def read_keys(self):
+        """
+        returns all keys that were read together, blocks until there is at least
+        one. the list is empty while a paste is not complete.
+        """
+        if termios is None:
+            keys = [readkey()]
+            while msvcrt.kbhit():
+                keys.append(readkey())
+            return keys
+
+        if not self._keys:
+            self._read()
+        keys = list(self._keys)
+        self._keys.clear()
+        return keys
+
+    def read_key(self):
+        """reads one key, escape sequences are read as a whole like `readchar.readkey` does."""
+        if termios is None:
+            return readkey()
+        while not self._keys:
+            self._read()
+        return self._keys.popleft()
@@ -0,0 +1,198 @@
+"""
+containers that place widgets, so they do not need absolute positions.
+
+a container is given a width, measures the height its children need in it
+and places them. geometry is cached: a container is measured again only when
+its width changed or a widget inside it changed its content (see
+`WidgetBase.layout_attrs`), and its children are placed again only when its
+position or height changed. a change is passed up to the root, the siblings
+of the changed subtree keep their measured sizes.
+"""
+# python built-in imports
+from abc import ABC, abstractmethod
+
+
+def _split(width: int, weights: list, gap: int):
+    """splits `width` minus the gaps by `weights`, the rest of the division goes to the first parts."""
+    free = max(width - gap * (len(weights) - 1), 0)
+    total = sum(weights)
+    widths = [free * w // total for w in weights]
+    for i in range(free - sum(widths)):
+        widths[i % len(widths)] += 1
+    return widths
+
+
+class Layout(ABC):
+    """
+    base of the containers, children are widgets or other containers.
+    `padding` is kept free on every side of the container.
+    """
+    def __init__(self, *children, gap: int = 0, padding: int = 0):
+        self.children: list = []
+        self.gap = gap
+        self.padding = padding
+        self.layout_parent: Layout = None
+        # the dialog the root of the layout is set on, see `DialogBase.set_layout`
+        self.dialog = None
+        # width of the last measure, None when it is outdated
+        self._measured_width = None
+        self._height = 0
+        # (x, y, width) of the last place, None when the children have to be placed again
+        self._placed = None
+        for child in children:
+            self.add(child)
+
+    def __iter__(self):
+        return iter(self.children)
+
+    def __len__(self):
+        return len(self.children)
+
+    @property
+    def root(self):
+        node = self
+        while node.layout_parent is not None:
+            node = node.layout_parent
+        return node
+
+    def add(self, child):
+        """adds `child` at the end, widgets added to a layout that is shown are added to the dialog too."""
+        assert child.layout_parent is None, "the child is in a layout already"
+        child.layout_parent = self
+        self.children.append(child)
+        self.invalidate()
+        dialog = self.root.dialog
+        if dialog is not None:
+            for w in iter_widgets(child):
+                dialog.add_widget(w)
+        return child
+
+    def invalidate(self):
+        """the content of a child changed, this container and its parents are measured again."""
+        node = self
+        # the parents of an outdated container are outdated already
+        while node is not None and node._measured_width is not None:
+            node._measured_width = None
+            node._placed = None
+            node = node.layout_parent
+
+    def measure(self, width: int):
+        """the height the container needs at `width`."""
+        if self._measured_width != width:
+            inner = max(width - 2 * self.padding, 0)
+            self._height = self._measure(inner) + 2 * self.padding
+            self._measured_width = width
+            self._placed = None
+        return self._height
+
+    def place(self, x: int, y: int, width: int):
+        """places the children inside the area at (x, y) that is `width` wide."""
+        self.measure(width)
+        if self._placed == (x, y, width):
+            return
+        p = self.padding
+        self._place(x + p, y + p, max(width - 2 * p, 0))
+        self._placed = (x, y, width)
+
+    # implemented by the containers, both get the width inside the padding
+    @abstractmethod
+    def _measure(self, width: int) -> int:
+        """the height of the children at `width`."""
+
+    @abstractmethod
+    def _place(self, x: int, y: int, width: int):
+        """places the children, called after `_measure` with the same width."""
+
+
+class VStack(Layout):
+    """the children below each other, each as wide as the stack."""
+    def _measure(self, width: int):
+        heights = [measure(child, width) for child in self.children]
+        return sum(heights) + self.gap * max(len(heights) - 1, 0)
+
+    def _place(self, x: int, y: int, width: int):
+        for child in self.children:
+            place(child, x, y, width)
+            y += measure(child, width) + self.gap
+
+
+class HStack(Layout):
+    """
+    the children next to each other, the width is split by `weights` (equal
+    parts by default), the stack is as high as its highest child.
+    """
+    def __init__(self, *children, weights: list = None, gap: int = 1, padding: int = 0):
+        self.weights = weights
+        super().__init__(*children, gap = gap, padding = padding)
+
+    def _widths(self, width: int):
+        weights = self.weights if self.weights is not None else [1] * len(self.children)
+        return _split(width, weights, self.gap)
+
+    def _measure(self, width: int):
+        if not self.children:
+            return 0
+        return max(measure(child, w) for child, w in zip(self.children, self._widths(width)))
+
+    def _place(self, x: int, y: int, width: int):
+        for child, w in zip(self.children, self._widths(width)):
+            place(child, x, y, w)
+            x += w + self.gap
+
+
+class Grid(Layout):
+    """
+    the children in rows of `columns` cells, filled row by row. `columns` is
+    the number of equal columns or a list of their weights, a row is as high
+    as its highest child.
+    """
+    def __init__(self, columns, *children, gap: int = 1, row_gap: int = 0, padding: int = 0):
+        self.weights = [1] * columns if isinstance(columns, int) else list(columns)
+        self.row_gap = row_gap
+        # heights of the rows of the last measure
+        self._row_heights: list[int] = []
+        super().__init__(*children, gap = gap, padding = padding)
+
+    def _rows(self):
+        n = len(self.weights)
+        return [self.children[i:i + n] for i in range(0, len(self.children), n)]
+
+    def _measure(self, width: int):
+        widths = _split(width, self.weights, self.gap)
+        self._row_heights = [max(measure(child, w) for child, w in zip(row, widths)) for row in self._rows()]
+        return sum(self._row_heights) + self.row_gap * max(len(self._row_heights) - 1, 0)
+
+    def _place(self, x: int, y: int, width: int):
+        widths = _split(width, self.weights, self.gap)
+        for row, height in zip(self._rows(), self._row_heights):
+            cx = x
+            for child, w in zip(row, widths):
+                place(child, cx, y, w)
+                cx += w + self.gap
+            y += height + self.row_gap
+
+
+def measure(child, width: int):
+    """height of a widget or container at `width`."""
+    return child.measure(width)
+
+
+def place(child, x: int, y: int, width: int):
+    """places a widget or container, a widget is only changed if its geometry did."""
+    if isinstance(child, Layout):
+        child.place(x, y, width)
+        return
+    height = child.measure(width)
+    if child.pos[0] != x or child.pos[1] != y:
+        child.pos = [x, y]
+    if child.size[0] != width or child.size[1] != height:
+        child.size = [width, height]
+
+
+def iter_widgets(child):
+    """the widgets of a container in layout order, or the widget itself."""
+    if not isinstance(child, Layout):
+        yield child
+        return
+    for c in child.children:
+        yield from iter_widgets(c)
@@ -0,0 +1,97 @@
+# python built-in imports
+import json
+import time
+from collections import deque
+from math import ceil
+
+
+def _nearest_rank(values: list, q: float):
+    # `values` is sorted
+    return values[min(len(values) - 1, max(0, ceil(q / 100 * len(values)) - 1))]
+
+
+class Profiler():
+    """
+    collects timings of the frames of a `Drawable`, enable it with
+    `drawable.profiler = Profiler()`.
+
+    every update of the drawable is one frame, each metric keeps its values of
+    the last `window` frames it was measured in. times are in seconds.
+
+    metrics:
+        update                  whole update, including the draw
+        callback.<id>.<name>    a callback of the drawable
+        render.<widget name>    `render()` of a widget (cached renders included)
+        set_layer               setting a widget as a layer of the compositor
+        compose                 composing the changed layers into the frame
+        native_render           encoding and writing the frame
+        bytes_written           bytes written to the output
+    """
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.samples: dict[str, deque] = {}
+        self.frames = 0
+        self.dropped_frames = 0
+        # totals of the running frame
+        self._frame: dict[str, float] = {}
+
+    def add(self, metric: str, value: float):
+        self._frame[metric] = self._frame.get(metric, 0) + value
+
+    def begin_frame(self):
+        return time.perf_counter()
+
+    def end_frame(self, start: float, dropped_frames: int = 0):
+        self.add("update", time.perf_counter() - start)
+        for metric, value in self._frame.items():
+            if metric not in self.samples:
+                self.samples[metric] = deque(maxlen=self.window)
+            self.samples[metric].append(value)
+        self._frame.clear()
+        self.frames += 1
+        self.dropped_frames += dropped_frames
+
+    def percentile(self, metric: str, q: float):
+        """`q` percentile (0-100) of the metric over the window, None if it was never measured."""
+        values = sorted(self.samples.get(metric, ()))
+        if not values:
+            return None
+        return _nearest_rank(values, q)
+
+    def stats(self):
+        stats = {}
+        for metric, samples in self.samples.items():
+            values = sorted(samples)
+            n = len(values)
+            stats[metric] = {
+                "count": n,
+                "mean": sum(values) / n,
+                "p50": _nearest_rank(values, 50),
+                "p90": _nearest_rank(values, 90),
+                "p99": _nearest_rank(values, 99),
+                "max": values[-1],
+            }
+        return stats
+
+    def slowest(self, prefix: str = "render.", n: int = 5):
+        """metrics starting with `prefix` ordered by their mean, e.g. the slowest widgets."""
+        stats = self.stats()
+        names = [m for m in stats if m.startswith(prefix)]
+        names.sort(key=lambda m: stats[m]["mean"], reverse=True)
+        return [(m, stats[m]["mean"]) for m in names[:n]]
+
+    def reset(self):
+        self.samples.clear()
+        self._frame.clear()
+        self.frames = 0
+        self.dropped_frames = 0
+
+    def dump(self, path: str):
+        """writes the statistics to `path` as json."""
+        with open(path, "w") as f:
+            json.dump({
+                "time": time.time(),
+                "frames": self.frames,
+                "dropped_frames": self.dropped_frames,
+                "stats": self.stats(),
+            }, f, indent=2)
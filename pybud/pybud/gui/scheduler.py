@@ -0,0 +1,85 @@
+# python built-in imports
+import time
+
+
+class Scheduler():
+    """
+    keeps track of when the next visual change of a `Drawable` is due.
+
+    widgets and animations request an update for the moment their look changes
+    and mark the drawable dirty when it did, so an idle dialog does not wake up.
+
+    `tps` is the rate of the animation ticks, `fps` limits how often frames are
+    drawn (None draws every change right away). ticks are derived from the time,
+    so a late update skips the ticks it missed instead of catching up on them.
+    `clock` returns the time in seconds, e.g. a fake clock in tests.
+    """
+    def __init__(self, tps: int = 20, fps: int = None, clock = time.monotonic):
+        self.tps = tps
+        self.fps = fps
+        self.clock = clock
+        # time of the earliest requested update, None if nothing is scheduled
+        self.deadline = None
+        # seconds the last due update ran after its deadline
+        self.lateness = 0
+        # True when the last frame does not match the current state anymore
+        self.dirty = False
+        self.dirty_since = None
+        # start time of the last drawn frame
+        self.last_frame = None
+
+        # ticks that passed while an update was late
+        self.missed_ticks = 0
+        # frames drawn later than a whole frame interval after they were due
+        self.dropped_frames = 0
+        # changes that were merged into a later frame because of the fps limit
+        self.deferred_frames = 0
+
+    @property
+    def frame_interval(self):
+        return 1 / (self.tps if self.fps is None else self.fps)
+
+    def request(self, delay: float = 0):
+        at = self.clock() + max(0, delay)
+        # all requests run the same update, so only the earliest one matters
+        if self.deadline is None or at < self.deadline:
+            self.deadline = at
+
+    def mark_dirty(self):
+        if not self.dirty:
+            self.dirty_since = self.clock()
+        self.dirty = True
+
+    def timeout(self):
+        """seconds until the deadline, None if nothing is scheduled."""
+        if self.deadline is None:
+            return None
+        return max(0, self.deadline - self.clock())
+
+    def pop_due(self):
+        """returns True (once) if the deadline has passed."""
+        now = self.clock()
+        if self.deadline is not None and self.deadline <= now:
+            self.lateness = now - self.deadline
+            self.missed_ticks += int(self.lateness * self.tps)
+            self.deadline = None
+            return True
+        return False
+
+    def frame_wait(self):
+        """seconds until the next frame may be drawn, 0 if it is due."""
+        if self.fps is None or self.last_frame is None:
+            return 0
+        return max(0, self.last_frame + 1 / self.fps - self.clock())
+
+    def frame_started(self):
+        now = self.clock()
+        if self.dirty_since is not None:
+            # a frame is due when it changed, but not before the fps limit allows it
+            due = self.dirty_since
+            if self.fps is not None and self.last_frame is not None:
+                due = max(due, self.last_frame + 1 / self.fps)
+            self.dropped_frames += int((now - due) / self.frame_interval)
+        self.last_frame = now
+        self.dirty = False
+        self.dirty_since = None
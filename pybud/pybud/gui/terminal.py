@@ -0,0 +1,310 @@
+"""
+terminals a `Drawable` reads its keys from and writes its frames to.
+
+a terminal has the input methods of `KeyReader` (`open`, `close`, `wait`,
+`read_keys`, `read_key`, `wake`, `fileno`, `pending_escape`, `finish_escape`
+and the `wait_escape` attribute) and `get_output`, which returns a file
+descriptor or an object with `write(bytes)` and `flush()`.
+"""
+# python built-in imports
+import codecs
+import os
+import re
+import sys
+import time
+from collections import deque
+#relative impotrs
+from .keyboard import KeyReader
+
+
+class StdTerminal(KeyReader):
+    """the terminal of the process, keys are read from stdin and frames written to stdout."""
+    def open(self):
+        super().open()
+        # pasted text is sent as one bracketed paste instead of separate keys
+        self._set_bracketed_paste(True)
+
+    def close(self):
+        self._set_bracketed_paste(False)
+        super().close()
+
+    def _set_bracketed_paste(self, enabled: bool):
+        if self._saved_mode is None or not sys.stdout.isatty():
+            return
+        sys.stdout.write("\x1b[?2004h" if enabled else "\x1b[?2004l")
+        sys.stdout.flush()
+
+    def get_output(self):
+        # frames are written straight to the file descriptor of stdout, anything
+        # still buffered by python has to be written before them
+        sys.stdout.flush()
+        # the windows console only decodes utf-8 through python's console writer
+        if os.name == "nt":
+            return sys.stdout.buffer
+        try:
+            return sys.stdout.fileno()
+        except (AttributeError, OSError, ValueError):
+            return sys.stdout.buffer
+
+
+# the parts of the output the headless terminal understands, anything else is text
+_TOKENS = re.compile(r"\x1b\[([0-9;?]*)([@-~])|\x1b(.)?|\r|\n|[^\x1b\r\n]+", re.DOTALL)
+# an escape sequence cut off at the end of a write
+_PARTIAL = re.compile(r"\x1b(\[[0-9;?]*)?\Z")
+
+
+class HeadlessTerminal():
+    """
+    a terminal without a tty, for tests and benchmarks.
+
+    the output is parsed into a grid of cells (cursor movement, colors and
+    synchronized updates of `Drawer.render_into`), keys come from a script:
+    strings are keys, numbers are pauses in seconds and callables are called
+    with the terminal (e.g. to check the screen). keys between two pauses or
+    callables are read at once and drawn as one frame. when the script is
+    exhausted `read_key` raises EOFError, which closes the dialog.
+    """
+    def __init__(self, width: int = 80, height: int = 24, keys = ()):
+        self.width = width
+        self.height = height
+        self.script = deque(keys)
+        # keys are never split, there is no escape sequence to wait for
+        self.wait_escape = True
+        self.reset()
+
+    def reset(self):
+        """clears the screen and the counters."""
+        self.chars = [[" "] * self.width for _ in range(self.height)]
+        # sgr parameters of each cell
+        self.styles = [[()] * self.width for _ in range(self.height)]
+        self.cursor = [0, 0]
+        self.pen = ()
+        self._pen_state = (None, None, frozenset())
+        # the cursor is past the last column, the next character wraps
+        self.pending_wrap = False
+        self.synchronized = False
+        self.frames = 0
+        self.bytes_written = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+
+    # input
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def fileno(self):
+        # nothing to select on, the asyncio loop polls `wait`
+        return None
+
+    def wake(self):
+        pass
+
+    def feed(self, *items):
+        """adds keys, pauses or callables to the end of the script."""
+        self.script.extend(items)
+
+    def feed_text(self, text: str):
+        """adds every character of `text` as a key."""
+        self.script.extend(text)
+
+    def wait(self, timeout: float = None):
+        while self.script:
+            item = self.script[0]
+            if callable(item):
+                self.script.popleft()
+                item(self)
+            elif isinstance(item, (int, float)):
+                if timeout is not None and timeout < item:
+                    time.sleep(timeout)
+                    self.script[0] = item - timeout
+                    return False
+                time.sleep(item)
+                self.script.popleft()
+                if timeout is not None:
+                    timeout -= item
+            else:
+                return True
+        # the end of the script is read as EOF
+        return True
+
+    def read_key(self):
+        if not self.wait(0) or not self.script:
+            raise EOFError("the key script is exhausted")
+        return self.script.popleft()
+
+    def read_keys(self):
+        """the keys up to the next pause or callable, they are handled together like one read of stdin."""
+        keys = [self.read_key()]
+        while self.script and isinstance(self.script[0], str):
+            keys.append(self.script.popleft())
+        return keys
+
+    def pending_escape(self):
+        return False
+
+    def finish_escape(self):
+        return []
+
+    # output
+    def get_output(self):
+        return self
+
+    def flush(self):
+        pass
+
+    def write(self, data: bytes):
+        self.bytes_written += len(data)
+        text = self._partial + self._decoder.decode(data)
+        partial = _PARTIAL.search(text)
+        if partial is not None:
+            text, self._partial = text[:partial.start()], partial.group()
+        else:
+            self._partial = ""
+
+        for token in _TOKENS.finditer(text):
+            params, final, escaped = token.group(1, 2, 3)
+            if final is not None:
+                self._csi(params, final)
+            elif token.group() == "\x1bM":
+                # reverse index
+                self._move_to(self.cursor[0] - 1, self.cursor[1])
+            elif escaped is not None or token.group() == "\x1b":
+                pass
+            elif token.group() == "\r":
+                self._move_to(self.cursor[0], 0)
+            elif token.group() == "\n":
+                # the tty translates a new line to "\r\n"
+                self._line_feed()
+            else:
+                self._put(token.group())
+        return len(data)
+
+    def _csi(self, params: str, final: str):
+        if params.startswith("?"):
+            if params == "?2026":
+                if final == "h":
+                    self.synchronized = True
+                elif final == "l":
+                    self.synchronized = False
+                    self.frames += 1
+            return
+
+        args = [int(p) if p else 0 for p in params.split(";")] if params else []
+        n = max(1, args[0]) if args else 1
+        y, x = self.cursor
+        if final == "m":
+            self._sgr(params)
+        elif final == "A":
+            self._move_to(y - n, x)
+        elif final == "B":
+            self._move_to(y + n, x)
+        elif final == "C":
+            self._move_to(y, x + n)
+        elif final == "D":
+            self._move_to(y, x - n)
+        elif final == "E":
+            self._move_to(y + n, 0)
+        elif final == "F":
+            self._move_to(y - n, 0)
+        elif final == "G":
+            self._move_to(y, n - 1)
+        elif final in "Hf":
+            self._move_to((args[0] if args else 1) - 1, (args[1] if len(args) > 1 else 1) - 1)
+        elif final == "K":
+            mode = args[0] if args else 0
+            start, end = {0: (x, self.width), 1: (0, x + 1), 2: (0, self.width)}.get(mode, (0, 0))
+            self.chars[y][start:end] = [" "] * (end - start)
+            self.styles[y][start:end] = [self.pen] * (end - start)
+
+    def _sgr(self, params: str):
+        # the style is kept as (back color, fore color, graphics), see `style_at`
+        back, fore, graphics = self._pen_state
+        graphics = set(graphics)
+        parts = params.split(";")
+        i = 0
+        while i < len(parts):
+            code = parts[i]
+            i += 1
+            if code in ("38", "48") and i < len(parts):
+                # extended colors, "38;5;n" or "38;2;r;g;b"
+                n = 2 if parts[i] == "5" else 4
+                code = ";".join(parts[i - 1:i + n])
+                i += n
+            if code in ("", "0"):
+                back, fore = None, None
+                graphics.clear()
+            elif code == "39":
+                fore = None
+            elif code == "49":
+                back = None
+            elif code == "22":
+                # turns off both bold and faint
+                graphics -= {"1", "2"}
+            elif code in ("23", "24", "25", "27", "28", "29"):
+                graphics.discard(code[1])
+            elif len(code) > 1 and code.startswith(("48", "4", "10")):
+                back = code
+            elif len(code) > 1 and code.startswith(("38", "3", "9")):
+                fore = code
+            else:
+                graphics.add(code)
+        self._pen_state = (back, fore, frozenset(graphics))
+        self.pen = tuple(c for c in (back, fore) if c is not None) + tuple(sorted(graphics))
+
+    def _move_to(self, y: int, x: int):
+        self.cursor = [min(max(y, 0), self.height - 1), min(max(x, 0), self.width - 1)]
+        self.pending_wrap = False
+
+    def _line_feed(self):
+        if self.cursor[0] == self.height - 1:
+            # scroll up
+            self.chars.pop(0)
+            self.styles.pop(0)
+            self.chars.append([" "] * self.width)
+            self.styles.append([()] * self.width)
+        self._move_to(self.cursor[0] + 1, 0)
+
+    def _put(self, text: str):
+        while text:
+            if self.pending_wrap:
+                self._line_feed()
+            y, x = self.cursor
+            n = min(len(text), self.width - x)
+            self.chars[y][x:x + n] = text[:n]
+            self.styles[y][x:x + n] = [self.pen] * n
+            text = text[n:]
+            if x + n == self.width:
+                # like real terminals, the cursor stays on the last column until the next character
+                self.cursor[1] = self.width - 1
+                self.pending_wrap = True
+            else:
+                self.cursor[1] = x + n
+
+    # screen
+    def line(self, y: int):
+        return "".join(self.chars[y])
+
+    def text(self):
+        """the screen, lines without trailing spaces."""
+        return "\n".join(self.line(y).rstrip() for y in range(self.height))
+
+    def find(self, text: str):
+        """(y, x) of the first occurrence of `text` on the screen, None if it is not shown."""
+        for y in range(self.height):
+            x = self.line(y).find(text)
+            if x != -1:
+                return (y, x)
+        return None
+
+    def style_at(self, y: int, x: int):
+        """sgr attributes of a cell, the back and fore color and then the graphics, e.g. ("48;2;90;90;250", "38;2;220;220;220", "1")."""
+        return self.styles[y][x]
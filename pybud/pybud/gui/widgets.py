@@ -1,4 +1,6 @@
 
+import inspect
+import numbers
 import types
 
 from pybud.drawer import Drawer
@@ -8,13 +10,32 @@ from pybud.drawer.color import ColorMode
 
 from readchar import key as Key
 
+from .columns import Columns
+from .fuzzy import FuzzyIndex
+from .gapbuffer import GapBuffer
+from .items import LazyItems
+from .keyboard import single_line
+
 def default(d: dict, k:str, default):
     if k in d.keys():
         return d[k]
     else:
         return default
 
+_UNSET = object()
+
 class WidgetBase():
+    # attributes that change how the widget looks, assigning a new value to one
+    # of them bumps `version`, which drops the cached render
+    render_attrs = frozenset(["background_color"])
+    # reuse the last render until the version changes, only for widgets whose
+    # render reads nothing but `render_attrs` (a render that reads e.g.
+    # `parent.tick` or outside data would freeze), off by default
+    cache_render = False
+    # attributes that change the measured size, assigning one of them lays out the container of the widget again
+    layout_attrs = frozenset()
+    version = 0
+
     def __init__(self, size: list[int, int] = None, pos: list[int, int] = [0, 0], **kwargs):
         # set variabled
         self.ctype = default(kwargs, "ctype", ColorMode.LIMITED)
@@ -26,7 +47,18 @@ class WidgetBase():
         self.parent = None
         self.is_selected = False
         self.selectable = False
-        
+        # the container that places the widget, see `layout.py`
+        self.layout_parent = None
+        # layer of the widget in the dialog, higher z is drawn over lower, clip is (y, x, height, width)
+        self.z = default(kwargs, "z", 0)
+        self.clip = default(kwargs, "clip", None)
+        # StyleTransform applied to the whole widget, e.g. `StyleTransform.dim()` behind a popup
+        self.transform = default(kwargs, "transform", None)
+        # only the last render is kept, so the cache holds at most one frame per widget
+        self.cache_render = default(kwargs, "cache_render", self.cache_render)
+        self._render_key = None
+        self._render_drawer: Drawer = None
+
         # holds all callbacks
         self._callbacks = {
             "on_parent_change": [],
@@ -37,22 +69,38 @@ class WidgetBase():
             "on_update": [],
         }
 
+    def __setattr__(self, name, value):
+        if name in self.render_attrs and self.__dict__.get(name, _UNSET) is not value:
+            self.__dict__["version"] = self.version + 1
+            if name in self.layout_attrs and self.__dict__.get("layout_parent") is not None:
+                self.layout_parent.invalidate()
+        object.__setattr__(self, name, value)
+
     def add_callback(self, calllback_id: str, fn):
         assert calllback_id in self._callbacks.keys(), f"callback_id=\"{calllback_id}\" does not exist, available options: {list(self._callbacks.keys())}"
         self._callbacks[calllback_id].append(fn)
+        if calllback_id == "on_render":
+            self.invalidate()
 
     def _run_callback(self, calllback_id: str, **kwargs):
         assert calllback_id in self._callbacks.keys(), f"callback_id=\"{calllback_id}\" does not exist, available options: {list(self._callbacks.keys())}"
-        return [fn(**kwargs) for fn in self._callbacks[calllback_id]]
+        results = [fn(**kwargs) for fn in self._callbacks[calllback_id]]
+        # coroutine callbacks run as tasks of the dialog
+        for result in results:
+            if inspect.isawaitable(result) and self.parent is not None:
+                self.parent.run_task(result)
+        return results
 
     def get_name(self):
         name = self.__class__.__name__
-        c = 0
-        for w in self.parent.widgets:
-            if isinstance(w, self.__class__):
-                c += 1
+        # widgets of each class are counted by the dialog as they are added
+        c = self.parent.widget_counts.get(self.__class__, 0)
         return name + "_" + str(c+1)
 
+    def measure(self, width: int):
+        """the height the widget needs at `width`, used by the layout containers."""
+        return self.size[1]
+
     def on_add(self, parent):
         self._run_callback("on_add", parent = parent)
         if self.parent == parent: return
@@ -64,10 +112,23 @@ class WidgetBase():
     def on_interrupt(self):
         self._run_callback("on_interrupt")
 
+    def invalidate(self):
+        """drops the cached render, call it after changing state in place (e.g. appending to a list)."""
+        self.version += 1
+
     def render(self):
-        drawer = Drawer(size=tuple(self.size[::-1]), plane_color=self.background_color)
-        self._run_callback("on_render", drawer = drawer)
-        return drawer
+        # the last render is reused until the version, size or colors change
+        key = (self.version, tuple(self.size), self.background_color)
+        if self.cache_render and key == self._render_key:
+            return self._render_drawer
+
+        if self._render_drawer is None or self._render_key[1] != key[1]:
+            self._render_drawer = Drawer(size=tuple(self.size[::-1]), plane_color=self.background_color)
+        else:
+            self._render_drawer.clear(self.background_color)
+        self._run_callback("on_render", drawer = self._render_drawer)
+        self._render_key = key
+        return self._render_drawer
 
     def update(self, key):
         self._run_callback("on_update", key = key)
@@ -88,6 +149,10 @@ class InteractableWidget(WidgetBase):
         self.is_disabled = True
 
 class WidgetLabel(WidgetBase):
+    render_attrs = WidgetBase.render_attrs | {"text", "pad", "centered", "wordwrap"}
+    cache_render = True
+    layout_attrs = WidgetBase.layout_attrs | {"text", "pad"}
+
     def __init__(self,
                  text,
                  centered: bool = True,
@@ -108,41 +173,52 @@ class WidgetLabel(WidgetBase):
             raise NotImplementedError()
 
         self.pad = padding
-        self.size[1] = (len(text) // (self.size[0] - (2*self.pad))) + 1
         self.centered = centered
         self.wordwrap = wordwrap
+        # wrapped lines of the text, see `get_lines`
+        self._lines = None
+        self._lines_key = None
 
         self.add_callback("on_render", self.on_render)
+        self.size[1] = len(self.get_lines())
+
+    def invalidate(self):
+        super().invalidate()
+        # the text may have been changed in place
+        self._lines_key = None
+        if self.layout_parent is not None:
+            self.layout_parent.invalidate()
+
+    def get_lines(self, width: int = None):
+        """
+        the text wrapped to `width` (the width of the label by default), wrapped
+        again only when the text, width or padding change.
+        """
+        width = self.size[0] if width is None else width
+        # the text itself is part of the key, so an id can not be reused by another text
+        key = (self.text, width, self.pad)
+        if self._lines_key is None or self._lines_key[0] is not key[0] or self._lines_key[1:] != key[1:]:
+            spans = self.text.wrap(width - 2*self.pad)
+            self._lines = [self.text[start:end] for start, end in spans]
+            self._lines_key = key
+        return self._lines
+
+    def measure(self, width: int):
+        return len(self.get_lines(width))
 
-    def place_text(self, drawer, text, ln_idx):
-        def _place_text(t, ypos):
+    def on_render(self, drawer: Drawer):
+        for ypos, line in enumerate(self.get_lines()[:self.size[1]]):
             if self.centered:
-                drawer.center_place(t, ypos = ypos, assign = False)
+                drawer.center_place(line, ypos = ypos, assign = False)
             else:
-                drawer.place(t, pos=(ypos, 0), assign = False)
-
-        p = 2*self.pad
-
-        if len(text) > (self.size[0] - p):
-            for i in range(len(text)):
-                i_ = len(text) - i - 1
-                if i_ > (self.size[0] - p):
-                    continue
-                if isinstance(text, str) and text[i_] == " ":
-                    _place_text(text[:i_], ln_idx)
-                    return self.place_text(drawer, text[i_+1:], ln_idx + 1)
-                if isinstance(text, AStr) and text.vec[i_].char == " ":
-                    t_0, t_1 = text.split_at(i_)
-                    _place_text(t_0, ln_idx)
-                    return self.place_text(drawer, t_1, ln_idx + 1)
-        else:
-            _place_text(text, ln_idx)
-
-    def on_render(self, drawer: Drawer):
-        self.place_text(drawer, self.text, ln_idx = 0)
+                drawer.place(line, pos=(ypos, 0), assign = False)
 
 
 class WidgetOptions(InteractableWidget):
+    render_attrs = InteractableWidget.render_attrs | {"options", "text", "selected"}
+    cache_render = True
+    layout_attrs = InteractableWidget.layout_attrs | {"options"}
+
     def __init__(self,
                  options: list[tuple[str, types.FunctionType]],
                  text: str = "Options:",
@@ -172,9 +248,21 @@ class WidgetOptions(InteractableWidget):
         self.add_callback("on_enter", self.on_enter)
 
     def on_enter(self):
-        self.result = self.callbacks[self.selected](self.parent)
+        result = self.callbacks[self.selected](self.parent)
+        if inspect.isawaitable(result):
+            # the result is set once the coroutine finishes
+            self.parent.run_task(result, self.set_result)
+            return None
+        self.result = result
         return self.result
 
+    def set_result(self, result):
+        self.result = result
+        self.parent.result = result
+
+    def measure(self, width: int):
+        return 1 + len(self.options)
+
     def on_keyboard_up(self):
         self.selected = (self.selected - 1) % self.n_options
 
@@ -193,20 +281,92 @@ class WidgetOptions(InteractableWidget):
 
     def on_render(self, drawer: Drawer):
         caption_start = 2
+        text_color = (220, 220, 220)
         __options = self.text.ljust(self.size[0] - caption_start)
-        drawer.place(AStr(__options, fore = (220, 220, 220)), pos = (0, caption_start), assign = False)
+        # every fragment is placed with a single native call
+        items = [(__options, text_color, None, None, (0, caption_start))]
         for i, option in enumerate(self.options):
             if i == self.selected:
                 option_color = (50, 220, 80)
-                option_indicator = AStr("> ", fore=(220, 220, 220))
+                option_indicator = "> "
             else:
-                option_color = (220, 220, 220)
-                option_indicator = AStr("  ", fore=(220, 220, 220))
-            __option = AStr(option, fore=option_color)
-            drawer.place(option_indicator + __option, pos=(i + 1, caption_start), assign = False)
+                option_color = text_color
+                option_indicator = "  "
+            items.append((option_indicator, text_color, None, None, (i + 1, caption_start)))
+            items.append((option, option_color, None, None, (i + 1, caption_start + 2)))
+        drawer.place_many(items)
+
+
+# keys that are never inserted into a `WidgetInput`
+ctrl_keys = [
+    Key.CTRL_A,
+    Key.CTRL_B,
+    Key.CTRL_C,
+    Key.CTRL_D,
+    Key.CTRL_E,
+    Key.CTRL_F,
+    Key.CTRL_G,
+    Key.CTRL_H,
+    Key.CTRL_I,
+    Key.CTRL_J,
+    Key.CTRL_K,
+    Key.CTRL_L,
+    Key.CTRL_M,
+    Key.CTRL_N,
+    Key.CTRL_O,
+    Key.CTRL_P,
+    Key.CTRL_Q,
+    Key.CTRL_R,
+    Key.CTRL_S,
+    Key.CTRL_T,
+    Key.CTRL_U,
+    Key.CTRL_V,
+    Key.CTRL_W,
+    Key.CTRL_X,
+    Key.CTRL_Y,
+    Key.CTRL_Z,
+]
+
+funcion_keys = [
+    Key.F1,
+    Key.F2,
+    Key.F3,
+    Key.F4,
+    Key.F5,
+    Key.F6,
+    Key.F7,
+    Key.F8,
+    Key.F9,
+    Key.F10,
+    Key.F11,
+    Key.F12,
+]
+
+command_keys = [
+    Key.DOWN,
+    Key.UP,
+    Key.LEFT,
+    Key.RIGHT,
+    Key.END,
+    Key.HOME,
+    Key.ESC,
+    Key.ENTER,
+    Key.INSERT,
+    Key.LF,
+    Key.CR,
+    Key.PAGE_DOWN,
+    Key.PAGE_UP,
+    Key.SUPR,
+    Key.BACKSPACE,
+]
+
+IGNORED_KEYS = frozenset(ctrl_keys + funcion_keys + command_keys)
 
 
 class WidgetInput(InteractableWidget):
+    render_attrs = InteractableWidget.render_attrs | {"text", "view", "show_pointer", "is_disabled"}
+    cache_render = True
+
     def __init__(self,
                  text: str,
                  size: list[int, int] = None,
@@ -219,81 +379,35 @@ class WidgetInput(InteractableWidget):
         self.size[1] = 1
         self.text = text
         self.height = 1
-        self.input = ""
-        self.pointer = 0
+        # the input, edited at the pointer
+        self.buffer = GapBuffer()
         self.view = 0
         self.show_pointer = False
 
         # characters that this dialouge will listen to
         self.allowed_characters = default(kwargs, "allowed_chars", "")
 
-        ## keys
-        ctrl_keys = [
-            Key.CTRL_A,
-            Key.CTRL_B,
-            Key.CTRL_C,
-            Key.CTRL_D,
-            Key.CTRL_E,
-            Key.CTRL_F,
-            Key.CTRL_G,
-            Key.CTRL_H,
-            Key.CTRL_I,
-            Key.CTRL_J,
-            Key.CTRL_K,
-            Key.CTRL_L,
-            Key.CTRL_M,
-            Key.CTRL_N,
-            Key.CTRL_O,
-            Key.CTRL_P,
-            Key.CTRL_Q,
-            Key.CTRL_R,
-            Key.CTRL_S,
-            Key.CTRL_T,
-            Key.CTRL_U,
-            Key.CTRL_V,
-            Key.CTRL_W,
-            Key.CTRL_X,
-            Key.CTRL_Y,
-            Key.CTRL_Z,
-        ]
+        self.add_callback("on_render", self.on_render)
+        self.add_callback("on_enter", self.on_enter)
 
-        funcion_keys = [
-            Key.F1,
-            Key.F2,
-            Key.F3,
-            Key.F4,
-            Key.F5,
-            Key.F6,
-            Key.F7,
-            Key.F8,
-            Key.F9,
-            Key.F10,
-            Key.F11,
-            Key.F12,
-        ]
+    # the buffer is edited in place, every edit invalidates the render
+    @property
+    def input(self):
+        return str(self.buffer)
 
-        command_keys = [
-            Key.DOWN,
-            Key.UP,
-            Key.LEFT,
-            Key.RIGHT,
-            Key.END,
-            Key.HOME,
-            Key.ESC,
-            Key.ENTER,
-            Key.INSERT,
-            Key.LF,
-            Key.CR,
-            Key.PAGE_DOWN,
-            Key.PAGE_UP,
-            Key.SUPR,
-            Key.BACKSPACE,
-        ]
+    @input.setter
+    def input(self, value: str):
+        self.buffer = GapBuffer(value)
+        self.invalidate()
 
-        self.__ignored_keys = ctrl_keys + funcion_keys + command_keys
+    @property
+    def pointer(self):
+        return self.buffer.cursor
 
-        self.add_callback("on_render", self.on_render)
-        self.add_callback("on_enter", self.on_enter)
+    @pointer.setter
+    def pointer(self, value: int):
+        self.buffer.move_to(value)
+        self.invalidate()
 
     def on_enter(self):
         self.parent.close()
@@ -301,103 +415,427 @@ class WidgetInput(InteractableWidget):
         return self.result
 
     def reset(self):
-        self.input = ""
-        self.pointer = 0
+        self.buffer.clear()
         self.view = 0
+        self.invalidate()
 
     def get_max_length(self):
         p = 2
         max_input_len = self.size[0] - (p * 2)- len(self.text)
         return max_input_len
 
+    def scroll_to_pointer(self):
+        # the pointer is always inside the view
+        max_input_len = self.get_max_length()
+        if self.pointer < self.view:
+            self.view = self.pointer
+        elif self.pointer - self.view > max_input_len - 1:
+            self.view = self.pointer - (max_input_len - 1)
+
     def update(self, key):
         key = super().update(key)
         if key is None:
             return
 
         max_input_len = self.get_max_length()
-        # capture and place characters
-        if key != "UPDATE" and key not in self.__ignored_keys:
-            self.input = self.input[:self.pointer] + \
-                key + self.input[self.pointer:]
-            self.pointer += 1
-            if (len(self.input)-self.view) > (max_input_len-1):
-                self.view += 1
+        # capture and place characters, a paste may insert many at once
+        if key != "UPDATE" and key not in IGNORED_KEYS:
+            text = single_line(key)
+            if not text:
+                return
+            self.buffer.insert(text)
+            self.scroll_to_pointer()
+            self.invalidate()
             return
 
         # backspace
         if key == Key.BACKSPACE:
-            if self.pointer != 0:
-                self.input = self.input[:self.pointer-1] + self.input[self.pointer:]
-            else:
-                self.input = self.input[self.pointer:]
-            self.pointer = max(self.pointer-1, 0)
+            self.buffer.delete_back()
             if self.pointer-self.view < 0:
                 self.view = max(self.view - max_input_len, 0)
+            self.invalidate()
             return
 
         # delete
         if key == Key.DELETE:
-            self.input = self.input[:self.pointer] + self.input[self.pointer+1:]
-            # self.pointer = max(self.pointer - 1, 0)
+            self.buffer.delete_forward()
+            self.invalidate()
             return
 
-        # left arrow
-        if key == Key.LEFT:
-            self.pointer = max(self.pointer - 1, 0)
-            if self.pointer-self.view < 0:
-                self.view = max(self.view - 1, 0)
-            return
-
-        # right arrow
-        if key == Key.RIGHT:
-            self.pointer = min(self.pointer + 1, len(self.input))
-            if self.view == (self.pointer-max_input_len):
-                self.view = min(self.view + 1, len(self.input))
+        # arrows, home and end
+        moves = {Key.LEFT: -1, Key.RIGHT: 1, Key.HOME: -len(self.buffer), Key.END: len(self.buffer)}
+        if key in moves:
+            self.buffer.move(moves[key])
+            self.scroll_to_pointer()
+            self.invalidate()
             return
 
         if key == "UPDATE":
-            self.show_pointer = (self.parent.tick % 20) >= 12
+            # the pointer blinks once a second while the widget is active, it
+            # is shown on the last 2/5 of every second
+            period = self.parent.scheduler.tps
+            shown_from = period * 3 // 5
+            phase = self.parent.tick % period
+            show_pointer = phase >= shown_from
+            if show_pointer != self.show_pointer:
+                self.show_pointer = show_pointer
+                self.parent.mark_dirty()
+            next_blink = self.parent.tick - phase + (shown_from if phase < shown_from else period)
+            self.parent.request_update(self.parent.time_until_tick(next_blink))
         return key
 
-    def format_textbox(self):
-        text, inp, pointer, view = self.text, self.input, self.pointer, self.view
+    def on_render(self, drawer: Drawer):
+        p = 1
+        x = p + len(self.text)
+        text_c = (50, 200, 50)
+        underline = AnsiGraphicMode.UNDERLINE
         max_input_len = self.get_max_length()
-        # get the input text with fixed length plus one extra space for the pointer
-        if view+max_input_len-1 < len(inp):
-            inp_ = inp[view:view+max_input_len]
+
+        # only the visible part of the input is copied, with one extra space for the pointer at the end
+        more = self.view + max_input_len - 1 < len(self.buffer)
+        if more:
+            visible = self.buffer.slice(self.view, self.view + max_input_len)
         else:
-            inp_ = inp[view:view+max_input_len-1] + " "
+            visible = self.buffer.slice(self.view, self.view + max_input_len - 1) + " "
 
-        pointer_str = AStr(inp_[pointer-view])
+        i = self.pointer - self.view
+        pointer_graphics = underline
+        if not self.is_disabled and self.show_pointer or visible[i] != " ":
+            pointer_graphics = underline | AnsiGraphicMode.REVERSE
 
-        if not self.is_disabled and self.show_pointer or inp_[pointer-view] != " ":
-            #pointer_str = AStr(
-            #    inp_[pointer-view], back = (220, 220, 220), fore = (20, 20, 20))
-            pointer_str.add_graphics(AnsiGraphicMode.REVERSE)
-        #else:
-        #    pointer_str = AStr(inp_[pointer-view])
-        
-        # insert the pointer into input text at the correct position
-        input_plus_pointer = AStr( inp_[:pointer-view]) + pointer_str + AStr(inp_[pointer-view+1:])
+        items = []
+        if self.parent.background_color is not None:
+            text_shadow = tuple(map(lambda x: round(x * 0.8), list(self.parent.background_color)))
+            items.append((" " * (self.size[0] - (p * 2) - len(self.text)), None, text_shadow, None, (0, x)))
+        # every fragment is placed with a single native call
+        items += [
+            (self.text, text_c, None, None, (0, p)),
+            ("<", text_c, None, underline, (0, x)) if self.view != 0 else (" ", None, None, underline, (0, x)),
+            (visible[:i], None, None, underline, (0, x + 1)),
+            (visible[i], None, None, pointer_graphics, (0, x + 1 + i)),
+            (visible[i + 1:].ljust(max_input_len - i - 1), None, None, underline, (0, x + 2 + i)),
+            (">", text_c, None, underline, (0, x + 1 + max_input_len)) if more else (" ", None, None, underline, (0, x + 1 + max_input_len)),
+        ]
+        drawer.place_many(items)
 
-        text_c = (50, 200, 50)
 
-        title = AStr(text, fore=text_c)
-        fstr = AStr("")
-        back_exists = AStr("<", fore=text_c)
-        forward_exists = AStr(">", fore=text_c)
+class WidgetList(InteractableWidget):
+    """
+    a scrolling list, only the `rows` items of the viewport are formatted and
+    placed, so a frame costs the same for ten items or millions of them.
 
-        fstr = fstr + (back_exists if view != 0 else AStr(" "))
-        fstr = fstr + input_plus_pointer + AStr(" " * (max_input_len - len(input_plus_pointer)))
-        fstr = fstr + (forward_exists if view+max_input_len-1 < len(inp) else AStr(" "))
+    `items` is a sequence or an iterable (e.g. a generator), which is read only
+    as far as the list is scrolled, see `LazyItems`. UP, DOWN, PAGE_UP,
+    PAGE_DOWN, HOME and END move the selection, `jump_to` selects any index.
+    ENTER calls `on_select(dialog, item)`, its result is the result of the
+    widget (the item itself without `on_select`).
+    """
+    render_attrs = InteractableWidget.render_attrs | {"items", "text", "selected", "top", "rows"}
+    cache_render = True
+    layout_attrs = InteractableWidget.layout_attrs | {"rows"}
 
-        fstr.add_graphics(AnsiGraphicMode.UNDERLINE)
-        return title + fstr
+    def __init__(self,
+                 items,
+                 text: str = "Options:",
+                 rows: int = 10,
+                 on_select: types.FunctionType = None,
+                 format: types.FunctionType = str,
+                 size: list[int, int] = None,
+                 pos: list[int, int] = [0, 0],
+                 **kwargs
+                 ):
+
+        super().__init__(size, pos, **kwargs)
+        self.text = text
+        self.rows = rows
+        self.on_select = on_select
+        # turns an item into the text of its row, only called for the visible rows
+        self.format = format
+        self.set_items(items)
+        self.size[1] = 1 + rows
+
+        self.add_callback("on_render", self.on_render)
+        self.add_callback("on_enter", self.on_enter)
+
+    def set_items(self, items):
+        """replaces the items, the first one is selected."""
+        self.items = items if isinstance(items, LazyItems) else LazyItems(items)
+        self.selected = 0
+        # index of the first visible item
+        self.top = 0
+
+    def measure(self, width: int):
+        return 1 + self.rows
+
+    def jump_to(self, index: int):
+        """selects the item at `index` (the last one if there are fewer items) and scrolls to it."""
+        index = max(index, 0)
+        if not self.items.has(index):
+            index = len(self.items) - 1
+            if index < 0:
+                return
+        self.selected = index
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.rows:
+            self.top = index - self.rows + 1
+
+    def update(self, key):
+        key = super().update(key)
+        moves = {Key.UP: -1, Key.DOWN: 1, Key.PAGE_UP: -self.rows, Key.PAGE_DOWN: self.rows}
+        if key in moves:
+            self.jump_to(self.selected + moves[key])
+            return
+        if key == Key.HOME:
+            self.jump_to(0)
+            return
+        if key == Key.END:
+            # an iterable is read to its end
+            self.jump_to(len(self.items) - 1)
+            return
+        return key
+
+    def on_enter(self):
+        if not self.items.has(self.selected):
+            return None
+        item = self.items[self.selected]
+        result = item if self.on_select is None else self.on_select(self.parent, item)
+        if inspect.isawaitable(result):
+            # the result is set once the coroutine finishes
+            self.parent.run_task(result, self.set_result)
+            return None
+        self.result = result
+        return self.result
+
+    def set_result(self, result):
+        self.result = result
+        self.parent.result = result
+
+    def caption(self):
+        """the text of the first row."""
+        return self.text
 
     def on_render(self, drawer: Drawer):
-        p = 1
-        if self.parent.background_color is not None:
-            text_shadow = tuple(map(lambda x: round(x * 0.8), list(self.parent.background_color)))
-            drawer.place(AStr(" " * (self.size[0] - (p * 2) - len(self.text)), back=text_shadow), pos=(0, p + len(self.text)), assign = False)
-        drawer.place(self.format_textbox(), pos=(0, p), assign = False)
\ No newline at end of file
+        caption_start = 2
+        text_color = (220, 220, 220)
+        width = self.size[0] - caption_start
+        items = [(self.caption()[:width], text_color, None, None, (0, caption_start))]
+        # the option text is cut before the scroll markers
+        max_len = width - 4
+        for row in range(self.rows):
+            index = self.top + row
+            if not self.items.has(index):
+                break
+            text = self.format(self.items[index])[:max_len]
+            if index == self.selected:
+                items.append(("> ", text_color, None, None, (row + 1, caption_start)))
+                items.append((text, (50, 220, 80), None, None, (row + 1, caption_start + 2)))
+            else:
+                items.append((text, text_color, None, None, (row + 1, caption_start + 2)))
+
+        if self.top > 0:
+            items.append(("↑", text_color, None, None, (1, self.size[0] - 2)))
+        if self.items.has(self.top + self.rows):
+            items.append(("↓", text_color, None, None, (self.rows, self.size[0] - 2)))
+
+        # position in the list, "+" while the end of an iterable was not read yet
+        total = str(self.items.known_len()) + ("" if self.items.exhausted else "+")
+        position = f"{self.selected + 1 if self.items.has(0) else 0}/{total} "
+        items.append((position, text_color, None, None, (0, max(self.size[0] - len(position), caption_start))))
+        drawer.place_many(items)
+
+
+class WidgetPicker(WidgetList):
+    """
+    a `WidgetList` filtered by typing, the items that match the query are
+    listed best first, see `FuzzyIndex`. printable keys and pastes extend the
+    query and BACKSPACE removes its last character, the other keys move the
+    selection like in `WidgetList`.
+
+    `key` turns an item into the text that is searched (`format` by default),
+    it is called once for every item when the picker is created.
+    """
+    render_attrs = WidgetList.render_attrs | {"query", "is_disabled"}
+
+    def __init__(self,
+                 items,
+                 text: str = "Search: ",
+                 rows: int = 10,
+                 on_select: types.FunctionType = None,
+                 format: types.FunctionType = str,
+                 key: types.FunctionType = None,
+                 size: list[int, int] = None,
+                 pos: list[int, int] = [0, 0],
+                 **kwargs
+                 ):
+
+        self.index = FuzzyIndex(items, key = format if key is None else key)
+        self.query = ""
+        super().__init__(self.index.items, text, rows, on_select, format, size, pos, **kwargs)
+
+    def set_query(self, query: str):
+        """lists the items that match `query`, the best match is selected."""
+        self.query = query
+        if not query:
+            self.set_items(self.index.items)
+            return
+        self.set_items(map(self.index.items.__getitem__, self.index.search(query)))
+
+    def update(self, key):
+        key = super().update(key)
+        if key is None or key == "UPDATE":
+            return key
+        if key == Key.BACKSPACE:
+            if self.query:
+                self.set_query(self.query[:-1])
+            return
+        if key not in IGNORED_KEYS:
+            text = single_line(key)
+            if text:
+                self.set_query(self.query + text)
+            return
+        return key
+
+    def caption(self):
+        # the query with a pointer at its end while the picker is active
+        return self.text + self.query + ("" if self.is_disabled else "_")
+
+
+class WidgetTable(WidgetList):
+    """
+    a table of columns of values, see `Columns`. only the cells of the visible
+    rows and columns are formatted and placed, so a frame costs the same for
+    ten rows or millions of them.
+
+    UP, DOWN, PAGE_UP, PAGE_DOWN, HOME and END move the selected row, LEFT and
+    RIGHT the selected column (the columns scroll to keep it visible) and "s"
+    sorts by the selected column, a second "s" reverses the order. ENTER calls
+    `on_select(dialog, row)` with the index of the row in the columns, its
+    result is the result of the widget (the row index without `on_select`).
+
+    `columns` maps the headers to the column arrays. `formats` maps headers to
+    functions that turn a value into its text (`str` by default) and `widths`
+    to the widths of the columns. a column without a width is as wide as its
+    header and grows to the widest cell shown so far, up to `max_width`.
+    numbers are aligned to the right.
+    """
+    render_attrs = WidgetList.render_attrs | {"columns", "column", "left", "sorted_by", "descending", "widths"}
+    # widest default width of a column
+    max_width = 30
+
+    def __init__(self,
+                 columns,
+                 rows: int = 10,
+                 formats: dict = None,
+                 widths: dict = None,
+                 on_select: types.FunctionType = None,
+                 size: list[int, int] = None,
+                 pos: list[int, int] = [0, 0],
+                 **kwargs
+                 ):
+
+        self.columns = columns if isinstance(columns, Columns) else Columns(columns, formats)
+        # the selected column and the first visible one
+        self.column = 0
+        self.left = 0
+        # the column the rows are sorted by, None for the order of the arrays
+        self.sorted_by = None
+        self.descending = False
+        super().__init__(self.columns.rows(), "", rows, on_select, str, size, pos, **kwargs)
+
+        widths = {} if widths is None else widths
+        self.widths = [widths.get(name, len(name) + 2) for name in self.columns.names]
+        # the columns that grow with their cells
+        self.fit = [name not in widths for name in self.columns.names]
+        self.right_aligned = [
+            len(self.columns) > 0 and isinstance(values[0], numbers.Number)
+            for values in self.columns.arrays
+        ]
+
+    def sort_by(self, column, descending: bool = False):
+        """sorts the rows by `column` (a header or an index), the first row is selected."""
+        column = self.columns.index(column)
+        self.sorted_by = column
+        self.descending = descending
+        self.set_items(self.columns.rows(column, descending))
+
+    def _visible_columns(self):
+        # (column, x, width) of the visible columns, the last one may be cut
+        visible = []
+        x, end = 4, self.size[0] - 2
+        for c in range(self.left, len(self.widths)):
+            if x >= end:
+                break
+            visible.append((c, x, min(self.widths[c], end - x)))
+            x += self.widths[c] + 1
+        return visible
+
+    def select_column(self, column: int):
+        """selects `column` and scrolls the columns so it is visible."""
+        self.column = column
+        if column < self.left:
+            self.left = column
+            return
+        end = self.size[0] - 2
+        # the first visible columns are scrolled out until the selected one fits
+        while self.left < column and 4 + sum(self.widths[self.left:column + 1]) + column - self.left > end:
+            self.left += 1
+
+    def update(self, key):
+        key = super().update(key)
+        if key in (Key.LEFT, Key.RIGHT):
+            column = self.column + (1 if key == Key.RIGHT else -1)
+            # at the first or last column the key is passed on to the dialog
+            if not 0 <= column < len(self.widths):
+                return key
+            self.select_column(column)
+            return
+        if key == "s":
+            self.sort_by(self.column, self.sorted_by == self.column and not self.descending)
+            return
+        return key
+
+    def on_render(self, drawer: Drawer):
+        text_color = (220, 220, 220)
+        selected_color = (50, 220, 80)
+        # only the cells of the visible rows and columns are formatted
+        positions = range(self.top, self.top + self.rows)
+        indices = [self.items[p] for p in positions if self.items.has(p)]
+        cells = {}
+        for c, _, _ in self._visible_columns():
+            cells[c] = [self.columns.format(c, i) for i in indices]
+            if self.fit[c] and indices:
+                self.widths[c] = min(max(self.widths[c], max(map(len, cells[c]))), self.max_width)
+        # wider columns only push columns out on the right, those were formatted already
+        visible = self._visible_columns()
+
+        items = []
+        for c, x, w in visible:
+            header = self.columns.names[c]
+            if c == self.sorted_by:
+                header += " ▼" if self.descending else " ▲"
+            header = header[:w].rjust(w) if self.right_aligned[c] else header[:w]
+            color = selected_color if c == self.column else text_color
+            items.append((header, color, None, AnsiGraphicMode.UNDERLINE, (0, x)))
+
+        for row, position in enumerate(positions[:len(indices)]):
+            color = text_color
+            if position == self.selected:
+                color = selected_color
+                items.append(("> ", text_color, None, None, (row + 1, 2)))
+            for c, x, w in visible:
+                text = cells[c][row][:w]
+                if self.right_aligned[c]:
+                    text = text.rjust(w)
+                items.append((text, color, None, None, (row + 1, x)))
+
+        # scroll markers of the columns and the rows
+        if self.left > 0:
+            items.append(("←", text_color, None, None, (0, 2)))
+        if visible and (visible[-1][0] < len(self.widths) - 1 or visible[-1][2] < self.widths[visible[-1][0]]):
+            items.append(("→", text_color, None, None, (0, self.size[0] - 2)))
+        if self.top > 0:
+            items.append(("↑", text_color, None, None, (1, self.size[0] - 2)))
+        if self.items.has(self.top + self.rows):
+            items.append(("↓", text_color, None, None, (self.rows, self.size[0] - 2)))
+        drawer.place_many(items)
@@ -0,0 +1,101 @@
+use pyo3::exceptions::{PyBufferError, PyIndexError};
+use pyo3::ffi;
+use pyo3::prelude::*;
+
+use std::os::raw::{c_char, c_int, c_void};
+use std::ptr;
+
+use super::style::Cell;
+
+// every cell is exported as two native unsigned ints, (codepoint, style id)
+const CELL_FORMAT: &[u8] = b"I\0";
+
+/*
+fills `view` with a read-only, zero-copy view of `cells`, shaped as `shape`
+plus a last dimension of 2 for the codepoint and the style id of each cell.
+the owner has to keep the cells from being reallocated until the view is released.
+*/
+pub unsafe fn fill_cell_view(
+    view: *mut ffi::Py_buffer,
+    flags: c_int,
+    cells: &[Cell],
+    shape: &[usize],
+    owner: Bound<'_, PyAny>,
+) -> PyResult<()> {
+    if view.is_null() {
+        return Err(PyBufferError::new_err("View is null"));
+    }
+    if (flags & ffi::PyBUF_WRITABLE) == ffi::PyBUF_WRITABLE {
+        return Err(PyBufferError::new_err("Cells are read-only"));
+    }
+
+    let itemsize = std::mem::size_of::<u32>() as isize;
+    let ndim = shape.len() + 1;
+
+    // shape followed by the (c-contiguous) strides, freed in `release_cell_view`
+    let mut dims: Vec<isize> = shape.iter().map(|d| *d as isize).collect();
+    dims.push(2);
+    let mut stride = itemsize;
+    let mut strides = vec![0 as isize; ndim];
+    for i in (0..ndim).rev() {
+        strides[i] = stride;
+        stride *= dims[i];
+    }
+    dims.extend(strides);
+    let dims = Box::into_raw(Box::new(dims));
+
+    (*view).obj = owner.into_ptr();
+    (*view).buf = cells.as_ptr() as *mut c_void;
+    (*view).len = (cells.len() * std::mem::size_of::<Cell>()) as isize;
+    (*view).readonly = 1;
+    (*view).itemsize = itemsize;
+    (*view).format = if (flags & ffi::PyBUF_FORMAT) == ffi::PyBUF_FORMAT {
+        CELL_FORMAT.as_ptr() as *mut c_char
+    } else {
+        ptr::null_mut()
+    };
+
+    if (flags & ffi::PyBUF_ND) == ffi::PyBUF_ND {
+        (*view).ndim = ndim as c_int;
+        (*view).shape = (*dims).as_mut_ptr();
+        (*view).strides = if (flags & ffi::PyBUF_STRIDES) == ffi::PyBUF_STRIDES {
+            (*dims).as_mut_ptr().add(ndim)
+        } else {
+            ptr::null_mut()
+        };
+    } else {
+        // a simple request only gets the raw bytes
+        (*view).ndim = 1;
+        (*view).shape = ptr::null_mut();
+        (*view).strides = ptr::null_mut();
+    }
+
+    (*view).suboffsets = ptr::null_mut();
+    (*view).internal = dims as *mut c_void;
+
+    Ok(())
+}
+
+pub unsafe fn release_cell_view(view: *mut ffi::Py_buffer) {
+    if !(*view).internal.is_null() {
+        drop(Box::from_raw((*view).internal as *mut Vec<isize>));
+        (*view).internal = ptr::null_mut();
+    }
+}
+
+// python style index (negative values count from the end) to a checked index
+pub fn normalize_index(index: isize, len: usize) -> PyResult<usize> {
+    let i = if index < 0 { index + len as isize } else { index };
+    if i < 0 || i >= len as isize {
+        return Err(PyIndexError::new_err("index out of range"));
+    }
+    Ok(i as usize)
+}
+
+// resizing the cells would leave exported views dangling
+pub fn check_exports(exports: usize) -> PyResult<()> {
+    if exports > 0 {
+        return Err(PyBufferError::new_err("Existing exports of data: object cannot be re-sized"));
+    }
+    Ok(())
+}
@@ -65,9 +65,7 @@ impl AnsiChar {
     }
 
     pub fn as_ansistring(&self) -> AnsiString {
-        AnsiString {
-            vec: [self.clone()].to_vec()
-        }
+        AnsiString::from_chars(&[*self])
     }
 
     // python __add__ magic function
@@ -80,8 +78,6 @@ impl Add for AnsiChar {
     type Output = AnsiString;
 
     fn add(self, other: Self) -> Self::Output {
-        AnsiString {
-            vec: [self, other].to_vec(),
-        }
+        AnsiString::from_chars(&[self, other])
     }
 }
\ No newline at end of file
@@ -0,0 +1,376 @@
+use pyo3::prelude::*;
+
+use std::collections::HashMap;
+
+use super::AnsiColor;
+use super::drawer::{plane_style, Drawer};
+use super::string::place_cells;
+use super::style::{styles, Cell, StyleId, StylePins, StyleTable, Transform};
+
+// a change of the colors of a layer, see `style::Transform`
+#[pyclass]
+#[derive(Clone, Copy, PartialEq, Eq)]
+pub struct StyleTransform(pub Transform);
+
+#[pymethods]
+impl StyleTransform {
+    // the back color darkened to `percent`%, the default marks the active widget
+    #[staticmethod]
+    #[pyo3(signature = (percent = 90))]
+    pub fn shade(percent: u8) -> StyleTransform {
+        StyleTransform(Transform::Shade(percent.min(100)))
+    }
+
+    // fore and back color mixed with `color`, `amount` from 0.0 to 1.0
+    #[staticmethod]
+    #[pyo3(signature = (color, amount = 0.25))]
+    pub fn tint(color: (u8, u8, u8), amount: f32) -> StyleTransform {
+        let amount = (amount.clamp(0.0, 1.0) * 255.0).round() as u8;
+        StyleTransform(Transform::Tint(AnsiColor(color.0, color.1, color.2), amount))
+    }
+
+    // darker colors and FAINT, for the layers behind a popup
+    #[staticmethod]
+    pub fn dim() -> StyleTransform {
+        StyleTransform(Transform::Dim)
+    }
+
+    // python __eq__ magic function
+    pub fn __eq__(&self, other: &Self) -> bool {
+        self == other
+    }
+}
+
+#[derive(Clone, Copy, PartialEq, Eq, Default)]
+struct Rect {
+    y: usize,
+    x: usize,
+    height: usize,
+    width: usize,
+}
+
+impl Rect {
+    #[inline]
+    fn bottom(&self) -> usize {
+        self.y + self.height
+    }
+
+    #[inline]
+    fn right(&self) -> usize {
+        self.x + self.width
+    }
+
+    fn intersect(&self, other: &Rect) -> Rect {
+        let (y, x) = (self.y.max(other.y), self.x.max(other.x));
+        let (bottom, right) = (self.bottom().min(other.bottom()), self.right().min(other.right()));
+        if bottom <= y || right <= x {
+            return Rect::default();
+        }
+        Rect {y: y, x: x, height: bottom - y, width: right - x}
+    }
+}
+
+struct Layer {
+    key: u64,
+    // copy of the cells of the drawer, taken when its version changes
+    cells: Vec<Cell>,
+    pins: StylePins,
+    size: (usize, usize),
+    version: u64,
+    pos: (usize, usize),
+    z: i32,
+    // layers with the same z are stacked in the order they were first set
+    order: usize,
+    transform: Option<Transform>,
+    clip: Option<Rect>,
+    // area of the frame covered at the last compose, None if it was not composed yet
+    composed: Option<Rect>,
+    // anything but the area changed since the last compose
+    changed: bool,
+    // set since the last compose
+    seen: bool,
+}
+
+impl Layer {
+    // the area of the frame the layer covers
+    fn area(&self, bounds: &Rect) -> Rect {
+        let rect = Rect {y: self.pos.0, x: self.pos.1, height: self.size.0, width: self.size.1};
+        let rect = rect.intersect(bounds);
+        match &self.clip {
+            Some(clip) => rect.intersect(clip),
+            None => rect,
+        }
+    }
+}
+
+/*
+stacks drawers as layers by their z order and keeps the composed frame
+between calls. only the areas of layers that were added, removed, moved or
+changed are composed again, so a focus change or a popup costs the cells
+they cover instead of a blend of every layer.
+
+layers are set every frame, the ones that were not set since the last
+`compose` are removed.
+*/
+#[pyclass]
+pub struct Compositor {
+    // sorted by (z, order) at every compose
+    layers: Vec<Layer>,
+    // key -> index of the layer in `layers`
+    index: HashMap<u64, usize>,
+    frame: Vec<Cell>,
+    // the style ids of the frame, see `style::StylePins`
+    pins: StylePins,
+    size: (usize, usize),
+    plane: StyleId,
+    // damaged columns of every row of the frame, (start, end)
+    damage: Vec<(usize, usize)>,
+    next_order: usize,
+}
+
+// non-python methods
+impl Compositor {
+    fn damage_rect(&mut self, rect: &Rect) {
+        for y in rect.y..rect.bottom() {
+            let span = &mut self.damage[y];
+            if span.0 >= span.1 {
+                *span = (rect.x, rect.right());
+            } else {
+                *span = (span.0.min(rect.x), span.1.max(rect.right()));
+            }
+        }
+    }
+
+    fn reindex(&mut self) {
+        self.index.clear();
+        self.index.extend(self.layers.iter().enumerate().map(|(i, l)| (l.key, i)));
+    }
+
+    fn damage_all(&mut self) {
+        let width = self.size.1;
+        self.damage.iter_mut().for_each(|span| *span = (0, width));
+    }
+
+    fn resize(&mut self, size: (usize, usize), styles: &mut StyleTable) {
+        self.size = size;
+        self.frame = vec![Cell::new(' ', self.plane); size.0 * size.1];
+        self.pins.clear(styles);
+        self.pins.pin(self.plane, styles);
+        self.damage = vec![(0, 0); size.0];
+        self.damage_all();
+        for layer in self.layers.iter_mut() {
+            layer.composed = None;
+        }
+    }
+
+    // composes the damaged part of a row again, from the plane up
+    fn compose_row(&mut self, y: usize, start: usize, end: usize, styles: &mut StyleTable, shaded: &mut Vec<Cell>) {
+        let width = self.size.1;
+        let row = &mut self.frame[y * width..(y + 1) * width];
+        row[start..end].fill(Cell::new(' ', self.plane));
+
+        for layer in self.layers.iter() {
+            let area = match layer.composed {
+                Some(area) if area.y <= y && y < area.bottom() => area,
+                _ => continue,
+            };
+            let (x0, x1) = (start.max(area.x), end.min(area.right()));
+            if x0 >= x1 {
+                continue;
+            }
+            let offset = (y - layer.pos.0) * layer.size.1 + (x0 - layer.pos.1);
+            let src = &layer.cells[offset..offset + (x1 - x0)];
+
+            match &layer.transform {
+                None => place_cells(&mut row[x0..x1], src, false, &mut self.pins, styles),
+                Some(transform) => {
+                    // neighbouring cells mostly share their styles, remember the last one
+                    shaded.clear();
+                    let mut last: Option<(StyleId, StyleId)> = None;
+                    for cell in src {
+                        let style = match last {
+                            Some((from, to)) if from == cell.style => to,
+                            _ => {
+                                let to = styles.transform(cell.style, transform);
+                                last = Some((cell.style, to));
+                                to
+                            }
+                        };
+                        shaded.push(Cell::new(cell.ch, style));
+                    }
+                    place_cells(&mut row[x0..x1], shaded, false, &mut self.pins, styles);
+                }
+            }
+        }
+    }
+}
+
+// python methods
+#[pymethods]
+impl Compositor {
+    #[new]
+    #[pyo3(signature = (plane_color = None))]
+    pub fn new(plane_color: Option<(u8, u8, u8)>) -> Compositor {
+        let mut styles = styles();
+        let plane = plane_style(plane_color, &mut styles);
+        let mut pins = StylePins::new();
+        pins.pin(plane, &mut styles);
+        Compositor {
+            layers: Vec::new(),
+            index: HashMap::new(),
+            frame: Vec::new(),
+            pins: pins,
+            size: (0, 0),
+            plane: plane,
+            damage: Vec::new(),
+            next_order: 0,
+        }
+    }
+
+    #[getter]
+    pub fn plane_color(&self) -> Option<(u8, u8, u8)> {
+        styles().get(self.plane).back.map(|c| (c.0, c.1, c.2))
+    }
+
+    // the frame is composed again only if the color changed
+    #[setter]
+    pub fn set_plane_color(&mut self, plane_color: Option<(u8, u8, u8)>) {
+        let mut styles = styles();
+        let plane = plane_style(plane_color, &mut styles);
+        if plane != self.plane {
+            self.plane = plane;
+            self.pins.pin(plane, &mut styles);
+            self.damage_all();
+        }
+    }
+
+    /*
+    sets the layer `key` to the cells of `drawer` at `pos` (y, x), the cells
+    are copied only when the drawer changed since the last call. `clip` is a
+    (y, x, height, width) area of the frame the layer is cut to.
+    */
+    #[pyo3(signature = (key, drawer, pos, z = 0, transform = None, clip = None))]
+    pub fn set_layer(
+        &mut self,
+        key: u64,
+        drawer: &Drawer,
+        pos: (usize, usize),
+        z: i32,
+        transform: Option<StyleTransform>,
+        clip: Option<(usize, usize, usize, usize)>,
+    ) {
+        let transform = transform.map(|t| t.0);
+        let clip = clip.map(|c| Rect {y: c.0, x: c.1, height: c.2, width: c.3});
+
+        let layer = match self.index.get(&key) {
+            Some(i) => &mut self.layers[*i],
+            None => {
+                self.index.insert(key, self.layers.len());
+                self.layers.push(Layer {
+                    key: key,
+                    cells: Vec::new(),
+                    pins: StylePins::new(),
+                    size: (0, 0),
+                    version: 0,
+                    pos: pos,
+                    z: z,
+                    order: self.next_order,
+                    transform: transform,
+                    clip: clip,
+                    composed: None,
+                    changed: true,
+                    seen: true,
+                });
+                self.next_order += 1;
+                self.layers.last_mut().unwrap()
+            }
+        };
+
+        if layer.version != drawer.version() {
+            layer.cells.clear();
+            layer.cells.extend_from_slice(drawer.cells());
+            layer.pins.assign(drawer.pins(), &mut styles());
+            layer.size = drawer.size();
+            layer.version = drawer.version();
+            layer.changed = true;
+        }
+        if layer.pos != pos || layer.z != z || layer.transform != transform || layer.clip != clip {
+            layer.pos = pos;
+            layer.z = z;
+            layer.transform = transform;
+            layer.clip = clip;
+            layer.changed = true;
+        }
+        layer.seen = true;
+    }
+
+    pub fn remove_layer(&mut self, key: u64) {
+        if let Some(i) = self.index.remove(&key) {
+            let layer = self.layers.remove(i);
+            self.reindex();
+            if let Some(area) = layer.composed {
+                self.damage_rect(&area);
+            }
+        }
+    }
+
+    // the next `compose` composes the whole frame again
+    pub fn invalidate(&mut self) {
+        self.damage_all();
+    }
+
+    pub fn __len__(&self) -> usize {
+        self.layers.len()
+    }
+
+    /*
+    composes the damaged areas of the frame and copies the frame into
+    `target`, removes the layers that were not set since the last call.
+    */
+    pub fn compose(&mut self, target: &mut Drawer) {
+        let mut styles = styles();
+        if target.size() != self.size {
+            self.resize(target.size(), &mut styles);
+        }
+        let bounds = Rect {y: 0, x: 0, height: self.size.0, width: self.size.1};
+
+        let removed: Vec<Rect> = self.layers.iter().filter(|l| !l.seen).filter_map(|l| l.composed).collect();
+        self.layers.retain(|l| l.seen);
+        for area in removed {
+            self.damage_rect(&area);
+        }
+
+        for i in 0..self.layers.len() {
+            let area = self.layers[i].area(&bounds);
+            let layer = &self.layers[i];
+            if !layer.changed && layer.composed == Some(area) {
+                self.layers[i].seen = false;
+                continue;
+            }
+            if let Some(old) = layer.composed {
+                self.damage_rect(&old);
+            }
+            self.damage_rect(&area);
+            let layer = &mut self.layers[i];
+            layer.composed = Some(area);
+            layer.changed = false;
+            layer.seen = false;
+        }
+        self.layers.sort_by_key(|l| (l.z, l.order));
+        self.reindex();
+
+        let mut shaded = Vec::new();
+        for y in 0..self.size.0 {
+            let (start, end) = self.damage[y];
+            if start < end {
+                self.compose_row(y, start, end, &mut styles, &mut shaded);
+                self.damage[y] = (0, 0);
+            }
+        }
+
+        // the plane is kept pinned while the frame does not show it, it fills damaged rows
+        self.pins.trim(&self.frame, &mut styles);
+        self.pins.pin(self.plane, &mut styles);
+        target.copy_cells(&self.frame, &self.pins, &mut styles);
+    }
+}
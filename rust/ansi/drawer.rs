@@ -1,9 +1,18 @@
+use pyo3::exceptions::PyValueError;
+use pyo3::ffi;
 use pyo3::prelude::*;
+use pyo3::types::PyBytes;
 
-use crate::ansi::string::AnsiString;
-use crate::ansi::ColorMode;
+use std::fmt::Write;
+use std::os::raw::c_int;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::time::Duration;
 
-use super::AnsiColor;
+use crate::ansi::buffer::{check_exports, fill_cell_view, normalize_index, release_cell_view};
+use crate::ansi::drawlist::DrawList;
+use crate::ansi::string::{place_cells, place_chars, write_cells, AnsiString, Pen};
+use crate::ansi::style::{styles, Cell, Style, StyleId, StylePins, StyleTable};
+use crate::ansi::{AnsiGraphics, ColorMode};
 
 #[derive(Clone, Copy)]
 struct Size {
@@ -11,16 +20,99 @@ struct Size {
     width: usize
 }
 
-#[derive(Clone)]
+/*
+the plane is a single row-major grid of cells, each cell is a character and
+the id of its style in the shared style table, so clearing and copying
+areas are plain slice copies.
+*/
 #[pyclass]
 pub struct Drawer {
     size: Size,
-    #[pyo3(get, set)]
-    plane: Vec<AnsiString>,
+    // back buffer, `size.height` rows of `size.width` cells
+    cells: Vec<Cell>,
+    // the last frame written by `render_diff` (front buffer)
+    front: Option<Vec<Cell>>,
+    // the style ids of the back and the front buffer, see `style::StylePins`
+    pins: StylePins,
+    front_pins: StylePins,
+    // buffer views exported to python, the cells can not be reallocated while there are any
+    exports: usize,
+    // encoded frame of `render_into`, kept to reuse its allocation
+    out: String,
+    // changes with every write to the cells, see `next_version`
+    version: u64,
 }
 
-fn get_string_with_len(len: usize) -> String {
-    " ".repeat(len).to_string()
+// unchanged cells shorter than this are rewritten instead of moving the cursor over them
+const MAX_DAMAGE_GAP: usize = 4;
+
+// synchronized update mode, the terminal shows the frame only once it is complete
+const SYNC_BEGIN: &str = "\x1b[?2026h";
+const SYNC_END: &str = "\x1b[?2026l";
+
+// a non-blocking descriptor that is full is tried again after this long
+const WOULD_BLOCK_WAIT: Duration = Duration::from_millis(1);
+
+/*
+writes all of `data` to a file descriptor owned by the caller, without holding
+the GIL. a non-blocking descriptor (e.g. a stdout shared with asyncio) that
+is full or a write interrupted by a signal is retried, a frame is never left
+half written.
+*/
+#[cfg(unix)]
+fn write_fd(py: Python<'_>, fd: i32, data: &[u8]) -> PyResult<()> {
+    use std::io::{ErrorKind, Write};
+    use std::mem::ManuallyDrop;
+    use std::os::unix::io::FromRawFd;
+
+    // the descriptor must not be closed when the file is dropped
+    let mut file = ManuallyDrop::new(unsafe { std::fs::File::from_raw_fd(fd) });
+    py.allow_threads(|| {
+        let mut rest = data;
+        while !rest.is_empty() {
+            match file.write(rest) {
+                Ok(0) => return Err(std::io::Error::from(ErrorKind::WriteZero)),
+                Ok(n) => rest = &rest[n..],
+                Err(e) if e.kind() == ErrorKind::Interrupted => {},
+                Err(e) if e.kind() == ErrorKind::WouldBlock => std::thread::sleep(WOULD_BLOCK_WAIT),
+                Err(e) => return Err(e),
+            }
+        }
+        Ok(())
+    })?;
+    Ok(())
+}
+
+// there is no portable way to borrow a C runtime descriptor here, `os.write` is used instead
+#[cfg(not(unix))]
+fn write_fd(py: Python<'_>, fd: i32, data: &[u8]) -> PyResult<()> {
+    use pyo3::exceptions::PyBlockingIOError;
+
+    let os = py.import_bound("os")?;
+    let mut rest = data;
+    while !rest.is_empty() {
+        match os.call_method1("write", (fd, PyBytes::new_bound(py, rest))) {
+            Ok(n) => rest = &rest[n.extract::<usize>()?..],
+            // interrupted writes are retried by python itself
+            Err(e) if e.is_instance_of::<PyBlockingIOError>(py) => {
+                py.allow_threads(|| std::thread::sleep(WOULD_BLOCK_WAIT));
+            },
+            Err(e) => return Err(e),
+        }
+    }
+    Ok(())
+}
+
+// versions are unique over all drawers, equal versions mean equal cells
+static VERSIONS: AtomicU64 = AtomicU64::new(1);
+
+#[inline]
+fn next_version() -> u64 {
+    VERSIONS.fetch_add(1, Ordering::Relaxed)
+}
+
+pub fn plane_style(plane_color: Option<(u8, u8, u8)>, styles: &mut StyleTable) -> StyleId {
+    styles.intern(Style::new(None, plane_color))
 }
 
 // non-python methods
@@ -30,6 +122,144 @@ impl Drawer {
         //assert!(pos.1 <= self.size.width);
         (pos.0 >= self.size.height) || (pos.1 >= self.size.width)
     }
+
+    #[inline]
+    pub fn row(&self, y: usize) -> &[Cell] {
+        &self.cells[y * self.size.width..(y + 1) * self.size.width]
+    }
+
+    // the cells of row `y` from column `x` on to be written, and their pins
+    #[inline]
+    fn row_from(&mut self, y: usize, x: usize) -> (&mut [Cell], &mut StylePins) {
+        self.version = next_version();
+        let width = self.size.width;
+        (&mut self.cells[y * width + x..(y + 1) * width], &mut self.pins)
+    }
+
+    // `place_cells` into row `y` from column `x` on, cut at the right edge
+    #[inline]
+    fn place_row(&mut self, y: usize, x: usize, src: &[Cell], assign: bool, styles: &mut StyleTable) {
+        let (dst, pins) = self.row_from(y, x);
+        place_cells(dst, src, assign, pins, styles);
+    }
+
+    #[inline]
+    pub fn cells(&self) -> &[Cell] {
+        &self.cells
+    }
+
+    #[inline]
+    pub fn pins(&self) -> &StylePins {
+        &self.pins
+    }
+
+    // replaces all cells with `cells` of the same size, which hold the ids of `pins`
+    pub fn copy_cells(&mut self, cells: &[Cell], pins: &StylePins, styles: &mut StyleTable) {
+        self.version = next_version();
+        self.cells.copy_from_slice(cells);
+        self.pins.assign(pins, styles);
+    }
+
+    #[inline]
+    pub fn version(&self) -> u64 {
+        self.version
+    }
+
+    fn encode(&self, out: &mut String, mode: &ColorMode, styles: &StyleTable) {
+        assert!(self.size.height > 0);
+        let mut pen = Pen::new(mode);
+        for y in 0..self.size.height {
+            write_cells(out, self.row(y), &mut pen, styles);
+            pen.end_line(out, styles);
+            out.push('\n');
+        }
+        pen.reset(out, styles);
+    }
+
+    // see `render_diff`
+    fn encode_diff(&mut self, out: &mut String, mode: &ColorMode) {
+        assert!(self.size.height > 0);
+        let mut styles = styles();
+        let mut front = match self.front.take() {
+            Some(front) if front.len() == self.cells.len() => front,
+            _ => {
+                write!(out, "\x1b[{}F", self.size.height).unwrap();
+                self.encode(out, mode, &styles);
+                self.front = Some(self.cells.clone());
+                self.front_pins.assign(&self.pins, &mut styles);
+                return
+            }
+        };
+
+        // the style is kept while the cursor moves between the damaged runs
+        let mut pen = Pen::new(mode);
+        let width = self.size.width;
+        // row of the cursor, relative to the first line of the drawer
+        let mut cursor_row: Option<usize> = None;
+
+        for y in 0..self.size.height {
+            let front_row = &front[y * width..(y + 1) * width];
+            if self.row(y) == front_row {
+                continue;
+            }
+
+            let mut x = 0;
+            while x < width {
+                if self.row(y)[x] == front_row[x] {
+                    x += 1;
+                    continue;
+                }
+                let end = self.damaged_run_end(front_row, y, x);
+
+                // move to the first line, then down to the damaged row
+                let row = match cursor_row {
+                    None => {
+                        write!(out, "\x1b[{}F", self.size.height).unwrap();
+                        0
+                    },
+                    Some(row) => row
+                };
+                if y > row {
+                    write!(out, "\x1b[{}B", y - row).unwrap();
+                }
+                cursor_row = Some(y);
+                write!(out, "\x1b[{}G", x + 1).unwrap();
+
+                write_cells(out, &self.row(y)[x..end], &mut pen, &styles);
+                x = end;
+            }
+        }
+
+        pen.reset(out, &styles);
+        if let Some(row) = cursor_row {
+            // back to the line below the drawer
+            write!(out, "\x1b[{}E", self.size.height - row).unwrap();
+        }
+
+        front.copy_from_slice(&self.cells);
+        self.front = Some(front);
+        self.front_pins.assign(&self.pins, &mut styles);
+    }
+
+    // returns the end of the damaged run starting at `start` in row `y`,
+    // short unchanged gaps are merged into the run
+    fn damaged_run_end(&self, front: &[Cell], y: usize, start: usize) -> usize {
+        let back = self.row(y);
+        let mut end = start + 1;
+        let mut gap = 0;
+        for x in (start + 1)..self.size.width {
+            if back[x] != front[x] {
+                end = x + 1;
+                gap = 0;
+            } else {
+                gap += 1;
+                if gap >= MAX_DAMAGE_GAP {
+                    break;
+                }
+            }
+        }
+        end
+    }
 }
 
 // python methods
@@ -38,32 +268,182 @@ impl Drawer {
     #[new]
     #[inline]
     pub fn new(size: (usize, usize), plane_color: Option<(u8, u8, u8)>) -> Drawer {
-        let mut plane: Vec<AnsiString> = Vec::with_capacity(size.0);
-        for _ in 0..size.0 {
-            plane.push(match plane_color {
-                None => {AnsiString::new_colorless(get_string_with_len(size.1).as_str())}
-                Some(color) => {AnsiString::new_back(get_string_with_len(size.1).as_str(), color)}
-            });
-        }
-        
+        let mut styles = styles();
+        let plane = plane_style(plane_color, &mut styles);
+        let mut pins = StylePins::new();
+        pins.pin(plane, &mut styles);
         Drawer {
             size: Size {
                 height: size.0,
                 width: size.1
             },
-            plane: plane
+            cells: vec![Cell::new(' ', plane); size.0 * size.1],
+            front: None,
+            pins: pins,
+            front_pins: StylePins::new(),
+            exports: 0,
+            out: String::new(),
+            version: next_version(),
         }
     }
 
+    // (height, width)
+    #[getter]
+    pub fn size(&self) -> (usize, usize) {
+        (self.size.height, self.size.width)
+    }
+
+    // copies every row, prefer indexing or the buffer view
+    #[getter(plane)]
+    fn get_plane(&self) -> Vec<AnsiString> {
+        let mut styles = styles();
+        (0..self.size.height).map(|y| AnsiString::from_cells_in(self.row(y).to_vec(), &mut styles)).collect()
+    }
+
+    #[setter(plane)]
+    fn set_plane(&mut self, plane: Vec<AnsiString>) -> PyResult<()> {
+        check_exports(self.exports)?;
+        // a drawer without rows can not be rendered
+        if plane.is_empty() {
+            return Err(PyValueError::new_err("the plane needs at least one row"));
+        }
+        let width = plane[0].len();
+        if let Some(y) = plane.iter().position(|row| row.len() != width) {
+            return Err(PyValueError::new_err(format!("row {} has {} cells, the first row has {}", y, plane[y].len(), width)));
+        }
+
+        self.size = Size {height: plane.len(), width: width};
+        self.cells = plane.iter().flat_map(|row| row.cells.iter().copied()).collect();
+        self.front = None;
+        self.version = next_version();
+        let mut styles = styles();
+        self.pins.clear(&mut styles);
+        for row in &plane {
+            self.pins.pin_all(&row.pins, &mut styles);
+        }
+        self.front_pins.clear(&mut styles);
+        Ok(())
+    }
+
+    // python len function, the number of rows
+    pub fn __len__(&self) -> usize {
+        self.size.height
+    }
+
+    // python __getitem__ magic function, `drawer[y]` returns a row and `drawer[y, x]` a single AnsiChar
+    pub fn __getitem__(&self, py: Python<'_>, index: &Bound<'_, PyAny>) -> PyResult<PyObject> {
+        if let Ok((y, x)) = index.extract::<(isize, isize)>() {
+            let y = normalize_index(y, self.size.height)?;
+            let x = normalize_index(x, self.size.width)?;
+            return Ok(styles().char_of(&self.row(y)[x]).into_py(py));
+        }
+
+        let y = normalize_index(index.extract::<isize>()?, self.size.height)?;
+        Ok(AnsiString::from_cells(self.row(y).to_vec()).into_py(py))
+    }
+
+    /*
+    read-only, zero-copy buffer of the plane, `memoryview(drawer)` has the shape
+    (height, width, 2) with the codepoint and the style id of each cell.
+    */
+    unsafe fn __getbuffer__(slf: Bound<'_, Self>, view: *mut ffi::Py_buffer, flags: c_int) -> PyResult<()> {
+        let mut this = slf.borrow_mut();
+        let shape = [this.size.height, this.size.width];
+        fill_cell_view(view, flags, &this.cells, &shape, slf.clone().into_any())?;
+        this.exports += 1;
+        Ok(())
+    }
+
+    unsafe fn __releasebuffer__(mut slf: PyRefMut<'_, Self>, view: *mut ffi::Py_buffer) {
+        slf.exports -= 1;
+        release_cell_view(view);
+    }
+
+    // resets the back buffer to the plane color, the front buffer is kept
+    pub fn clear(&mut self, plane_color: Option<(u8, u8, u8)>) {
+        let mut styles = styles();
+        let plane = plane_style(plane_color, &mut styles);
+        self.cells.fill(Cell::new(' ', plane));
+        self.version = next_version();
+        self.pins.clear(&mut styles);
+        self.pins.pin(plane, &mut styles);
+    }
+
+    // forgets the front buffer, the next `render_diff` redraws everything
+    pub fn invalidate(&mut self) {
+        self.front = None;
+        self.front_pins.clear(&mut styles());
+    }
+
+    /*
+    renders only the cells that changed since the last call and swaps the buffers.
+    the cursor is expected on the line below the drawer (where a full `render`
+    leaves it) and is moved back there, an empty string means nothing changed.
+    */
+    pub fn render_diff(&mut self, mode: &ColorMode) -> String {
+        let mut _render = String::new();
+        self.encode_diff(&mut _render, mode);
+        _render
+    }
+
     pub fn render(&self, mode: &ColorMode) -> String {
-        assert!(self.plane.len() > 0);
         let mut _render = String::with_capacity(self.size.width * self.size.height);
-        for p in &self.plane {
-            _render.push_str((p.to_string(mode) + "\n").as_str())
-        }
+        self.encode(&mut _render, mode, &styles());
         _render
     }
 
+    /*
+    renders the frame into a reusable buffer and writes it with a single write,
+    `target` is a file descriptor or an object with a `write(bytes)` method.
+    with `diff` only the damaged cells are written (see `render_diff`), with
+    `sync` the frame is wrapped in the synchronized update mode of the terminal
+    so it is never shown half drawn. returns the number of bytes written.
+    */
+    #[pyo3(signature = (target, mode, diff = true, sync = false))]
+    pub fn render_into(&mut self, py: Python<'_>, target: &Bound<'_, PyAny>, mode: &ColorMode, diff: bool, sync: bool) -> PyResult<usize> {
+        let mut out = std::mem::take(&mut self.out);
+        out.clear();
+        if sync {
+            out.push_str(SYNC_BEGIN);
+        }
+        let start = out.len();
+        if diff {
+            self.encode_diff(&mut out, mode);
+        } else {
+            self.encode(&mut out, mode, &styles());
+        }
+        if out.len() == start {
+            // nothing changed, nothing is written
+            out.clear();
+        } else if sync {
+            out.push_str(SYNC_END);
+        }
+
+        let result = if out.is_empty() {
+            Ok(())
+        } else if let Ok(fd) = target.extract::<i32>() {
+            write_fd(py, fd, out.as_bytes())
+        } else {
+            target.call_method1("write", (PyBytes::new_bound(py, out.as_bytes()),)).map(|_| ())
+        };
+
+        if result.is_err() {
+            // the screen may show any part of the frame, the next one is drawn completely
+            self.invalidate();
+            if sync {
+                // best effort, so the terminal does not wait for the end of the frame
+                let _ = match target.extract::<i32>() {
+                    Ok(fd) => write_fd(py, fd, SYNC_END.as_bytes()),
+                    Err(_) => target.call_method1("write", (PyBytes::new_bound(py, SYNC_END.as_bytes()),)).map(|_| ()),
+                };
+            }
+        }
+
+        let written = out.len();
+        self.out = out;
+        result.map(|_| written)
+    }
+
     // python __str__ magic function
     pub fn __str__(&self) -> String{
         self.render(&ColorMode::TRUECOLOR)
@@ -74,20 +454,64 @@ impl Drawer {
             return
         }
 
-        let write_len = astr.len();
-        let end_idx = pos.1 + write_len;
+        // cells past the right edge are cut off
+        let mut styles = styles();
+        self.place_row(pos.0, pos.1, &astr.cells, assign, &mut styles);
+        self.pins.trim(&self.cells, &mut styles);
+    }
+
+    /*
+    places many texts in a single call, `items` is an iterable of
+    (text, fore, back, graphics, (y, x)) tuples. the text is a str or an
+    AnsiString, fore, back and graphics only apply to a str.
+    */
+    #[pyo3(signature = (items, assign = false))]
+    pub fn place_many(&mut self, items: &Bound<'_, PyAny>, assign: bool) -> PyResult<()> {
+        // the style table is only locked while no python code runs, iterating
+        // `items` may run a generator that creates AnsiStrings, which lock it too
+        for item in items.iter()? {
+            let (text, fore, back, graphics, pos): (
+                Bound<'_, PyAny>,
+                Option<(u8, u8, u8)>,
+                Option<(u8, u8, u8)>,
+                Option<AnsiGraphics>,
+                (usize, usize),
+            ) = item?.extract()?;
 
-        if end_idx > self.size.width {
-            let mut _ansi_string = astr.clone();
-            _ansi_string = _ansi_string.cut_at(write_len - (end_idx - self.size.width));
-            self.plane[pos.0].place(&_ansi_string, pos.1, assign);
-        } else {
-            self.plane[pos.0].place(&astr, pos.1, assign);
+            if self.check_write_position(pos) {
+                continue
+            }
+
+            if let Ok(astr) = text.downcast::<AnsiString>() {
+                let astr = astr.borrow();
+                self.place_row(pos.0, pos.1, &astr.cells, assign, &mut styles());
+            } else {
+                let text: String = text.extract()?;
+                let mut styles = styles();
+                let style = styles.intern(Style::with_graphics(fore, back, graphics));
+                let (dst, pins) = self.row_from(pos.0, pos.1);
+                place_chars(dst, text.chars(), style, assign, pins, &mut styles);
+            }
+        }
+        self.pins.trim(&self.cells, &mut styles());
+        Ok(())
+    }
+
+    // places every item of a DrawList, see `place_many`
+    #[pyo3(signature = (list, assign = false))]
+    pub fn place_list(&mut self, list: &DrawList, assign: bool) {
+        let mut styles = styles();
+        for (cells, pos) in list.iter() {
+            if self.check_write_position(pos) {
+                continue
+            }
+            self.place_row(pos.0, pos.1, cells, assign, &mut styles);
         }
+        self.pins.trim(&self.cells, &mut styles);
     }
 
     pub fn center_place(&mut self, astr: &AnsiString, ypos: usize, assign: bool) {
-        let xpos: usize = (self.size.width - astr.len()) / 2;
+        let xpos: usize = self.size.width.saturating_sub(astr.len()) / 2;
         self.place(astr, (ypos, xpos), assign);
     }
 
@@ -97,19 +521,11 @@ impl Drawer {
             return
         }
 
-        let write_len = _str.len();
-        let end_idx = pos.1 + write_len;
-
-        if end_idx > self.size.width {
-            let _string = _str.split_at(write_len - (end_idx - self.size.width)).0;
-            self.plane[pos.0].place_str(_string, pos.1);
-        } else {
-            self.plane[pos.0].place_str(_str, pos.1);
-        }
+        self.place(&AnsiString::new_colorless(_str), pos, false);
     }
 
     pub fn center_place_str(&mut self, str: &str, ypos: usize) {
-        let xpos: usize = (self.size.width - str.len()) / 2;
+        let xpos: usize = self.size.width.saturating_sub(str.chars().count()) / 2;
         self.place_str(str, (ypos, xpos));
     }
 
@@ -118,36 +534,33 @@ impl Drawer {
             return
         }
 
-        for i in pos.0..self.size.height {
-            // reletive height
-            let rh: usize = i - pos.0;
+        let mut styles = styles();
+        let rows = other.size.height.min(self.size.height - pos.0);
 
-            if rh > (other.size.height - 1) {
-                break;
-            }
-
-            if border {
-                // other.plane's reletive line
-                let mut otprl = other.plane[rh].clone();
-
-                for i in 0..other.size.width{
-                    match otprl.vec[i].back_color {
-                        None => {},
-                        Some(bc) => {
-                            otprl.vec[i].back_color = Some(AnsiColor {
-                            0: (bc.0 as f32 * 0.9) as u8,
-                            1: (bc.1 as f32 * 0.9) as u8,
-                            2: (bc.2 as f32 * 0.9) as u8,
-                            });}
-                    }
+        if border {
+            // the shaded copy of a row is kept between rows to avoid allocating
+            let mut shaded: Vec<Cell> = Vec::with_capacity(other.size.width);
+            let mut last: Option<(StyleId, StyleId)> = None;
+            for rh in 0..rows {
+                shaded.clear();
+                for cell in other.row(rh) {
+                    let style = match last {
+                        Some((from, to)) if from == cell.style => to,
+                        _ => {
+                            let to = styles.shade(cell.style);
+                            last = Some((cell.style, to));
+                            to
+                        }
+                    };
+                    shaded.push(Cell::new(cell.ch, style));
                 }
-
-                self.plane[i].place(&otprl, pos.1, false);
-                
-            } else {
-                self.plane[i].place(&other.plane[rh], pos.1, false);
+                self.place_row(pos.0 + rh, pos.1, &shaded, false, &mut styles);
+            }
+        } else {
+            for rh in 0..rows {
+                self.place_row(pos.0 + rh, pos.1, other.row(rh), false, &mut styles);
             }
-            
         }
+        self.pins.trim(&self.cells, &mut styles);
     }
-}
\ No newline at end of file
+}
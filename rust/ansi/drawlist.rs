@@ -0,0 +1,112 @@
+use pyo3::prelude::*;
+
+use super::AnsiGraphics;
+use super::buffer::normalize_index;
+use super::string::AnsiString;
+use super::style::{styles, Cell, Style, StylePins};
+
+// a text encoded to cells once, and where to place it
+struct DrawItem {
+    cells: Vec<Cell>,
+    // the style ids of the cells, see `style::StylePins`
+    pins: StylePins,
+    pos: (usize, usize),
+}
+
+// text is a str or an AnsiString, the colors and graphics only apply to a str
+fn encode_text(
+    text: &Bound<'_, PyAny>,
+    fore: Option<(u8, u8, u8)>,
+    back: Option<(u8, u8, u8)>,
+    graphics: Option<AnsiGraphics>,
+) -> PyResult<(Vec<Cell>, StylePins)> {
+    if let Ok(astr) = text.downcast::<AnsiString>() {
+        let astr = astr.borrow();
+        let mut pins = StylePins::new();
+        pins.assign(&astr.pins, &mut styles());
+        return Ok((astr.cells.clone(), pins));
+    }
+    let text: String = text.extract()?;
+    let mut styles = styles();
+    let style = styles.intern(Style::with_graphics(fore, back, graphics));
+    let mut pins = StylePins::new();
+    pins.pin(style, &mut styles);
+    Ok((text.chars().map(|c| Cell::new(c, style)).collect(), pins))
+}
+
+/*
+a list of texts and positions, built once and placed with `Drawer.place_list`
+in a single call. single items can be replaced between frames, only the
+replaced texts are encoded again.
+*/
+#[pyclass]
+pub struct DrawList {
+    items: Vec<DrawItem>,
+}
+
+// non-python methods
+impl DrawList {
+    pub fn iter(&self) -> impl Iterator<Item = (&[Cell], (usize, usize))> {
+        self.items.iter().map(|item| (item.cells.as_slice(), item.pos))
+    }
+}
+
+// python methods
+#[pymethods]
+impl DrawList {
+    #[new]
+    pub fn new() -> DrawList {
+        DrawList {items: Vec::new()}
+    }
+
+    // appends a text and returns its index
+    #[pyo3(signature = (text, pos, fore = None, back = None, graphics = None))]
+    pub fn add(
+        &mut self,
+        text: &Bound<'_, PyAny>,
+        pos: (usize, usize),
+        fore: Option<(u8, u8, u8)>,
+        back: Option<(u8, u8, u8)>,
+        graphics: Option<AnsiGraphics>,
+    ) -> PyResult<usize> {
+        let (cells, pins) = encode_text(text, fore, back, graphics)?;
+        self.items.push(DrawItem {
+            cells: cells,
+            pins: pins,
+            pos: pos,
+        });
+        Ok(self.items.len() - 1)
+    }
+
+    // replaces the text of an item, its position is kept
+    #[pyo3(signature = (index, text, fore = None, back = None, graphics = None))]
+    pub fn set_text(
+        &mut self,
+        index: isize,
+        text: &Bound<'_, PyAny>,
+        fore: Option<(u8, u8, u8)>,
+        back: Option<(u8, u8, u8)>,
+        graphics: Option<AnsiGraphics>,
+    ) -> PyResult<()> {
+        let i = normalize_index(index, self.items.len())?;
+        let (cells, pins) = encode_text(text, fore, back, graphics)?;
+        self.items[i].cells = cells;
+        self.items[i].pins = pins;
+        Ok(())
+    }
+
+    pub fn set_pos(&mut self, index: isize, pos: (usize, usize)) -> PyResult<()> {
+        let i = normalize_index(index, self.items.len())?;
+        self.items[i].pos = pos;
+        Ok(())
+    }
+
+    pub fn clear(&mut self) {
+        self.items.clear();
+    }
+
+    // python len function
+    pub fn __len__(&self) -> usize {
+        self.items.len()
+    }
+}
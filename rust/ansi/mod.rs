@@ -1,16 +1,23 @@
 use pyo3::prelude::*;
 use bitflags::bitflags;
 
+use std::collections::HashMap;
+use std::sync::{Mutex, OnceLock};
+
 pub mod char;
 pub mod string;
 pub mod drawer;
+pub mod style;
+pub mod buffer;
+pub mod drawlist;
+pub mod compositor;
 
 // Types
 #[pyclass]
-#[derive(Clone, Copy, PartialEq)]
+#[derive(Clone, Copy, PartialEq, Eq, Hash)]
 pub struct AnsiColor(pub u8, pub u8, pub u8);
 
-fn calc_legacy_color(c: u8) -> u8 {
+const fn calc_legacy_color(c: u8) -> u8 {
     /* 
     legacy colors have an estimated range from about 48 to 236, 
     this function translates a single color to legacy base 6
@@ -18,7 +25,64 @@ fn calc_legacy_color(c: u8) -> u8 {
 
     // const K: f32 = 5.0 / 187.0; // constant ratio
     
-    if c >= 48 { ((c - 48) * 5) / 187 } else { 0 }
+    // widened to u16, (c - 48) * 5 does not fit in a u8
+    if c >= 48 { (((c - 48) as u16 * 5) / 187) as u8 } else { 0 }
+}
+
+const fn legacy_lut() -> [u8; 256] {
+    let mut lut = [0; 256];
+    let mut c = 0;
+    while c < 256 {
+        lut[c] = calc_legacy_color(c as u8);
+        c += 1;
+    }
+    lut
+}
+
+// `calc_legacy_color` of every channel value, computed at compile time
+static LEGACY_LUT: [u8; 256] = legacy_lut();
+
+// the default xterm colors of the 16 color palette
+const ANSI16_PALETTE: [(u8, u8, u8); 16] = [
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0),
+    (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+    (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+];
+
+// nearest 16 color palette entries are cached, a ui only uses a handful of colors
+const MAX_CACHED_COLORS: usize = 1024;
+static ANSI16_CACHE: OnceLock<Mutex<HashMap<AnsiColor, u8>>> = OnceLock::new();
+
+fn nearest_ansi16(color: &AnsiColor) -> u8 {
+    let mut cache = ANSI16_CACHE
+        .get_or_init(|| Mutex::new(HashMap::new()))
+        .lock()
+        .unwrap_or_else(|e| e.into_inner());
+    if let Some(idx) = cache.get(color) {
+        return *idx;
+    }
+
+    /*
+    "redmean" distance, a cheap approximation of how different two colors
+    look, red and blue are weighted by how red the colors are
+    */
+    let (r, g, b) = (color.0 as i32, color.1 as i32, color.2 as i32);
+    let mut best = (0, i32::MAX);
+    for (idx, p) in ANSI16_PALETTE.iter().enumerate() {
+        let rmean = (r + p.0 as i32) / 2;
+        let (dr, dg, db) = (r - p.0 as i32, g - p.1 as i32, b - p.2 as i32);
+        let distance = (((512 + rmean) * dr * dr) >> 8) + 4 * dg * dg + (((767 - rmean) * db * db) >> 8);
+        if distance < best.1 {
+            best = (idx as u8, distance);
+        }
+    }
+
+    if cache.len() >= MAX_CACHED_COLORS {
+        cache.clear();
+    }
+    cache.insert(*color, best.0);
+    best.0
 }
 
 impl AnsiColor {
@@ -36,13 +100,23 @@ impl AnsiColor {
 
     fn limited_render(&self, ground: &ColorGround) -> String {
         
-        let r = calc_legacy_color(self.0);
-        let g = calc_legacy_color(self.1);
-        let b = calc_legacy_color(self.2);
+        let r = LEGACY_LUT[self.0 as usize];
+        let g = LEGACY_LUT[self.1 as usize];
+        let b = LEGACY_LUT[self.2 as usize];
         let color_code = r * 36 + g * 6 + b + 16;
 
         format!("\x1b[{};5;{}m", Self::get_ground_code(ground), color_code)
     }
+
+    fn ansi16_render(&self, ground: &ColorGround) -> String {
+        let idx = nearest_ansi16(self);
+        // 30-37 and 90-97 for the fore color, 40-47 and 100-107 for the back color
+        let base = match ground {
+            ColorGround::FORE => if idx < 8 {30} else {90 - 8},
+            ColorGround::BACK => if idx < 8 {40} else {100 - 8},
+        };
+        format!("\x1b[{}m", base + idx as u16)
+    }
 }
 
 #[pymethods]
@@ -55,7 +129,10 @@ impl AnsiColor {
     pub fn to_string(&self, mode: &ColorMode, ground: &ColorGround) -> String {
         match mode {
             ColorMode::TRUECOLOR => self.truecolor_render(ground),
-            ColorMode::LIMITED => self.limited_render(ground)
+            ColorMode::LIMITED => self.limited_render(ground),
+            ColorMode::ANSI16 => self.ansi16_render(ground),
+            // only graphics are shown
+            ColorMode::MONOCHROME => String::new(),
         }
     }
 
@@ -75,7 +152,14 @@ pub enum ColorGround {
 #[derive(Clone, Copy)]
 pub enum ColorMode {
     LIMITED,
-    TRUECOLOR
+    TRUECOLOR,
+    ANSI16,
+    MONOCHROME
+}
+
+impl ColorMode {
+    // every mode, in the order of their values
+    pub const ALL: [ColorMode; 4] = [ColorMode::LIMITED, ColorMode::TRUECOLOR, ColorMode::ANSI16, ColorMode::MONOCHROME];
 }
 
 const ANSIRESET: &str = "\x1b[0m";
@@ -84,7 +168,7 @@ const ANSIRESET: &str = "\x1b[0m";
 
 bitflags! {
     #[pyclass]
-    #[derive(Clone, Copy, PartialEq)]
+    #[derive(Clone, Copy, PartialEq, Eq, Hash, Default)]
     pub struct AnsiGraphics: u8 {
         const BOLD      = 0b00000001;
         const FAINT     = 0b00000010;
@@ -109,6 +193,15 @@ impl AnsiGraphics {
         ("\x1b[8m", "\x1b[28m"), // 6 -> HIDDEN
         ("\x1b[9m", "\x1b[29m"), // 7 -> STRIKE
         ];
+
+    // the same codes as sgr parameters, so they can be combined into one sequence
+    const IDX2SGR: [(&'static str, &'static str); 8] = [
+        ("1", "22"), ("2", "22"), ("3", "23"), ("4", "24"),
+        ("5", "25"), ("7", "27"), ("8", "28"), ("9", "29"),
+        ];
+
+    // BOLD and FAINT are both turned off by "22"
+    pub const INTENSITY: AnsiGraphics = AnsiGraphics::BOLD.union(AnsiGraphics::FAINT);
     
     const NAME2IDX: [(&'static str, u8); 8] = [
         // set    ,    reset  
@@ -124,36 +217,44 @@ impl AnsiGraphics {
 
     #[inline]
     pub fn get_mode(name: &str, reset: bool) -> &'static str {
-        let mut i: usize = 0;
-        let idx = loop {
-            if i < Self::NAME2IDX.len(){
-                let mapping = Self::NAME2IDX[i];
-                if mapping.0 == name.to_uppercase() {
-                    break mapping.1 as i8
-                }
-                i += 1;
-            } else {
-                break -1
+        let idx = match Self::NAME2IDX.iter().find(|mapping| mapping.0.eq_ignore_ascii_case(name)) {
+            Some(mapping) => mapping.1 as usize,
+            None => {
+                print!("Could not find mode with name \"{}\".", name);
+                panic!()
             }
         };
 
-        if idx == -1{
-            print!("Could not find mode with name \"{}\".", name);
-            panic!()
-        }
-
-        let idx: usize = idx as usize;
-
-        let graphic_ansi_codes = match Self::IDX2ANSI.get(idx) {
-            None => {("", "")},
-            Some(t) => {*t}
-        };
+        let graphic_ansi_codes = Self::IDX2ANSI[idx];
 
         match reset {
             false => {graphic_ansi_codes.0},
             true => {graphic_ansi_codes.1}
         }
     }
+
+    // appends the set (or reset) sequence of every flag, flags map to IDX2ANSI by bit index
+    #[inline]
+    pub fn push_to(&self, out: &mut String, reset: bool) {
+        let bits = self.bits();
+        for (i, codes) in Self::IDX2ANSI.iter().enumerate() {
+            if bits & (1 << i) != 0 {
+                out.push_str(if reset {codes.1} else {codes.0});
+            }
+        }
+    }
+
+    // appends the sgr parameter of every flag, each one preceded by ';'
+    #[inline]
+    pub fn push_params(&self, out: &mut String, reset: bool) {
+        let bits = self.bits();
+        for (i, codes) in Self::IDX2SGR.iter().enumerate() {
+            if bits & (1 << i) != 0 {
+                out.push(';');
+                out.push_str(if reset {codes.1} else {codes.0});
+            }
+        }
+    }
 }
 
 #[pymethods]
@@ -172,11 +273,7 @@ impl AnsiGraphics {
 
     pub fn to_string(&self, reset: bool) -> String {
         let mut result = String::new();
-
-        for mode in self.iter_names() {
-            result.push_str(Self::get_mode(mode.0, reset))
-        }
-
+        self.push_to(&mut result, reset);
         result
     }
 
@@ -1,39 +1,275 @@
+use pyo3::ffi;
 use pyo3::prelude::*;
+use pyo3::types::PySlice;
 
 use std::ops::Add;
+use std::os::raw::{c_int, c_long};
 
 use crate::ansi::AnsiGraphics;
 
-use super::{ColorGround, ColorMode, ANSIRESET};
+use super::{ColorMode, ANSIRESET};
+use super::buffer::{check_exports, fill_cell_view, normalize_index, release_cell_view};
 use super::char::AnsiChar;
+use super::style::{styles, Cell, Style, StyleId, StylePins, StyleTable, DEFAULT_STYLE};
 
 #[pyclass]
-#[derive(Clone, PartialEq)]
 pub struct AnsiString {
-    #[pyo3(get, set)]
-    pub vec: Vec<AnsiChar>,
+    // characters with interned styles, see `style::Cell`
+    pub cells: Vec<Cell>,
+    // the style ids of the cells, see `style::StylePins`
+    pub pins: StylePins,
+    // buffer views exported to python, the cells can not be reallocated while there are any
+    exports: usize,
+}
+
+impl Clone for AnsiString {
+    fn clone(&self) -> Self {
+        AnsiString::from_cells(self.cells.clone())
+    }
+}
+
+impl PartialEq for AnsiString {
+    fn eq(&self, other: &Self) -> bool {
+        self.cells == other.cells
+    }
 }
 
 fn min(a: usize, b: usize) -> usize {
     if a > b {b} else {a}
 }
 
+/*
+the style the terminal currently writes with. changing it writes only the
+sgr parameters that differ as one sequence, or a reset and the whole style
+when that is shorter. moving the cursor keeps the style, so a pen is kept
+over a whole frame and reset at its end.
+*/
+pub struct Pen {
+    mode: ColorMode,
+    style: StyleId,
+}
+
+impl Pen {
+    // a pen for a terminal with the default style (after a reset)
+    pub fn new(mode: &ColorMode) -> Pen {
+        Pen {mode: *mode, style: DEFAULT_STYLE}
+    }
+
+    #[inline]
+    pub fn set(&mut self, out: &mut String, id: StyleId, styles: &StyleTable) {
+        if id == self.style {
+            return;
+        }
+        let (old, new) = (styles.get(self.style), styles.get(id));
+        let (old_codes, new_codes) = (styles.codes(self.style, &self.mode), styles.codes(id, &self.mode));
+        self.style = id;
+
+        let start = out.len();
+        out.push_str("\x1b[");
+        let mut removed = old.graphics.difference(new.graphics);
+        let mut added = new.graphics.difference(old.graphics);
+        if removed.intersects(AnsiGraphics::INTENSITY) {
+            // "22" turns off both BOLD and FAINT, the one that stays is set again
+            out.push_str(";22");
+            removed.remove(AnsiGraphics::INTENSITY);
+            added |= new.graphics & AnsiGraphics::INTENSITY;
+        }
+        removed.push_params(out, true);
+        // colors are compared by their codes, close colors can share one in the smaller palettes
+        for (old_code, new_code, default) in [(&old_codes.back, &new_codes.back, "49"), (&old_codes.fore, &new_codes.fore, "39")] {
+            if old_code != new_code {
+                out.push(';');
+                out.push_str(if new_code.is_empty() {default} else {new_code});
+            }
+        }
+        added.push_params(out, false);
+
+        if out.len() == start + 2 {
+            // the styles look the same in this mode
+            out.truncate(start);
+            return;
+        }
+        // every parameter was written with a leading ';'
+        out.remove(start + 2);
+        out.push('m');
+        if out.len() - start > new_codes.reset.len() {
+            out.truncate(start);
+            out.push_str(&new_codes.reset);
+        }
+    }
+
+    /*
+    called before a new line, terminals that erase with the back color would
+    fill a line scrolled in at the bottom with it, so a back color is reset.
+    */
+    #[inline]
+    pub fn end_line(&mut self, out: &mut String, styles: &StyleTable) {
+        if !styles.codes(self.style, &self.mode).back.is_empty() {
+            self.reset(out, styles);
+        }
+    }
+
+    // leaves the terminal with the default style
+    #[inline]
+    pub fn reset(&mut self, out: &mut String, styles: &StyleTable) {
+        if styles.codes(self.style, &self.mode).reset.len() > ANSIRESET.len() {
+            out.push_str(ANSIRESET);
+        }
+        self.style = DEFAULT_STYLE;
+    }
+}
+
+// writes the cells with the pen, styles are only looked up when they change between two cells
+pub fn write_cells(out: &mut String, cells: &[Cell], pen: &mut Pen, styles: &StyleTable) {
+    for cell in cells {
+        pen.set(out, cell.style, styles);
+        out.push(cell.ch);
+    }
+}
+
+/*
+main function for writing cells over cells (`src` over `dst`), with `assign`
+the cells are copied as they are, otherwise the back color of `dst` shows
+through wherever `src` has no back color. the style ids of the written cells
+are added to `pins`, the pins of `dst`.
+*/
+pub fn place_cells(dst: &mut [Cell], src: &[Cell], assign: bool, pins: &mut StylePins, styles: &mut StyleTable) {
+    let n = min(dst.len(), src.len());
+    if assign {
+        dst[..n].copy_from_slice(&src[..n]);
+        pins.pin_cells(&src[..n], styles);
+        return;
+    }
+
+    // neighbouring cells mostly share their styles, remember the last overlay
+    let mut last: Option<(StyleId, StyleId, StyleId)> = None;
+    for i in 0..n {
+        let (top, bottom) = (src[i].style, dst[i].style);
+        let style = match last {
+            Some((t, b, s)) if t == top && b == bottom => s,
+            _ => {
+                let s = styles.overlay(top, bottom);
+                pins.pin(s, styles);
+                last = Some((top, bottom, s));
+                s
+            }
+        };
+        dst[i] = Cell::new(src[i].ch, style);
+    }
+}
+
+// like `place_cells`, for plain characters that share a single style
+pub fn place_chars(dst: &mut [Cell], chars: impl Iterator<Item = char>, style: StyleId, assign: bool, pins: &mut StylePins, styles: &mut StyleTable) {
+    if assign {
+        pins.pin(style, styles);
+    }
+    // bottom style -> overlaid style of the last cell
+    let mut last: Option<(StyleId, StyleId)> = None;
+    for (cell, ch) in dst.iter_mut().zip(chars) {
+        let style = if assign {
+            style
+        } else {
+            match last {
+                Some((bottom, s)) if bottom == cell.style => s,
+                _ => {
+                    let s = styles.overlay(style, cell.style);
+                    pins.pin(s, styles);
+                    last = Some((cell.style, s));
+                    s
+                }
+            }
+        };
+        *cell = Cell::new(ch, style);
+    }
+}
+
+/*
+greedy word wrapping in a single pass, returns the (start, end) span of every
+line. lines break at the last space that fits (the space is dropped) or at a
+new line, words longer than `width` are cut.
+*/
+pub fn wrap_spans(chars: impl Iterator<Item = char>, width: usize) -> Vec<(usize, usize)> {
+    let width = width.max(1);
+    let mut spans = Vec::new();
+    let mut start = 0;
+    let mut last_space: Option<usize> = None;
+    let mut n = 0;
+    for (i, ch) in chars.enumerate() {
+        n = i + 1;
+        if ch == '\n' {
+            spans.push((start, i));
+            start = i + 1;
+            last_space = None;
+            continue;
+        }
+        if i - start == width {
+            // the line is full, `ch` starts the next one
+            if ch == ' ' {
+                spans.push((start, i));
+                start = i + 1;
+                last_space = None;
+                continue;
+            }
+            match last_space {
+                Some(space) => {
+                    spans.push((start, space));
+                    start = space + 1;
+                }
+                None => {
+                    spans.push((start, i));
+                    start = i;
+                }
+            }
+            last_space = None;
+        }
+        if ch == ' ' {
+            last_space = Some(i);
+        }
+    }
+    if start < n || spans.is_empty() {
+        spans.push((start, n));
+    }
+    spans
+}
+
 // non-python methods
 impl AnsiString {
     pub fn len(&self) -> usize {
-        self.vec.len()
+        self.cells.len()
+    }
+
+    pub fn from_cells(cells: Vec<Cell>) -> AnsiString {
+        AnsiString::from_cells_in(cells, &mut styles())
+    }
+
+    // like `from_cells`, with the style table locked by the caller
+    pub fn from_cells_in(cells: Vec<Cell>, styles: &mut StyleTable) -> AnsiString {
+        let pins = StylePins::of_cells(&cells, styles);
+        AnsiString {cells: cells, pins: pins, exports: 0}
+    }
+
+    pub fn from_chars(chars: &[AnsiChar]) -> AnsiString {
+        let mut styles = styles();
+        let cells = chars.iter().map(|ac| styles.intern_char(ac)).collect();
+        AnsiString::from_cells_in(cells, &mut styles)
     }
 
     // non-optimized to_string, each character is rendered individually
     pub fn to_string_noopt(&self, mode: &ColorMode) -> String {
         let mut _string = String::new();
-        for ac in &self.vec.clone() {
+        for ac in self.chars() {
             _string.push_str(ac.to_string(mode).as_str());
             _string.push_str(ANSIRESET);
         }
         _string
     }
 
+    // the cells as `AnsiChar`s, with their styles looked up
+    pub fn chars(&self) -> Vec<AnsiChar> {
+        let styles = styles();
+        self.cells.iter().map(|c| styles.char_of(c)).collect()
+    }
+
     #[inline]
     pub fn new_fore(str: &str, fore: (u8, u8, u8)) -> AnsiString {
         AnsiString::new(str, Some(fore), None)
@@ -56,110 +292,95 @@ impl AnsiString {
     #[new]
     #[inline]
     pub fn new(str: &str, fore: Option<(u8, u8, u8)>, back: Option<(u8, u8, u8)>) -> Self {
-        let mut vec: Vec<AnsiChar> = Vec::with_capacity(str.len());
-    
-        for c in str.chars() {
-            vec.push(AnsiChar::new(c, fore, back));
+        // every character shares the same style, intern it once
+        let mut styles = styles();
+        let style = styles.intern(Style::new(fore, back));
+        Self::from_cells_in(str.chars().map(|c| Cell::new(c, style)).collect(), &mut styles)
+    }
+
+    // copies every character, prefer indexing or the buffer view
+    #[getter(vec)]
+    fn get_vec(&self) -> Vec<AnsiChar> {
+        self.chars()
+    }
+
+    #[setter(vec)]
+    fn set_vec(&mut self, vec: Vec<AnsiChar>) -> PyResult<()> {
+        check_exports(self.exports)?;
+        // the old pins are dropped with `astr`
+        let mut astr = AnsiString::from_chars(&vec);
+        std::mem::swap(&mut self.cells, &mut astr.cells);
+        std::mem::swap(&mut self.pins, &mut astr.pins);
+        Ok(())
+    }
+
+    // python __getitem__ magic function, an index returns an AnsiChar and a slice an AnsiString
+    pub fn __getitem__(&self, py: Python<'_>, index: &Bound<'_, PyAny>) -> PyResult<PyObject> {
+        if let Ok(slice) = index.downcast::<PySlice>() {
+            let indices = slice.indices(self.len() as c_long)?;
+            let cells: Vec<Cell> = if indices.step == 1 {
+                self.cells[indices.start as usize..(indices.start + indices.slicelength) as usize].to_vec()
+            } else {
+                (0..indices.slicelength)
+                    .map(|i| self.cells[(indices.start + i * indices.step) as usize])
+                    .collect()
+            };
+            return Ok(AnsiString::from_cells(cells).into_py(py));
         }
 
-        Self {vec: vec}
+        let i = normalize_index(index.extract::<isize>()?, self.len())?;
+        Ok(styles().char_of(&self.cells[i]).into_py(py))
+    }
+
+    /*
+    read-only, zero-copy buffer of the cells, `memoryview(astr)` has the shape
+    (len, 2) with the codepoint and the style id of each character.
+    */
+    unsafe fn __getbuffer__(slf: Bound<'_, Self>, view: *mut ffi::Py_buffer, flags: c_int) -> PyResult<()> {
+        let mut this = slf.borrow_mut();
+        fill_cell_view(view, flags, &this.cells, &[this.cells.len()], slf.clone().into_any())?;
+        this.exports += 1;
+        Ok(())
+    }
+
+    unsafe fn __releasebuffer__(mut slf: PyRefMut<'_, Self>, view: *mut ffi::Py_buffer) {
+        slf.exports -= 1;
+        release_cell_view(view);
     }
 
     // optimized to_string
     pub fn to_string(&self, mode: &ColorMode) -> String {
-        // add the first character unoptimized
-        let mut _string = self.vec[0].to_string(mode);
-
-        for i in 1..self.vec.len() {
-            // current AnsiChar
-            let cac = &self.vec[i];
-            // current fore color
-            let cfc = &cac.fore_color;
-            // current back color
-            let cbc = &cac.back_color;
-            // current AnsiGraphics
-            let cag = &cac.graphics;
-
-            // previus AnsiChar
-            let pac = &self.vec[i-1];
-            // previus fore color
-            let pfc = &pac.fore_color;
-            // previus back color
-            let pbc = &pac.back_color;
-            // previus AnsiGraphics
-            let pag = &pac.graphics;
-
-            // if color is changed, apply changes
-            if (pbc != cbc) || (pfc != cfc) {
-                // reset ansi
-                _string.push_str(ANSIRESET);
-                /*// reset background
-                _string.push_str(RESET_BACKGROUND);
-                // reset foreground
-                _string.push_str(RESET_FOREGROUND);*/
-                
-                // set background if exists
-                _string.push_str(match cbc {
-                    None => {String::new()},
-                    Some(c ) => {c.to_string(mode, &ColorGround::BACK)},
-                }.as_str());
-
-                // set foreground if exists
-                _string.push_str(match cfc {
-                    None => {String::new()},
-                    Some(c) => {c.to_string(mode, &ColorGround::FORE)},
-                }.as_str());
-
-                // write current AnsiGraphics AGAIN
-                _string.push_str(cag.to_string(false).as_str());
-            } else if pag != cag {
-                // reset previus AnsiGraphics
-                _string.push_str(pag.to_string(true).as_str());
-                // write current AnsiGraphics
-                _string.push_str(cag.to_string(false).as_str());
-
-            }
-            
-            _string.push(cac.char);
-        }
-        // append reset token and return
-        _string + "\x1b[0m"
+        let mut _string = String::with_capacity(self.cells.len() * 2);
+        let styles = styles();
+        let mut pen = Pen::new(mode);
+        write_cells(&mut _string, &self.cells, &mut pen, &styles);
+        pen.reset(&mut _string, &styles);
+        _string
     }
 
     pub fn split_at(&self, mid: usize) -> (AnsiString, AnsiString){
-        let vecs = self.vec.split_at(mid);
+        let cells = self.cells.split_at(mid);
         (
-            Self {vec: vecs.0.to_vec()},
-            Self {vec: vecs.1.to_vec()}
+            Self::from_cells(cells.0.to_vec()),
+            Self::from_cells(cells.1.to_vec())
         )
     }
 
+    // (start, end) of every line when wrapped at `width` characters, see `wrap_spans`
+    pub fn wrap(&self, width: usize) -> Vec<(usize, usize)> {
+        wrap_spans(self.cells.iter().map(|c| c.ch), width)
+    }
+
     pub fn cut_at(&self, end: usize) -> AnsiString{
-        let vecs = self.vec.split_at(end);
-        Self {vec: vecs.0.to_vec()}
+        Self::from_cells(self.cells[..end].to_vec())
     }
 
     // main function for writing text
     pub fn place(&mut self, text: &AnsiString, pos: usize, assign: bool) {
         assert!(pos < self.len());
-        // starting index
-        let si = pos;
-        // endiing index
-        let ei = min(pos + text.len(), self.vec.len());
-
-        for i in si..ei {
-            let ac = &text.vec[i - si];
-            if assign {
-                self.vec[i] = ac.clone();
-            } else {
-                self.vec[i] = AnsiChar {
-                    char: ac.char,
-                    fore_color: ac.fore_color,
-                    back_color: if ac.back_color == None {self.vec[i].back_color} else {ac.back_color},
-                    graphics: ac.graphics.clone(),
-                }
-            }
-        }
+        let mut styles = styles();
+        place_cells(&mut self.cells[pos..], &text.cells, assign, &mut self.pins, &mut styles);
+        self.pins.trim(&self.cells, &mut styles);
     }
 
     pub fn place_str(&mut self, str: &str, pos: usize) {
@@ -168,7 +389,7 @@ impl AnsiString {
 
         let astr = AnsiString::new_colorless(str);
         self.place(&astr, pos, false);
-        
+
     }
 
     pub fn center_place(&mut self, astr: &AnsiString, assign: bool) {
@@ -189,17 +410,30 @@ impl AnsiString {
     }
 
     pub fn add_graphics(&mut self, agm: AnsiGraphics) {
-        for ac in &mut self.vec {
-            ac.graphics = ac.graphics | agm;
+        let mut styles = styles();
+        let mut last: Option<(StyleId, StyleId)> = None;
+        for cell in &mut self.cells {
+            let style = match last {
+                Some((from, to)) if from == cell.style => to,
+                _ => {
+                    let to = styles.add_graphics(cell.style, agm);
+                    self.pins.pin(to, &mut styles);
+                    last = Some((cell.style, to));
+                    to
+                }
+            };
+            cell.style = style;
         }
+        self.pins.trim(&self.cells, &mut styles);
     }
 
     // python operation add
     pub fn __add__(&mut self, other: &Self) -> Self {
-        let mut r = self.clone();
-        r.vec.append(&mut other.vec.clone());
+        let mut cells = Vec::with_capacity(self.len() + other.len());
+        cells.extend_from_slice(&self.cells);
+        cells.extend_from_slice(&other.cells);
 
-        r
+        Self::from_cells(cells)
     }
 
     // python len function
@@ -222,10 +456,10 @@ impl Add for AnsiString {
     type Output = Self;
 
     fn add(self, other: Self) -> Self::Output {
-        let mut new_vec: Vec<AnsiChar> = Vec::with_capacity(self.vec.len() + other.vec.len());
-        new_vec.append(&mut self.vec.clone());
-        new_vec.append(&mut other.vec.clone());
+        let mut new_cells: Vec<Cell> = Vec::with_capacity(self.cells.len() + other.cells.len());
+        new_cells.extend_from_slice(&self.cells);
+        new_cells.extend_from_slice(&other.cells);
 
-        AnsiString { vec: new_vec }
+        AnsiString::from_cells(new_cells)
     }
-}
\ No newline at end of file
+}
@@ -0,0 +1,478 @@
+use std::collections::HashMap;
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::{Mutex, MutexGuard, OnceLock};
+
+use super::{AnsiColor, AnsiGraphics, ColorGround, ColorMode};
+use super::char::AnsiChar;
+
+// number of `ColorMode` variants, each style is encoded once per mode
+pub const N_MODES: usize = ColorMode::ALL.len();
+
+// derived style caches are dropped when they grow past this many entries
+const MAX_DERIVED_STYLES: usize = 4096;
+
+// the unused styles are removed once the table holds this many, see `StyleTable::collect`
+const MAX_STYLES: usize = 16384;
+
+pub type StyleId = u32;
+
+// the style without colors and graphics, always interned first
+pub const DEFAULT_STYLE: StyleId = 0;
+
+#[derive(Clone, Copy, PartialEq, Eq, Hash, Default)]
+pub struct Style {
+    pub fore: Option<AnsiColor>,
+    pub back: Option<AnsiColor>,
+    pub graphics: AnsiGraphics,
+}
+
+impl Style {
+    #[inline]
+    pub fn of(ac: &AnsiChar) -> Style {
+        Style {
+            fore: ac.fore_color,
+            back: ac.back_color,
+            graphics: ac.graphics,
+        }
+    }
+
+    #[inline]
+    pub fn new(fore: Option<(u8, u8, u8)>, back: Option<(u8, u8, u8)>) -> Style {
+        Style {
+            fore: fore.map(|c| AnsiColor(c.0, c.1, c.2)),
+            back: back.map(|c| AnsiColor(c.0, c.1, c.2)),
+            graphics: AnsiGraphics::empty(),
+        }
+    }
+
+    #[inline]
+    pub fn with_graphics(fore: Option<(u8, u8, u8)>, back: Option<(u8, u8, u8)>, graphics: Option<AnsiGraphics>) -> Style {
+        Style {
+            graphics: graphics.unwrap_or(AnsiGraphics::empty()),
+            ..Style::new(fore, back)
+        }
+    }
+
+    // sgr parameters of this style in one color mode, see `StyleCodes`
+    fn encode(&self, mode: &ColorMode) -> StyleCodes {
+        // "\x1b[...m" -> "..."
+        let params = |color: &Option<AnsiColor>, ground: &ColorGround| -> Box<str> {
+            match color {
+                Some(color) => {
+                    let seq = color.to_string(mode, ground);
+                    seq.trim_start_matches("\x1b[").trim_end_matches('m').into()
+                },
+                None => "".into()
+            }
+        };
+        let back = params(&self.back, &ColorGround::BACK);
+        let fore = params(&self.fore, &ColorGround::FORE);
+
+        let mut reset = String::from("\x1b[0");
+        for code in [&back, &fore] {
+            if !code.is_empty() {
+                reset.push(';');
+                reset.push_str(code);
+            }
+        }
+        self.graphics.push_params(&mut reset, false);
+        reset.push('m');
+
+        StyleCodes {fore: fore, back: back, reset: reset.into_boxed_str()}
+    }
+}
+
+// `c` darkened to `percent`%
+#[inline]
+fn scale(c: AnsiColor, percent: u8) -> AnsiColor {
+    let f = |v: u8| (v as u16 * percent as u16 / 100) as u8;
+    AnsiColor(f(c.0), f(c.1), f(c.2))
+}
+
+// `c` mixed with `to`, `amount` out of 255
+#[inline]
+fn mix(c: AnsiColor, to: AnsiColor, amount: u8) -> AnsiColor {
+    let (a, b) = (amount as u16, 255 - amount as u16);
+    let f = |v: u8, t: u8| ((v as u16 * b + t as u16 * a) / 255) as u8;
+    AnsiColor(f(c.0, to.0), f(c.1, to.1), f(c.2, to.2))
+}
+
+/*
+a change of the colors of a style, applied to the style ids of whole layers
+by the compositor. the derived styles are cached by the style table, so a
+transform costs a lookup per style change instead of color math per cell.
+*/
+#[derive(Clone, Copy, PartialEq, Eq, Hash)]
+pub enum Transform {
+    // the back color darkened to `percent`%, used for focus borders
+    Shade(u8),
+    // fore and back color mixed with a color, `amount` out of 255
+    Tint(AnsiColor, u8),
+    // both colors darkened to 60% and FAINT, for what is behind a popup
+    Dim,
+}
+
+impl Transform {
+    pub fn apply(&self, style: &Style) -> Style {
+        match *self {
+            Transform::Shade(percent) => Style {back: style.back.map(|c| scale(c, percent)), ..*style},
+            Transform::Tint(color, amount) => Style {
+                fore: style.fore.map(|c| mix(c, color, amount)),
+                back: style.back.map(|c| mix(c, color, amount)),
+                ..*style
+            },
+            Transform::Dim => Style {
+                fore: style.fore.map(|c| scale(c, 60)),
+                back: style.back.map(|c| scale(c, 60)),
+                graphics: style.graphics | AnsiGraphics::FAINT,
+            },
+        }
+    }
+}
+
+/*
+the sgr parameters of a style in one color mode, empty if the color is not
+set (or not shown in the mode). the pen of an encoder changes its style with
+only the parameters that differ, see `string::Pen`.
+*/
+pub struct StyleCodes {
+    // e.g. "38;2;250;250;250"
+    pub fore: Box<str>,
+    // e.g. "48;5;17"
+    pub back: Box<str>,
+    // resets the terminal and sets the whole style in one sequence, "\x1b[0;...m"
+    pub reset: Box<str>,
+}
+
+// a single character of a plane, 8 bytes, the style is an id of the style table
+#[repr(C)]
+#[derive(Clone, Copy, PartialEq, Eq)]
+pub struct Cell {
+    pub ch: char,
+    pub style: StyleId,
+}
+
+impl Cell {
+    #[inline]
+    pub const fn new(ch: char, style: StyleId) -> Cell {
+        Cell {ch: ch, style: style}
+    }
+}
+
+struct StyleEntry {
+    style: Style,
+    // pre-encoded sgr parameters, indexed by `ColorMode`
+    codes: [StyleCodes; N_MODES],
+    // number of `StylePins` that hold the style
+    refs: u32,
+    // generation of the table the id was last handed out in
+    last: u64,
+    // removed, the slot is reused by the next new style
+    free: bool,
+}
+
+/*
+maps every (fore, back, graphics) combination to a small id and keeps its
+escape sequences for every color mode, so rendering only has to look them up.
+
+every container of cells pins the ids it holds (see `StylePins`), once the
+table grows past `limit` the styles no container holds are removed and their
+ids reused. the ids handed out since the last collection are kept by the
+next one, so an id can still be pinned after the table was unlocked.
+*/
+pub struct StyleTable {
+    ids: HashMap<Style, StyleId>,
+    entries: Vec<StyleEntry>,
+    // ids of removed entries
+    free: Vec<StyleId>,
+    // counts the collections
+    generation: u64,
+    // number of styles that starts the next collection
+    limit: usize,
+    // (top, bottom) -> style of top placed over bottom
+    overlays: HashMap<(StyleId, StyleId), StyleId>,
+    // (style, transform) -> transformed style
+    transforms: HashMap<(StyleId, Transform), StyleId>,
+}
+
+impl StyleTable {
+    fn new() -> StyleTable {
+        let mut table = StyleTable {
+            ids: HashMap::new(),
+            entries: Vec::new(),
+            free: Vec::new(),
+            generation: 0,
+            limit: MAX_STYLES,
+            overlays: HashMap::new(),
+            transforms: HashMap::new(),
+        };
+        table.intern(Style::default());
+        table
+    }
+
+    pub fn intern(&mut self, style: Style) -> StyleId {
+        if let Some(id) = self.ids.get(&style) {
+            self.entries[*id as usize].last = self.generation;
+            return *id;
+        }
+        let entry = StyleEntry {
+            style: style,
+            codes: ColorMode::ALL.map(|mode| style.encode(&mode)),
+            refs: 0,
+            last: self.generation,
+            free: false,
+        };
+        let id = match self.free.pop() {
+            Some(id) => {
+                self.entries[id as usize] = entry;
+                id
+            },
+            None => {
+                self.entries.push(entry);
+                (self.entries.len() - 1) as StyleId
+            }
+        };
+        self.ids.insert(style, id);
+        id
+    }
+
+    // number of styles in the table
+    #[inline]
+    pub fn len(&self) -> usize {
+        self.entries.len() - self.free.len()
+    }
+
+    /*
+    removes the styles that are not pinned and were not handed out since the
+    last collection. the derived style caches are dropped, they may hold the
+    removed ids.
+    */
+    pub fn collect(&mut self) {
+        for (id, entry) in self.entries.iter_mut().enumerate().skip(DEFAULT_STYLE as usize + 1) {
+            if entry.free || entry.refs > 0 || entry.last == self.generation {
+                continue;
+            }
+            entry.free = true;
+            self.ids.remove(&entry.style);
+            self.free.push(id as StyleId);
+        }
+        self.overlays.clear();
+        self.transforms.clear();
+        self.generation += 1;
+        // the styles in use do not start a collection every time
+        self.limit = MAX_STYLES.max(self.len() * 2);
+    }
+
+    #[inline]
+    fn release(&mut self, id: StyleId) {
+        self.entries[id as usize].refs -= 1;
+    }
+
+    #[inline]
+    pub fn intern_char(&mut self, ac: &AnsiChar) -> Cell {
+        Cell::new(ac.char, self.intern(Style::of(ac)))
+    }
+
+    #[inline]
+    pub fn get(&self, id: StyleId) -> &Style {
+        &self.entries[id as usize].style
+    }
+
+    #[inline]
+    pub fn codes(&self, id: StyleId, mode: &ColorMode) -> &StyleCodes {
+        &self.entries[id as usize].codes[*mode as usize]
+    }
+
+    #[inline]
+    pub fn char_of(&self, cell: &Cell) -> AnsiChar {
+        let style = self.get(cell.style);
+        AnsiChar {
+            char: cell.ch,
+            fore_color: style.fore,
+            back_color: style.back,
+            graphics: style.graphics,
+        }
+    }
+
+    // style of `top` placed over `bottom`, the back color of `bottom` shows through if `top` has none
+    #[inline]
+    pub fn overlay(&mut self, top: StyleId, bottom: StyleId) -> StyleId {
+        if self.get(top).back.is_some() {
+            return top;
+        }
+        if let Some(id) = self.overlays.get(&(top, bottom)) {
+            return *id;
+        }
+        let style = Style {back: self.get(bottom).back, ..*self.get(top)};
+        let id = self.intern(style);
+        if self.overlays.len() >= MAX_DERIVED_STYLES {
+            self.overlays.clear();
+        }
+        self.overlays.insert((top, bottom), id);
+        id
+    }
+
+    // the style with `transform` applied, cached
+    pub fn transform(&mut self, id: StyleId, transform: &Transform) -> StyleId {
+        if let Some(transformed) = self.transforms.get(&(id, *transform)) {
+            return *transformed;
+        }
+        let style = transform.apply(self.get(id));
+        let transformed = self.intern(style);
+        if self.transforms.len() >= MAX_DERIVED_STYLES {
+            self.transforms.clear();
+        }
+        self.transforms.insert((id, *transform), transformed);
+        transformed
+    }
+
+    // the same style with the back color darkened to 90%, used for focus borders
+    #[inline]
+    pub fn shade(&mut self, id: StyleId) -> StyleId {
+        self.transform(id, &Transform::Shade(90))
+    }
+
+    #[inline]
+    pub fn add_graphics(&mut self, id: StyleId, agm: AnsiGraphics) -> StyleId {
+        let style = *self.get(id);
+        if style.graphics.contains(agm) {
+            return id;
+        }
+        self.intern(Style {graphics: style.graphics | agm, ..style})
+    }
+}
+
+/*
+the set of style ids a container of cells holds, each one is counted by the
+style table while it is in the set. writes add the ids of the written cells,
+so the set can hold ids the cells no longer have, `trim` scans the cells
+again once it has grown.
+
+dropping a set does not lock the table (it may be locked by the dropping
+thread), its ids are released the next time the table is locked.
+*/
+#[derive(Default)]
+pub struct StylePins {
+    // sorted
+    ids: Vec<StyleId>,
+    // number of ids after the last scan of the cells, see `trim`
+    scanned: usize,
+}
+
+impl StylePins {
+    pub fn new() -> StylePins {
+        StylePins::default()
+    }
+
+    pub fn of_cells(cells: &[Cell], styles: &mut StyleTable) -> StylePins {
+        let mut pins = StylePins::new();
+        pins.pin_cells(cells, styles);
+        pins.scanned = pins.ids.len();
+        pins
+    }
+
+    #[inline]
+    pub fn len(&self) -> usize {
+        self.ids.len()
+    }
+
+    #[inline]
+    pub fn pin(&mut self, id: StyleId, styles: &mut StyleTable) {
+        if let Err(i) = self.ids.binary_search(&id) {
+            self.ids.insert(i, id);
+            styles.entries[id as usize].refs += 1;
+        }
+    }
+
+    // neighbouring cells mostly share their styles, only a change is looked up
+    pub fn pin_cells(&mut self, cells: &[Cell], styles: &mut StyleTable) {
+        let mut last: Option<StyleId> = None;
+        for cell in cells {
+            if last != Some(cell.style) {
+                self.pin(cell.style, styles);
+                last = Some(cell.style);
+            }
+        }
+    }
+
+    pub fn pin_all(&mut self, other: &StylePins, styles: &mut StyleTable) {
+        for id in &other.ids {
+            self.pin(*id, styles);
+        }
+    }
+
+    // the size of the last scan is kept, cleared cells are mostly written again
+    pub fn clear(&mut self, styles: &mut StyleTable) {
+        for id in self.ids.drain(..) {
+            styles.release(id);
+        }
+    }
+
+    // the pins of `other`, e.g. after copying all of its cells
+    pub fn assign(&mut self, other: &StylePins, styles: &mut StyleTable) {
+        // pinned before the old ids are released, the ids in both sets stay counted
+        let old = std::mem::replace(&mut self.ids, other.ids.clone());
+        for id in &self.ids {
+            styles.entries[*id as usize].refs += 1;
+        }
+        for id in old {
+            styles.release(id);
+        }
+        self.scanned = other.scanned;
+    }
+
+    // scans `cells` again if the set has grown to twice its size since the last scan
+    pub fn trim(&mut self, cells: &[Cell], styles: &mut StyleTable) {
+        if self.ids.len() <= 2 * self.scanned + 16 {
+            return;
+        }
+        let old = std::mem::take(&mut self.ids);
+        self.pin_cells(cells, styles);
+        self.scanned = self.ids.len();
+        for id in old {
+            styles.release(id);
+        }
+    }
+}
+
+impl Drop for StylePins {
+    fn drop(&mut self) {
+        if self.ids.is_empty() {
+            return;
+        }
+        released().lock().unwrap_or_else(|e| e.into_inner()).extend_from_slice(&self.ids);
+        RELEASED_PENDING.store(true, Ordering::Release);
+    }
+}
+
+static STYLES: OnceLock<Mutex<StyleTable>> = OnceLock::new();
+
+// ids of dropped `StylePins`, released when the table is locked
+static RELEASED: OnceLock<Mutex<Vec<StyleId>>> = OnceLock::new();
+static RELEASED_PENDING: AtomicBool = AtomicBool::new(false);
+
+fn released() -> &'static Mutex<Vec<StyleId>> {
+    RELEASED.get_or_init(|| Mutex::new(Vec::new()))
+}
+
+/*
+locks the shared style table, hold the guard for a whole render instead of
+per character. the unused styles are removed here, never while a caller
+holds the table.
+*/
+pub fn styles() -> MutexGuard<'static, StyleTable> {
+    let mut table = STYLES
+        .get_or_init(|| Mutex::new(StyleTable::new()))
+        .lock()
+        .unwrap_or_else(|e| e.into_inner());
+    if RELEASED_PENDING.swap(false, Ordering::Acquire) {
+        let ids = std::mem::take(&mut *released().lock().unwrap_or_else(|e| e.into_inner()));
+        for id in ids {
+            table.release(id);
+        }
+    }
+    if table.len() >= table.limit {
+        table.collect();
+    }
+    table
+}
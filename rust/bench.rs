@@ -0,0 +1,175 @@
+use std::hint::black_box;
+use std::time::{Duration, Instant};
+
+use crate::ansi::{AnsiGraphics, ColorMode};
+use crate::ansi::compositor::{Compositor, StyleTransform};
+use crate::ansi::drawer::Drawer;
+use crate::ansi::string::AnsiString;
+
+const TEXT: &str = "The quick brown fox jumps over the lazy dog, 0123456789 ...";
+
+// a 60 character line that changes its style every few characters
+fn styled_line() -> AnsiString {
+    let mut line = AnsiString::new_colorless("");
+    for (i, word) in TEXT.split_inclusive(' ').enumerate() {
+        let c = (i * 40 % 256) as u8;
+        let mut part = AnsiString::new(word, Some((c, 255 - c, 120)), if i % 3 == 0 {Some((30, 30, c))} else {None});
+        if i % 4 == 1 {
+            part.add_graphics(AnsiGraphics::BOLD);
+        }
+        line = line + part;
+    }
+    line
+}
+
+// a widget sized drawer with a few lines of styled text
+fn widget(size: (usize, usize)) -> Drawer {
+    let mut drawer = Drawer::new(size, Some((90, 90, 250)));
+    let line = styled_line();
+    for y in 0..size.0 {
+        drawer.place(&line, (y, 1), false);
+    }
+    drawer
+}
+
+// a full dialog frame, every widget placed on the plane
+fn frame(size: (usize, usize)) -> Drawer {
+    let mut drawer = Drawer::new(size, Some((90, 90, 250)));
+    let w = widget((3, size.1 - 2));
+    for y in (0..size.0.saturating_sub(3)).step_by(3) {
+        drawer.place_drawer(&w, (y, 1), y == 0);
+    }
+    drawer
+}
+
+/*
+every benchmark of the native drawer as a factory, which builds its fixture
+and returns the closure running one iteration, so only the selected
+benchmarks build theirs. names are stable, they are compared between releases.
+*/
+type Bench = Box<dyn FnMut()>;
+
+fn bench(f: impl FnMut() + 'static) -> Bench {
+    Box::new(f)
+}
+
+fn benchmarks() -> Vec<(&'static str, fn() -> Bench)> {
+    vec![
+        ("astring_new", || bench(|| {
+            black_box(AnsiString::new(black_box(TEXT), Some((0, 255, 0)), Some((20, 20, 20))));
+        })),
+        ("astring_add", || {
+            let (line, plain) = (styled_line(), AnsiString::new_fore(TEXT, (0, 255, 0)));
+            bench(move || {
+                black_box(line.clone() + plain.clone());
+            })
+        }),
+        ("astring_split_at", || {
+            let line = styled_line();
+            bench(move || {
+                black_box(line.split_at(black_box(30)));
+            })
+        }),
+        ("astring_place", || {
+            let line = styled_line();
+            let mut target = AnsiString::new_back(&" ".repeat(120), (90, 90, 250));
+            bench(move || {
+                target.place(&line, black_box(10), false);
+            })
+        }),
+        ("astring_place_assign", || {
+            let line = styled_line();
+            let mut target = AnsiString::new_colorless(&" ".repeat(120));
+            bench(move || {
+                target.place(&line, black_box(10), true);
+            })
+        }),
+        ("place_drawer", || {
+            let small = widget((6, 58));
+            let mut plane = Drawer::new((20, 80), Some((90, 90, 250)));
+            bench(move || {
+                plane.place_drawer(&small, (2, 4), false);
+            })
+        }),
+        ("place_drawer_border", || {
+            let small = widget((6, 58));
+            let mut plane = Drawer::new((20, 80), Some((90, 90, 250)));
+            bench(move || {
+                plane.place_drawer(&small, (2, 4), true);
+            })
+        }),
+        ("to_string_limited", || {
+            let line = styled_line();
+            bench(move || {
+                black_box(line.to_string(&ColorMode::LIMITED));
+            })
+        }),
+        ("to_string_truecolor", || {
+            let line = styled_line();
+            bench(move || {
+                black_box(line.to_string(&ColorMode::TRUECOLOR));
+            })
+        }),
+        ("frame_render_limited", || {
+            let big = frame((40, 120));
+            bench(move || {
+                black_box(big.render(&ColorMode::LIMITED));
+            })
+        }),
+        ("frame_render_truecolor", || {
+            let big = frame((40, 120));
+            bench(move || {
+                black_box(big.render(&ColorMode::TRUECOLOR));
+            })
+        }),
+        ("frame_render_ansi16", || {
+            let big = frame((40, 120));
+            bench(move || {
+                black_box(big.render(&ColorMode::ANSI16));
+            })
+        }),
+        ("frame_build_40x120", || bench(|| {
+            black_box(frame((40, 120)));
+        })),
+        ("compose_focus_change", || {
+            // the focus moves to the next of 12 widget layers every iteration
+            let widgets: Vec<Drawer> = (0..12).map(|_| widget((3, 118))).collect();
+            let mut target = Drawer::new((40, 120), Some((90, 90, 250)));
+            let mut compositor = Compositor::new(Some((90, 90, 250)));
+            let mut active = 0;
+            bench(move || {
+                for (i, w) in widgets.iter().enumerate() {
+                    let transform = if i == active {Some(StyleTransform::shade(90))} else {None};
+                    compositor.set_layer(i as u64, w, (i * 3, 1), 0, transform, None);
+                }
+                compositor.compose(&mut target);
+                active = (active + 1) % widgets.len();
+            })
+        }),
+    ]
+}
+
+fn time(iterations: u32, f: &mut dyn FnMut()) -> Duration {
+    // one untimed run, so first-use costs (style interning) are not measured
+    f();
+    let now = Instant::now();
+    for _ in 0..iterations {
+        f();
+    }
+    now.elapsed()
+}
+
+// (name, seconds per iteration) of every benchmark whose name contains `filter`
+pub fn run(filter: Option<&str>, iterations: u32) -> Vec<(String, f64)> {
+    let iterations = iterations.max(1);
+    benchmarks()
+        .into_iter()
+        .filter(|(name, _)| filter.map_or(true, |f| name.contains(f)))
+        .map(|(name, factory)| {
+            // the fixture is built outside of the timed runs
+            let mut f = factory();
+            let elapsed = time(iterations, &mut *f);
+            (name.to_string(), elapsed.as_secs_f64() / iterations as f64)
+        })
+        .collect()
+}
@@ -4,8 +4,11 @@ use ansi::char::AnsiChar;
 use pyo3::prelude::*;
 
 mod ansi;
+mod bench;
 use ansi::{AnsiColor, AnsiGraphics, ColorGround, ColorMode};
 use ansi::drawer::Drawer;
+use ansi::compositor::{Compositor, StyleTransform};
+use ansi::drawlist::DrawList;
 use ansi::string::AnsiString;
 
 #[pyfunction]
@@ -35,6 +38,14 @@ fn test_render_100k() -> Duration{
 }
 
 
+// runs the native benchmarks, returns {name: seconds per iteration}
+#[pyfunction]
+#[pyo3(signature = (filter=None, iterations=10000))]
+fn run_benchmarks(py: Python<'_>, filter: Option<&str>, iterations: u32) -> Vec<(String, f64)> {
+    py.allow_threads(|| bench::run(filter, iterations))
+}
+
+
 /// A Python module implemented in Rust. The name of this function must match
 /// the `lib.name` setting in the `Cargo.toml`, else Python will not be able to
 /// import the module.
@@ -43,6 +54,7 @@ fn _drawer(m: &Bound<'_, PyModule>) -> PyResult<()> {
 
     m.add_function(wrap_pyfunction!(test_render, m)?)?;
     m.add_function(wrap_pyfunction!(test_render_100k, m)?)?;
+    m.add_function(wrap_pyfunction!(run_benchmarks, m)?)?;
 
     let color_module = PyModule::new_bound(m.py(), "color")?;
     color_module.add_class::<ColorMode>()?;
@@ -55,6 +67,9 @@ fn _drawer(m: &Bound<'_, PyModule>) -> PyResult<()> {
     ansi_module.add_class::<AnsiString>()?;
 
     m.add_class::<Drawer>()?;
+    m.add_class::<DrawList>()?;
+    m.add_class::<Compositor>()?;
+    m.add_class::<StyleTransform>()?;
     m.add_submodule(&ansi_module).expect("Error on add_submodule! (ansi)");
     m.add_submodule(&color_module).expect("Error on add_submodule! (color)");
 
@@ -0,0 +1,105 @@
+import pytest
+
+from pybud.drawer import Drawer
+from pybud.drawer.ansi import AnsiChar, AnsiString
+from pybud.drawer.color import ColorMode
+
+
+def test_drawer_view_layout():
+    d = Drawer((3, 5), (10, 20, 30))
+    d.place(AnsiString("ab", (255, 0, 0), None), (1, 2), True)
+    with memoryview(d) as view:
+        assert view.readonly
+        assert view.format == "I"
+        assert view.itemsize == 4
+        assert view.ndim == 3
+        assert view.shape == (3, 5, 2)
+        assert view.strides == (5 * 8, 8, 4)
+        assert view.nbytes == 3 * 5 * 8
+        assert view[1, 2, 0] == ord("a")
+        assert view[1, 3, 0] == ord("b")
+        assert view[0, 0, 0] == ord(" ")
+        # the plane shares one style, the placed text has another
+        assert view[0, 0, 1] == view[2, 4, 1]
+        assert view[1, 2, 1] == view[1, 3, 1] != view[0, 0, 1]
+
+
+def test_ansistring_view_layout():
+    astr = AnsiString("héllo", (1, 2, 3), None)
+    with memoryview(astr) as view:
+        assert view.readonly
+        assert view.format == "I"
+        assert view.shape == (5, 2)
+        assert view.strides == (8, 4)
+        assert [view[i, 0] for i in range(5)] == list(map(ord, "héllo"))
+        assert len({view[i, 1] for i in range(5)}) == 1
+
+
+def test_view_is_read_only():
+    d = Drawer((2, 2), None)
+    with memoryview(d) as view:
+        with pytest.raises(TypeError):
+            view[0, 0, 0] = ord("x")
+
+
+def test_drawer_resize_while_exported():
+    d = Drawer((2, 3), None)
+    row = AnsiString("xyz", None, None)
+    view = memoryview(d)
+    with pytest.raises(BufferError):
+        d.plane = [row, row, row]
+    assert d.size == (2, 3)
+    view.release()
+    d.plane = [row, row, row]
+    assert d.size == (3, 3)
+
+
+def test_ansistring_resize_while_exported():
+    astr = AnsiString("abc", None, None)
+    view = memoryview(astr)
+    with pytest.raises(BufferError):
+        astr.vec = [AnsiChar("x", None, None)]
+    assert len(astr) == 3
+    view.release()
+    astr.vec = [AnsiChar("x", None, None)]
+    assert astr[0].char == "x"
+    assert len(astr) == 1
+
+
+def test_drawer_negative_index():
+    d = Drawer((2, 3), None)
+    d.place(AnsiString("xyz", None, None), (1, 0), True)
+    assert d[-1, -1].char == "z"
+    assert d[-2, 0].char == " "
+    assert d[1, -3].char == "x"
+    assert len(d[-1]) == 3
+
+
+def test_drawer_index_out_of_range():
+    d = Drawer((2, 3), None)
+    for index in [2, -3, (2, 0), (0, 3), (-3, 0), (0, -4)]:
+        with pytest.raises(IndexError):
+            d[index]
+
+
+def test_ansistring_index():
+    astr = AnsiString("abc", None, None)
+    assert astr[-1].char == "c"
+    assert astr[-3].char == "a"
+    for i in [3, -4]:
+        with pytest.raises(IndexError):
+            astr[i]
+    # slices are clamped like python sequences
+    assert len(astr[1:10]) == 2
+    assert len(astr[-10:-1]) == 2
+    assert [astr[::-1][i].char for i in range(3)] == ["c", "b", "a"]
+
+
+def test_drawer_plane_is_checked():
+    d = Drawer((2, 3), None)
+    with pytest.raises(ValueError):
+        d.plane = [AnsiString("abc", None, None), AnsiString("ab", None, None)]
+    with pytest.raises(ValueError):
+        d.plane = []
+    assert d.size == (2, 3)
+    d.render(ColorMode.TRUECOLOR)
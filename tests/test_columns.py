@@ -0,0 +1,67 @@
+from array import array
+
+import pytest
+
+from pybud.gui.columns import Columns
+
+
+class ArgsortList(list):
+    # stands in for a numpy column, the path of columns that sort themselves
+    def argsort(self, kind = None):
+        assert kind == "stable"
+        return Indices(sorted(range(len(self)), key = self.__getitem__))
+
+    def __getitem__(self, i):
+        value = super().__getitem__(i)
+        return ArgsortList(value) if isinstance(i, slice) else value
+
+
+class Indices(list):
+    # the numpy operations `Columns.order` uses on an index array
+    def __rsub__(self, n):
+        return Indices(n - i for i in self)
+
+    def __getitem__(self, i):
+        value = super().__getitem__(i)
+        return Indices(value) if isinstance(i, slice) else value
+
+
+VALUES = [3, 1, 2, 1, 3, 2, 1]
+
+
+def expected(values, descending: bool):
+    # stable in both directions, equal values keep the order of their rows
+    return sorted(range(len(values)), key = lambda i: -values[i] if descending else values[i])
+
+
+@pytest.mark.parametrize("values", [VALUES, array("i", VALUES), ArgsortList(VALUES)])
+@pytest.mark.parametrize("descending", [False, True])
+def test_stable_order(values, descending):
+    columns = Columns({"value": values})
+    assert list(columns.rows(0, descending)) == expected(VALUES, descending)
+    assert list(map(int, columns.order(0, descending))) == expected(VALUES, descending)
+
+
+def test_orders_are_cached():
+    columns = Columns({"a": [2, 1, 2], "b": ["x", "z", "y"]})
+    assert columns.order(0) is columns.order(0)
+    assert columns.order(0, True) is columns.order(0, True)
+    assert list(columns.rows(columns.index("b"))) == [0, 2, 1]
+    assert list(columns.rows(0, descending = True)) == [0, 2, 1]
+
+
+def test_rows():
+    columns = Columns({"a": [5, 4, 6]})
+    assert columns.rows() == range(3)
+    rows = columns.rows(0)
+    assert len(rows) == 3
+    assert rows[-1] == 2
+    with pytest.raises(IndexError):
+        rows[3]
+    with pytest.raises(IndexError):
+        rows[-4]
+
+
+def test_columns_of_different_lengths():
+    with pytest.raises(AssertionError):
+        Columns({"a": [1, 2], "b": [1]})
@@ -0,0 +1,125 @@
+import random
+
+from pybud.drawer import Compositor, Drawer, StyleTransform
+from pybud.drawer.ansi import AnsiString
+from pybud.drawer.color import ColorMode
+
+PLANE = (20, 20, 20)
+SIZE = (12, 30)
+TRANSFORMS = [None, StyleTransform.shade(), StyleTransform.dim(), StyleTransform.tint((255, 0, 0), 0.5)]
+
+
+def widget(i: int):
+    d = Drawer((2 + i % 3, 6 + 2 * i), None if i % 3 == 0 else (i * 40, 90, 250))
+    for y in range(d.size[0]):
+        d.place(AnsiString(f"w{i}" * 10, (i * 50 % 256, 200, 10), None), (y, y % 2), False)
+    return d
+
+
+def frame(target: Drawer):
+    with memoryview(target) as view:
+        return view.tolist(), target.render(ColorMode.TRUECOLOR)
+
+
+def fresh(layers: dict):
+    # the same layers composed by a compositor without history
+    compositor = Compositor(PLANE)
+    target = Drawer(SIZE, PLANE)
+    for key, (drawer, pos, z, transform, clip) in layers.items():
+        compositor.set_layer(key, drawer, pos, z, transform, clip)
+    compositor.compose(target)
+    return frame(target)
+
+
+class Scene():
+    # a compositor that keeps its damage tracking between frames
+    def __init__(self):
+        self.compositor = Compositor(PLANE)
+        self.target = Drawer(SIZE, PLANE)
+        self.widgets = [widget(i) for i in range(5)]
+        self.layers = {i: (w, (i * 2, i * 3), 0, None, None) for i, w in enumerate(self.widgets)}
+
+    def change(self, key: int, **changes):
+        drawer, pos, z, transform, clip = self.layers[key]
+        values = {"pos": pos, "z": z, "transform": transform, "clip": clip, **changes}
+        self.layers[key] = (drawer, values["pos"], values["z"], values["transform"], values["clip"])
+
+    def compose(self):
+        for key, (drawer, pos, z, transform, clip) in self.layers.items():
+            self.compositor.set_layer(key, drawer, pos, z, transform, clip)
+        self.compositor.compose(self.target)
+        assert len(self.compositor) == len(self.layers)
+        assert frame(self.target) == fresh(self.layers)
+
+
+def test_move():
+    scene = Scene()
+    scene.compose()
+    scene.change(1, pos = (5, 7))
+    scene.compose()
+    # partly outside of the frame
+    scene.change(1, pos = (10, 25))
+    scene.compose()
+    scene.change(1, pos = (0, 0))
+    scene.compose()
+
+
+def test_remove():
+    scene = Scene()
+    scene.compose()
+    # a layer that is not set again is removed by `compose`
+    del scene.layers[2]
+    scene.compose()
+    # or removed right away
+    scene.compositor.remove_layer(3)
+    del scene.layers[3]
+    scene.compose()
+    scene.layers[2] = (scene.widgets[2], (1, 1), 0, None, None)
+    scene.compose()
+
+
+def test_z_order():
+    scene = Scene()
+    scene.compose()
+    scene.change(0, z = 2)
+    scene.compose()
+    scene.change(4, z = -1)
+    scene.compose()
+    scene.change(0, z = 0)
+    scene.compose()
+
+
+def test_transform_and_clip():
+    scene = Scene()
+    scene.compose()
+    for transform in TRANSFORMS[1:] + [None]:
+        scene.change(2, transform = transform)
+        scene.compose()
+    scene.change(1, clip = (2, 4, 3, 5))
+    scene.compose()
+    scene.change(1, clip = None)
+    scene.compose()
+
+
+def test_random_changes():
+    rng = random.Random(7)
+    scene = Scene()
+    scene.compose()
+    for step in range(300):
+        key = rng.randrange(len(scene.widgets))
+        if key not in scene.layers:
+            scene.layers[key] = (scene.widgets[key], (0, 0), 0, None, None)
+        action = rng.randrange(6)
+        if action == 0:
+            scene.change(key, pos = (rng.randrange(SIZE[0] + 2), rng.randrange(SIZE[1] + 4)))
+        elif action == 1:
+            scene.change(key, z = rng.randrange(-1, 2))
+        elif action == 2:
+            scene.change(key, transform = rng.choice(TRANSFORMS))
+        elif action == 3:
+            scene.change(key, clip = rng.choice([None, (0, 0, 6, 15), (3, 5, 20, 20)]))
+        elif action == 4:
+            del scene.layers[key]
+        else:
+            scene.widgets[key].place(AnsiString(f"s{step}", (step % 256, 0, 255), None), (0, 1), True)
+        scene.compose()
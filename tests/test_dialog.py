@@ -0,0 +1,24 @@
+import asyncio
+
+from pybud.gui.dialog import AutoDialog
+
+
+async def answer():
+    await asyncio.sleep(0)
+    return 42
+
+
+def test_run_task_without_loop():
+    results = []
+    AutoDialog(width=20).run_task(answer(), results.append)
+    assert results == [42]
+
+
+def test_run_task_in_a_running_loop():
+    # `show` called from a coroutine, e.g. a cell of a jupyter notebook
+    async def main():
+        results = []
+        AutoDialog(width=20).run_task(answer(), results.append)
+        return results
+
+    assert asyncio.run(main()) == [42]
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from pybud.gui.focus import FocusRing
+
+
+def ring(n: int):
+    focus = FocusRing()
+    widgets = [SimpleNamespace(is_disabled = True) for _ in range(n)]
+    for w in widgets:
+        focus.add(w)
+    return focus, widgets
+
+
+def test_move_wraps():
+    focus, widgets = ring(3)
+    assert focus.focused is widgets[0]
+    assert focus.move(-1)
+    assert focus.focused is widgets[2]
+    assert focus.move(1)
+    assert focus.focused is widgets[0]
+    assert [w.is_disabled for w in widgets] == [False, True, True]
+
+
+def test_move_without_wrap():
+    focus, widgets = ring(2)
+    assert not focus.move(-1, wrap = False)
+    assert focus.move(1, wrap = False)
+    assert not focus.move(1, wrap = False)
+    assert focus.focused is widgets[1]
+
+
+def test_move_reports_only_real_changes():
+    focus, widgets = ring(1)
+    # the only widget keeps the focus
+    assert not focus.move(1)
+    assert not focus.move(-1)
+    assert focus.focused is widgets[0] and not widgets[0].is_disabled
+    focus, _ = ring(3)
+    assert not focus.move(3)
+    assert not FocusRing().move(1)
+
+
+def test_added_widgets_keep_the_focus():
+    focus, widgets = ring(2)
+    focus.focus(widgets[1])
+    first = SimpleNamespace(is_disabled = True)
+    focus.add(first, order = -1)
+    assert focus.focused is widgets[1]
+    assert focus.index == 2
+    assert focus.index_of(first) == 0
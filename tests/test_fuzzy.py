@@ -0,0 +1,73 @@
+import random
+import time
+
+from pybud.gui.fuzzy import FuzzyIndex
+
+
+def is_subsequence(query: str, text: str):
+    it = iter(text)
+    return all(ch in it for ch in query)
+
+
+def brute_force(texts: list, query: str):
+    query = query.lower()
+    return [i for i, text in enumerate(texts) if is_subsequence(query, text.lower())]
+
+
+def random_texts(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    words = ["web", "server", "data", "base", "index", "Fuzzy", "dx", "log", "a-b", "aaa"]
+    return ["".join(rng.choice(words) + rng.choice(["", "-", " ", "_"]) for _ in range(rng.randint(1, 4))) for _ in range(n)]
+
+
+QUERIES = ["w", "we", "web", "webd", "web-d", "d", "dx", "xd", "z", "aaa", "a-b", "sx", "Fuz", "ee", "base index"]
+
+
+def test_matches_brute_force():
+    texts = random_texts(2000)
+    index = FuzzyIndex(texts)
+    for query in QUERIES:
+        assert list(index.matches(query)) == brute_force(texts, query), query
+
+
+def test_search_brute_force():
+    texts = random_texts(2000, seed = 2)
+    index = FuzzyIndex(texts)
+    for query in QUERIES:
+        assert sorted(index.search(query)) == brute_force(texts, query), query
+
+
+def test_typing_and_backspace():
+    # the matches are narrowed from the queries typed before, a backspace reuses them
+    texts = random_texts(1000, seed = 3)
+    index = FuzzyIndex(texts)
+    for query in ["w", "we", "web", "we", "wx", "w", "", "d", "da", "dat", "data"]:
+        expected = brute_force(texts, query) if query else list(range(len(texts)))
+        assert sorted(index.search(query)) == expected, query
+
+
+def test_search_ranking():
+    texts = ["xabc", "abcd", "a-b-c", "abc", "ab_c", "zzz"]
+    index = FuzzyIndex(texts)
+    ranked = list(index.search("abc"))
+    # texts that start with the query in text order, then the ones that contain
+    # it, then the other matches by how close the characters are together
+    assert ranked == [3, 1, 0, 4, 2]
+
+
+def test_key_and_case():
+    items = [("Alpha", 1), ("beta", 2), ("ALPACA", 3)]
+    index = FuzzyIndex(items, key = lambda item: item[0])
+    assert list(index.search("ALP")) == [2, 0]
+    assert list(index.matches("pa")) == [0, 2]
+
+
+def test_no_backtracking():
+    # a subsequence is matched greedily, a text that almost matches takes linear time
+    start = time.perf_counter()
+    index = FuzzyIndex(["a" * 3000])
+    assert list(index.search("aaab")) == []
+    index = FuzzyIndex(["a" * 20000 + "c"] * 10)
+    assert list(index.search("a" * 30 + "b")) == []
+    assert list(index.search("a" * 30 + "c")) == list(range(10))
+    assert time.perf_counter() - start < 1
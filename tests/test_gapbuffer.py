@@ -0,0 +1,121 @@
+import random
+
+from pybud.gui.gapbuffer import GapBuffer
+
+
+class Model():
+    # the same edits on a plain str
+    def __init__(self, text: str = ""):
+        self.text = text
+        self.cursor = len(text)
+
+    def insert(self, text: str):
+        self.text = self.text[:self.cursor] + text + self.text[self.cursor:]
+        self.cursor += len(text)
+
+    def delete_back(self, n: int = 1):
+        start = max(self.cursor - n, 0)
+        self.text = self.text[:start] + self.text[self.cursor:]
+        self.cursor = start
+
+    def delete_forward(self, n: int = 1):
+        self.text = self.text[:self.cursor] + self.text[self.cursor + n:]
+
+    def move_to(self, pos: int):
+        self.cursor = min(max(pos, 0), len(self.text))
+
+
+def check(buffer: GapBuffer, model: Model):
+    assert str(buffer) == model.text
+    assert len(buffer) == len(model.text)
+    assert buffer.cursor == model.cursor
+
+
+def test_edits_at_both_ends():
+    buffer, model = GapBuffer("middle"), Model("middle")
+    for b in (buffer, model):
+        b.move_to(0)
+        b.insert("<<")
+        b.delete_forward(2)
+        b.move_to(100)
+        b.insert(">>")
+        b.delete_back(3)
+    check(buffer, model)
+    assert str(buffer) == "<<ddl"
+    # deleting past either end stops there
+    buffer.delete_forward(5)
+    buffer.move_to(0)
+    buffer.delete_back(5)
+    assert str(buffer) == "<<ddl"
+    buffer.delete_forward(100)
+    assert str(buffer) == "" and buffer.cursor == 0
+
+
+def test_move_to_is_clamped():
+    buffer = GapBuffer("abc")
+    buffer.move_to(-5)
+    assert buffer.cursor == 0
+    buffer.move_to(10)
+    assert buffer.cursor == 3
+    buffer.move(-2)
+    assert buffer.cursor == 1
+    buffer.move(-2)
+    assert buffer.cursor == 0
+    buffer.move(7)
+    assert buffer.cursor == 3
+    assert str(buffer) == "abc"
+
+
+def test_growing():
+    # inserts much longer than the text, in the middle and after moving back and forth
+    buffer, model = GapBuffer("ab"), Model("ab")
+    for i in range(20):
+        text = chr(ord("a") + i) * (i * 50)
+        for b in (buffer, model):
+            b.move_to(len(model.text) // 2)
+            b.insert(text)
+        check(buffer, model)
+    buffer.move_to(0)
+    model.move_to(0)
+    check(buffer, model)
+    assert buffer.slice(1000, 1100) == model.text[1000:1100]
+
+
+def test_slice():
+    text = "hello gap buffer"
+    buffer = GapBuffer(text)
+    for cursor in range(len(text) + 1):
+        buffer.move_to(cursor)
+        for start in range(-2, len(text) + 2):
+            for end in range(start, len(text) + 3):
+                assert buffer.slice(start, end) == text[max(start, 0):max(end, 0)], (cursor, start, end)
+
+
+def test_random_edits():
+    rng = random.Random(3)
+    buffer, model = GapBuffer(), Model()
+    for _ in range(2000):
+        action = rng.randrange(5)
+        if action == 0:
+            text = "".join(rng.choice("xyz\n ") for _ in range(rng.randrange(8)))
+            buffer.insert(text)
+            model.insert(text)
+        elif action == 1:
+            n = rng.randrange(4)
+            buffer.delete_back(n)
+            model.delete_back(n)
+        elif action == 2:
+            n = rng.randrange(4)
+            buffer.delete_forward(n)
+            model.delete_forward(n)
+        elif action == 3:
+            pos = rng.randrange(-3, len(model.text) + 4)
+            buffer.move_to(pos)
+            model.move_to(pos)
+        else:
+            n = rng.randrange(-6, 7)
+            buffer.move(n)
+            model.move_to(model.cursor + n)
+        check(buffer, model)
+    buffer.clear()
+    assert str(buffer) == "" and len(buffer) == 0 and buffer.cursor == 0
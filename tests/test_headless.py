@@ -0,0 +1,79 @@
+from pybud.drawer.color import ColorMode
+from pybud.gui.dialog import AutoDialog
+from pybud.gui.keyboard import Key
+from pybud.gui.terminal import HeadlessTerminal
+from pybud.gui.widgets import WidgetInput
+
+BACKGROUND = (90, 90, 250)
+
+
+def sign_in_dialog(terminal: HeadlessTerminal):
+    dialog = AutoDialog(width=40, ctype=ColorMode.TRUECOLOR, background_color=BACKGROUND, animated=False, terminal=terminal)
+    dialog.add_widget(WidgetInput("Name: ", size=[30, None], pos=[2, 1]))
+    dialog.add_widget(WidgetInput("City: ", size=[30, None], pos=[2, 2]))
+    return dialog
+
+
+def label_styles(terminal: HeadlessTerminal):
+    # the focused widget is shaded, the labels of both inputs tell which one it is
+    return terminal.style_at(*terminal.find("Name: ")), terminal.style_at(*terminal.find("City: "))
+
+
+def test_scripted_dialog():
+    screens = []
+
+    def check(terminal):
+        screens.append((terminal.text(), label_styles(terminal), terminal.frames))
+
+    def never_called(terminal):
+        raise AssertionError("the script is read after ESC")
+
+    terminal = HeadlessTerminal(width=60, height=10)
+    terminal.feed_text("ab")
+    terminal.feed(0.01, check, Key.TAB)
+    terminal.feed_text("xy")
+    terminal.feed(check, Key.ESC, never_called)
+    dialog = sign_in_dialog(terminal)
+    dialog.show()
+
+    (before, before_styles, before_frames), (after, after_styles, after_frames) = screens
+    assert "Name: ab" in before and "City:" in before
+    assert "City: xy" in after and "Name: ab" in after
+    # the focus moved from the first input to the second
+    assert before_styles[0] != before_styles[1]
+    assert after_styles == before_styles[::-1]
+    # frames are complete synchronized updates
+    assert 0 < before_frames < after_frames
+    assert not terminal.synchronized
+
+    # ESC closed the dialog and cleared its area, the rest of the script is left
+    assert dialog.closed
+    assert list(terminal.script) == [never_called]
+    assert terminal.find("Name:") is None and terminal.find("City:") is None
+
+
+def test_dialog_colors():
+    rows = []
+
+    def check(terminal):
+        y, _ = terminal.find("City: ")
+        rows.append([terminal.style_at(y, x) for x in range(40)])
+
+    terminal = HeadlessTerminal(width=60, height=10, keys=[check])
+    sign_in_dialog(terminal).show()
+    (row,) = rows
+    # the last column of the dialog is the plane, the label of the input without focus is green on it
+    assert row[39][0] == "48;2;90;90;250"
+    assert "38;2;50;200;50" in row[3]
+
+
+def test_end_of_script_closes_the_dialog():
+    shown = []
+    terminal = HeadlessTerminal(width=60, height=10, keys=["h", "i", lambda t: shown.append(t.find("Name: hi"))])
+    dialog = sign_in_dialog(terminal)
+    dialog.show()
+    assert shown[0] is not None
+    # nothing is left to read, the dialog was closed as if stdin was
+    assert dialog.closed
+    assert not terminal.script
+    assert terminal.find("Name:") is None
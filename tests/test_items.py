@@ -0,0 +1,72 @@
+from itertools import count
+
+import pytest
+
+from pybud.gui.items import LazyItems
+
+
+def counted(n: int, pulled: list):
+    # yields 0..n-1 and counts how many items were read
+    for i in range(n):
+        pulled[0] += 1
+        yield i
+
+
+def test_sequence_is_used_as_is():
+    items = LazyItems(range(10))
+    assert items.exhausted
+    assert len(items) == 10
+    assert items.known_len() == 10
+    assert items[3] == 3
+    assert items.has(9) and not items.has(10) and not items.has(-1)
+
+
+def test_iterable_is_read_lazily():
+    pulled = [0]
+    items = LazyItems(counted(100, pulled))
+    assert not items.exhausted
+    assert items.known_len() == 0
+    assert items[4] == 4
+    assert pulled[0] == 5
+    assert items.has(9)
+    assert pulled[0] == 10
+    assert items.known_len() == 10
+    # items read before are kept
+    assert items[0] == 0
+    assert pulled[0] == 10
+    assert not items.exhausted
+
+
+def test_iterable_exhaustion():
+    items = LazyItems(iter(range(5)))
+    assert items.has(4)
+    assert not items.exhausted
+    assert not items.has(5)
+    assert items.exhausted
+    assert items.known_len() == len(items) == 5
+    with pytest.raises(IndexError):
+        items[5]
+
+
+def test_len_reads_to_the_end():
+    pulled = [0]
+    items = LazyItems(counted(3000, pulled))
+    items[10]
+    assert len(items) == 3000
+    assert pulled[0] == 3000
+    assert items.exhausted
+    assert items[2999] == 2999
+
+
+def test_empty_iterable():
+    items = LazyItems(iter([]))
+    assert not items.has(0)
+    assert items.exhausted
+    assert len(items) == 0
+
+
+def test_infinite_iterable():
+    items = LazyItems(count())
+    assert items[1000] == 1000
+    assert items.has(5000)
+    assert not items.exhausted
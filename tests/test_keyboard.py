@@ -0,0 +1,120 @@
+import os
+import selectors
+import threading
+
+from pybud.gui.keyboard import ESCAPE_TIMEOUT, PASTE_END, PASTE_START, KeyReader, Paste, decode_keys, single_line
+from pybud.gui.widgets import WidgetInput, WidgetPicker
+from readchar import key as Key
+
+
+def test_decode_keys_paste():
+    keys, rest = decode_keys("a\x1b[200~hello\nworld\x1b[201~b")
+    assert keys == ["a", "hello\nworld", "b"]
+    assert isinstance(keys[1], Paste)
+    assert rest == ""
+
+
+def test_decode_keys_incomplete_paste():
+    keys, rest = decode_keys("a\x1b[200~hel")
+    assert keys == ["a"]
+    assert rest == "\x1b[200~hel"
+
+
+def test_single_line():
+    assert single_line("hello\nworld") == "hello world"
+    assert single_line("a\r\nb\tc") == "a b c"
+    assert single_line("a\x07b\x1b[31mc\x7f") == "ab[31mc"
+    assert single_line("plain") == "plain"
+
+
+def test_input_paste_is_single_line():
+    w = WidgetInput("name: ", size=[40, 1])
+    keys, _ = decode_keys("\x1b[200~hello\nworld\t!\x07\x1b[201~")
+    for key in keys:
+        w.update(key)
+    assert w.input == "hello world !"
+    # a paste of control characters only inserts nothing
+    w.update(Paste("\x07\x00"))
+    assert w.input == "hello world !"
+
+
+def test_picker_paste_is_single_line():
+    w = WidgetPicker(["hello world", "other"], size=[40, None])
+    w.update(Paste("hello\nwor"))
+    assert w.query == "hello wor"
+    assert list(w.items) == ["hello world"]
+    w.update(Key.BACKSPACE)
+    assert w.query == "hello wo"
+
+
+def pipe_reader():
+    # a `KeyReader` on a pipe instead of stdin
+    reader = KeyReader()
+    reader.fd, write_fd = os.pipe()
+    reader.selector = selectors.DefaultSelector()
+    reader.selector.register(reader.fd, selectors.EVENT_READ)
+    return reader, write_fd
+
+
+def test_paste_in_many_reads():
+    reader, write_fd = pipe_reader()
+    text = "".join(f"line {i}\n" for i in range(2000))
+    data = ("a" + PASTE_START + text + PASTE_END + "b").encode()
+    keys = []
+    # the end of the paste is split between two reads too
+    for i in range(0, len(data), 997):
+        os.write(write_fd, data[i:i + 997])
+        keys += reader.read_keys()
+    assert keys == ["a", text, "b"]
+    assert isinstance(keys[1], Paste)
+    os.close(write_fd)
+    reader.selector.close()
+    os.close(reader.fd)
+
+
+def test_paste_end_split_at_every_position():
+    for split in range(1, len(PASTE_END)):
+        reader, write_fd = pipe_reader()
+        for chunk in [PASTE_START + "x", "yz" + PASTE_END[:split], PASTE_END[split:] + "\x1b[A"]:
+            os.write(write_fd, chunk.encode())
+            reader._read()
+        assert reader.read_keys() == ["xyz", Key.UP]
+        os.close(write_fd)
+        reader.selector.close()
+        os.close(reader.fd)
+
+
+def test_escape_waits_despite_wake_up():
+    # a pending wake up of the loop does not end the wait for the rest of an escape sequence
+    reader, write_fd = pipe_reader()
+    wakeup = os.pipe()
+    reader.selector.register(wakeup[0], selectors.EVENT_READ)
+    os.write(wakeup[1], b"\0")
+    os.write(write_fd, b"\x1b")
+    threading.Timer(ESCAPE_TIMEOUT / 5, os.write, (write_fd, b"[A")).start()
+    assert reader.read_keys() == []
+    assert reader.read_keys() == [Key.UP]
+    for fd in (*wakeup, write_fd):
+        os.close(fd)
+    reader.selector.close()
+    os.close(reader.fd)
+
+
+def test_escape_finished_by_the_loop():
+    # an event loop does not wait for the rest of a sequence, it finishes it later
+    reader, write_fd = pipe_reader()
+    reader.wait_escape = False
+    os.write(write_fd, b"a\x1b")
+    assert reader.read_keys() == ["a"]
+    assert reader.pending_escape()
+    assert reader.finish_escape() == [Key.ESC]
+    assert not reader.pending_escape()
+    # the rest arrived in time
+    os.write(write_fd, b"\x1b")
+    assert reader.read_keys() == []
+    os.write(write_fd, b"[A")
+    assert reader.read_keys() == [Key.UP]
+    assert not reader.pending_escape()
+    os.close(write_fd)
+    reader.selector.close()
+    os.close(reader.fd)
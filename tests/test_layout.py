@@ -0,0 +1,118 @@
+import pytest
+
+from pybud.gui.layout import Grid, HStack, Layout, VStack, iter_widgets
+
+
+class Box():
+    # a widget of `length` characters that wraps at the width it is given
+    def __init__(self, length: int):
+        self.length = length
+        self.layout_parent = None
+        self.pos = [0, 0]
+        self.size = [0, 0]
+        self.measures = 0
+
+    def measure(self, width: int):
+        self.measures += 1
+        return max(-(-self.length // max(width, 1)), 1)
+
+    def resize(self, length: int):
+        # what `WidgetBase` does when one of its `layout_attrs` changes
+        self.length = length
+        self.layout_parent.invalidate()
+
+
+def geometry(box: Box):
+    return (*box.pos, *box.size)
+
+
+def test_layout_is_abstract():
+    with pytest.raises(TypeError):
+        Layout()
+
+    class Incomplete(Layout):
+        def _measure(self, width: int):
+            return 0
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_vstack():
+    a, b, c = Box(10), Box(25), Box(3)
+    stack = VStack(a, b, c, gap = 1, padding = 1)
+    # 1 + 3 + 1 lines inside, two gaps and the padding
+    assert stack.measure(12) == 5 + 2 + 2
+    stack.place(2, 4, 12)
+    assert [geometry(w) for w in (a, b, c)] == [(3, 5, 10, 1), (3, 7, 10, 3), (3, 11, 10, 1)]
+
+
+def test_hstack():
+    a, b, c = Box(4), Box(20), Box(1)
+    stack = HStack(a, b, c, weights = [1, 2, 1], gap = 1)
+    # 14 columns without the gaps, split 3 + 1 for the rest of the division, 7 and 3
+    assert stack.measure(16) == 3
+    stack.place(0, 0, 16)
+    assert [geometry(w) for w in (a, b, c)] == [(0, 0, 4, 1), (5, 0, 7, 3), (13, 0, 3, 1)]
+
+
+def test_grid():
+    boxes = [Box(n) for n in (3, 9, 1, 2, 8)]
+    grid = Grid(2, *boxes, gap = 2, row_gap = 1)
+    # two columns of 4, the rows are 1, 3 and 2 lines high
+    assert grid.measure(10) == 3 + 1 + 1 + 1 + 2
+    grid.place(0, 0, 10)
+    assert [geometry(w) for w in boxes] == [
+        (0, 0, 4, 1), (6, 0, 4, 3),
+        (0, 4, 4, 1), (6, 4, 4, 1),
+        (0, 6, 4, 2),
+    ]
+    assert list(iter_widgets(grid)) == boxes
+
+
+def test_nested_layouts():
+    a, b, c = Box(5), Box(5), Box(30)
+    root = VStack(HStack(a, b, gap = 0), c)
+    assert root.measure(10) == 1 + 3
+    root.place(0, 1, 10)
+    assert [geometry(w) for w in (a, b, c)] == [(0, 1, 5, 1), (5, 1, 5, 1), (0, 2, 10, 3)]
+    assert list(iter_widgets(root)) == [a, b, c]
+
+
+def test_geometry_is_cached():
+    a, b, c = Box(5), Box(5), Box(30)
+    top = VStack(c)
+    row = HStack(a, b, gap = 0)
+    root = VStack(top, row)
+    root.place(0, 0, 10)
+    counts = [w.measures for w in (a, b, c)]
+    # nothing changed, nothing is measured again
+    root.place(0, 0, 10)
+    assert root.measure(10) == 4
+    assert [w.measures for w in (a, b, c)] == counts
+
+    # a change in the row measures the row again, the sibling keeps its size and place
+    a.resize(12)
+    assert root._measured_width is None and row._measured_width is None
+    assert top._measured_width == 10
+    root.place(0, 0, 10)
+    assert a.measures > counts[0] and b.measures > counts[1]
+    assert c.measures == counts[2]
+    assert [geometry(w) for w in (c, a, b)] == [(0, 0, 10, 3), (0, 3, 5, 3), (5, 3, 5, 1)]
+    assert root.measure(10) == 6
+
+    # a new width measures everything again
+    counts = [w.measures for w in (a, b, c)]
+    root.place(0, 0, 20)
+    assert all(w.measures > n for w, n in zip((a, b, c), counts))
+    assert [geometry(w) for w in (c, a, b)] == [(0, 0, 20, 2), (0, 2, 10, 2), (10, 2, 10, 1)]
+
+
+def test_moved_layout_is_placed_again():
+    a = Box(5)
+    root = VStack(a, padding = 1)
+    root.place(0, 0, 10)
+    assert geometry(a) == (1, 1, 8, 1)
+    root.place(3, 2, 10)
+    assert geometry(a) == (4, 3, 8, 1)
+    assert root.measure(10) == 3
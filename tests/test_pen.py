@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from pybud.drawer import Drawer
+from pybud.drawer.ansi import AnsiGraphicMode, AnsiString
+from pybud.drawer.color import ColorMode
+from pybud.gui.terminal import HeadlessTerminal
+
+MODES = [ColorMode.TRUECOLOR, ColorMode.LIMITED, ColorMode.ANSI16, ColorMode.MONOCHROME]
+GRAPHICS = [AnsiGraphicMode.BOLD, AnsiGraphicMode.FAINT, AnsiGraphicMode.ITALIC, AnsiGraphicMode.UNDERLINE, AnsiGraphicMode.REVERSE, AnsiGraphicMode.STRIKE]
+RED = (255, 0, 0)
+
+
+def styled(text: str, fore = None, back = None, *graphics):
+    astr = AnsiString(text, fore, back)
+    for g in graphics:
+        astr.add_graphics(g)
+    return astr
+
+
+def random_line(n: int, seed: int):
+    # few colors and graphics, so neighbouring characters often share a part of their style
+    rng = random.Random(seed)
+    colors = [None, RED, (0, 255, 0), (250, 250, 250), (4, 4, 4), (254, 1, 1)]
+    line = AnsiString("", None, None)
+    for _ in range(n):
+        line = line + styled(rng.choice("abc "), rng.choice(colors), rng.choice(colors), *rng.sample(GRAPHICS, rng.randint(0, 3)))
+    return line
+
+
+def full_sgr(astr: AnsiString, mode: ColorMode):
+    # every character with its whole style and a reset, how lines were written before the pen
+    return "".join(astr[i].to_string(mode) + "\x1b[0m" for i in range(len(astr)))
+
+
+def parsed(text: str, width: int = 80, height: int = 1):
+    terminal = HeadlessTerminal(width=width, height=height)
+    terminal.write(text.encode())
+    return terminal
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_same_screen_as_full_sgr(mode):
+    for seed in range(20):
+        line = random_line(60, seed)
+        delta, full = parsed(line.to_string(mode)), parsed(full_sgr(line, mode))
+        assert delta.line(0) == full.line(0)
+        assert delta.styles == full.styles, seed
+        # the pen leaves the terminal with the default style
+        assert delta.pen == ()
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_drawer_same_screen_as_full_sgr(mode):
+    d = Drawer((4, 30), (20, 20, 60))
+    for y in range(4):
+        d.place(random_line(25, y), (y, y), False)
+    expected = "".join(full_sgr(d[y], mode) + "\n" for y in range(4))
+    delta, full = parsed(d.render(mode), 30, 5), parsed(expected, 30, 5)
+    assert delta.text() == full.text()
+    assert delta.styles == full.styles
+
+
+def test_bold_and_faint():
+    # "22" turns off both, the one that stays is set again
+    assert (styled("a", RED, None, AnsiGraphicMode.BOLD) + styled("b", RED, None, AnsiGraphicMode.FAINT)).to_string(ColorMode.TRUECOLOR) == \
+        "\x1b[38;2;255;0;0;1ma\x1b[22;2mb\x1b[0m"
+    assert (styled("a", RED, None, AnsiGraphicMode.FAINT) + styled("b", RED, None, AnsiGraphicMode.BOLD)).to_string(ColorMode.TRUECOLOR) == \
+        "\x1b[38;2;255;0;0;2ma\x1b[22;1mb\x1b[0m"
+    both = styled("a", RED, None, AnsiGraphicMode.BOLD, AnsiGraphicMode.FAINT)
+    assert (both + styled("b", RED, None, AnsiGraphicMode.BOLD)).to_string(ColorMode.TRUECOLOR) == \
+        "\x1b[38;2;255;0;0;1;2ma\x1b[22;1mb\x1b[0m"
+
+
+def test_only_intensity_changes():
+    line = styled("a", RED, None, AnsiGraphicMode.BOLD) + styled("b", RED, None)
+    assert line.to_string(ColorMode.TRUECOLOR) == "\x1b[38;2;255;0;0;1ma\x1b[22mb\x1b[0m"
+    terminal = parsed(line.to_string(ColorMode.TRUECOLOR))
+    assert terminal.style_at(0, 0) == ("38;2;255;0;0", "1")
+    assert terminal.style_at(0, 1) == ("38;2;255;0;0",)
+
+
+def test_reset_or_delta():
+    # a few changed parameters are written as they are
+    line = styled("a", RED, None) + styled("b", RED, None, AnsiGraphicMode.UNDERLINE)
+    assert line.to_string(ColorMode.TRUECOLOR) == "\x1b[38;2;255;0;0ma\x1b[4mb\x1b[0m"
+    # turning off most of the style is longer than a reset and the new style
+    line = styled("a", RED, (0, 0, 255), AnsiGraphicMode.ITALIC, AnsiGraphicMode.UNDERLINE) + styled("b", (0, 255, 0), None)
+    assert line.to_string(ColorMode.TRUECOLOR) == "\x1b[48;2;0;0;255;38;2;255;0;0;3;4ma\x1b[0;38;2;0;255;0mb\x1b[0m"
+
+
+def test_end_line_resets_the_back_color():
+    d = Drawer((2, 3), (0, 0, 255))
+    d.place(styled("x", RED, None), (1, 0), False)
+    assert d.render(ColorMode.TRUECOLOR) == \
+        "\x1b[48;2;0;0;255m   \x1b[0m\n\x1b[48;2;0;0;255;38;2;255;0;0mx\x1b[39m  \x1b[0m\n"
+    d = Drawer((2, 3), None)
+    d.place(styled("x", RED, None), (0, 2), False)
+    # a fore color is kept over the new line
+    assert d.render(ColorMode.TRUECOLOR) == "  \x1b[38;2;255;0;0mx\n\x1b[0m   \n"
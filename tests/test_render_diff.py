@@ -0,0 +1,72 @@
+import re
+
+from pybud.drawer import Drawer
+from pybud.drawer.ansi import AnsiString
+from pybud.drawer.color import ColorMode
+from pybud.gui.terminal import HeadlessTerminal
+
+MODE = ColorMode.TRUECOLOR
+SGR = re.compile("\x1b\\[[0-9;]*m")
+
+
+def drawer():
+    d = Drawer((3, 10), (10, 20, 30))
+    d.place(AnsiString("hello", (200, 200, 200), None), (0, 1), False)
+    return d
+
+
+def screen(*frames):
+    # the drawer starts on the first line, a frame leaves the cursor on the line below it
+    terminal = HeadlessTerminal(width=10, height=4)
+    terminal.write(b"\n" * 3)
+    for frame in frames:
+        terminal.write(frame.encode())
+    return terminal
+
+
+def test_first_diff_is_a_full_frame():
+    d = drawer()
+    assert d.render_diff(MODE) == "\x1b[3F" + d.render(MODE)
+
+
+def test_unchanged_frame_is_empty():
+    d = drawer()
+    d.render_diff(MODE)
+    assert d.render_diff(MODE) == ""
+    # placing the same cells again does not damage them
+    d.place(AnsiString("hello", (200, 200, 200), None), (0, 1), False)
+    assert d.render_diff(MODE) == ""
+
+
+def test_one_changed_cell():
+    d = drawer()
+    full = d.render_diff(MODE)
+    d.place(AnsiString("X", (255, 0, 0), None), (1, 4), True)
+    diff = d.render_diff(MODE)
+    # up to the first line, down to the row, to the column, the cell and back below the drawer
+    match = re.fullmatch("\x1b\\[3F\x1b\\[1B\x1b\\[5G(.*)\x1b\\[2E", diff, re.S)
+    assert match is not None, repr(diff)
+    assert SGR.sub("", match.group(1)) == "X"
+    assert d.render_diff(MODE) == ""
+    assert screen(full, diff).text() == screen("\x1b[3F" + d.render(MODE)).text()
+
+
+def test_diff_matches_the_full_frame():
+    d = drawer()
+    full = d.render_diff(MODE)
+    d.place(AnsiString("ab", None, (255, 255, 0)), (0, 7), True)
+    d.place(AnsiString("c", (0, 0, 255), None), (2, 0), True)
+    diff = d.render_diff(MODE)
+    expected = screen("\x1b[3F" + d.render(MODE))
+    actual = screen(full, diff)
+    assert actual.text() == expected.text()
+    assert actual.styles == expected.styles
+    assert actual.cursor == expected.cursor
+
+
+def test_invalidate_forces_a_full_frame():
+    d = drawer()
+    d.render_diff(MODE)
+    d.invalidate()
+    assert d.render_diff(MODE) == "\x1b[3F" + d.render(MODE)
+    assert d.render_diff(MODE) == ""
@@ -0,0 +1,120 @@
+from pybud.gui.dialog import TPS, AutoDialog
+from pybud.gui.scheduler import Scheduler
+
+
+class Clock():
+    # a clock that only moves when told to, times are multiples of 1/8 so they add up exactly
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+def test_pop_due():
+    clock = Clock()
+    scheduler = Scheduler(tps = 8, clock = clock)
+    assert scheduler.timeout() is None
+    assert not scheduler.pop_due()
+    scheduler.request(0.5)
+    # only the earliest request matters
+    scheduler.request(1)
+    assert scheduler.timeout() == 0.5
+    clock.advance(0.375)
+    assert scheduler.timeout() == 0.125
+    assert not scheduler.pop_due()
+    clock.advance(0.125)
+    assert scheduler.pop_due()
+    assert not scheduler.pop_due()
+    assert scheduler.timeout() is None
+    assert scheduler.lateness == 0 and scheduler.missed_ticks == 0
+
+
+def test_late_update_misses_ticks():
+    clock = Clock()
+    scheduler = Scheduler(tps = 8, clock = clock)
+    scheduler.request(0.25)
+    scheduler.request(-1)
+    # a negative delay is due right away
+    assert scheduler.timeout() == 0
+    scheduler.pop_due()
+    scheduler.request(0.25)
+    clock.advance(0.75)
+    assert scheduler.timeout() == 0
+    assert scheduler.pop_due()
+    assert scheduler.lateness == 0.5
+    assert scheduler.missed_ticks == 4
+
+
+def test_frame_wait():
+    clock = Clock()
+    assert Scheduler(tps = 8, clock = clock).frame_wait() == 0
+    scheduler = Scheduler(tps = 8, fps = 4, clock = clock)
+    assert scheduler.frame_interval == 0.25
+    assert scheduler.frame_wait() == 0
+    scheduler.frame_started()
+    assert scheduler.frame_wait() == 0.25
+    clock.advance(0.125)
+    assert scheduler.frame_wait() == 0.125
+    clock.advance(0.25)
+    assert scheduler.frame_wait() == 0
+
+
+def test_dropped_frames():
+    clock = Clock()
+    scheduler = Scheduler(tps = 8, clock = clock)
+    scheduler.mark_dirty()
+    clock.advance(0.25)
+    # marking it again keeps the time of the first change
+    scheduler.mark_dirty()
+    clock.advance(0.25)
+    scheduler.frame_started()
+    assert scheduler.dropped_frames == 4
+    assert not scheduler.dirty
+    # a frame without changes drops nothing
+    clock.advance(1)
+    scheduler.frame_started()
+    assert scheduler.dropped_frames == 4
+
+
+def test_dropped_frames_with_fps():
+    clock = Clock()
+    scheduler = Scheduler(tps = 8, fps = 4, clock = clock)
+    scheduler.frame_started()
+    scheduler.mark_dirty()
+    # the frame was not due before the fps limit allowed it
+    clock.advance(0.25)
+    scheduler.frame_started()
+    assert scheduler.dropped_frames == 0
+    scheduler.mark_dirty()
+    clock.advance(0.75)
+    scheduler.frame_started()
+    assert scheduler.dropped_frames == 2
+
+
+def test_dialog_rates():
+    dialog = AutoDialog(width = 20)
+    assert dialog.scheduler.tps == TPS and dialog.scheduler.fps is None
+    dialog = AutoDialog(width = 20, tps = 8, fps = 4)
+    assert dialog.scheduler.tps == 8 and dialog.scheduler.fps == 4
+    assert dialog.scheduler.frame_interval == 0.25
+
+
+def test_deferred_frames():
+    clock = Clock()
+    dialog = AutoDialog(width = 20, tps = 8, fps = 4)
+    dialog.scheduler.clock = clock
+    dialog.scheduler.frame_started()
+    clock.advance(0.125)
+    # a change within the frame interval is drawn by an update at its end
+    dialog.mark_dirty()
+    dialog.present()
+    assert dialog.scheduler.deferred_frames == 1
+    assert dialog.scheduler.timeout() == 0.125
+    assert dialog.scheduler.dirty
+    clock.advance(0.125)
+    assert dialog.scheduler.pop_due()
+    assert dialog.scheduler.frame_wait() == 0
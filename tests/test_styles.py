@@ -0,0 +1,50 @@
+from pybud.drawer import Drawer
+from pybud.drawer.ansi import AnsiGraphicMode, AnsiString
+from pybud.drawer.color import ColorMode
+
+# the table collects its unused styles once it holds this many, see `MAX_STYLES` in style.rs
+MAX_STYLES = 16384
+
+
+def style_ids(obj):
+    with memoryview(obj) as view:
+        return view.tolist()
+
+
+def transient_style(i: int):
+    # a style no other string has, the string is dropped right away
+    astr = AnsiString("x", (i & 255, i >> 8 & 255, i >> 16), None)
+    with memoryview(astr) as view:
+        return view[0, 1]
+
+
+def test_pinned_styles_survive_collections():
+    kept = AnsiString("kept", (1, 2, 3), (4, 5, 6))
+    kept.add_graphics(AnsiGraphicMode.ITALIC)
+    drawer = Drawer((3, 12), (7, 8, 9))
+    drawer.place(AnsiString("over", (10, 11, 12), None), (1, 2), False)
+    drawer.place(kept, (2, 5), True)
+    renders = [(kept.to_string(mode), drawer.render(mode)) for mode in (ColorMode.TRUECOLOR, ColorMode.LIMITED, ColorMode.ANSI16)]
+    ids = (style_ids(kept), style_ids(drawer))
+
+    # a few collections, the table would hold every style without them
+    transient = [transient_style(i) for i in range(5 * MAX_STYLES)]
+    assert max(transient) < 3 * MAX_STYLES
+    # removed ids are used again
+    assert len(set(transient)) < len(transient)
+
+    assert (style_ids(kept), style_ids(drawer)) == ids
+    assert [(kept.to_string(mode), drawer.render(mode)) for mode in (ColorMode.TRUECOLOR, ColorMode.LIMITED, ColorMode.ANSI16)] == renders
+    # the styles of the pinned cells are not handed out for other styles
+    pinned = {row[1] for row in ids[0]} | {cell[1] for row in ids[1] for cell in row}
+    assert not pinned & set(transient[-MAX_STYLES:])
+
+
+def test_styles_after_a_collection():
+    for i in range(2 * MAX_STYLES):
+        transient_style(i)
+    # a style interned after the collection renders like before it
+    astr = AnsiString("new", (200, 100, 0), (0, 0, 0))
+    drawer = Drawer((1, 5), (0, 0, 0))
+    drawer.place(astr, (0, 1), False)
+    assert drawer.render(ColorMode.TRUECOLOR) == "\x1b[48;2;0;0;0m \x1b[38;2;200;100;0mnew\x1b[39m \x1b[0m\n"